@@ -1,24 +1,4 @@
-def kwh_chp_cost_calculator(c_NG, tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M):  
-    """  
-    Calculates the cost per kWh produced by a combined heat and power (CHP) system.  
-
-    Args:  
-        c_NG (float): Cost of natural gas for the CHP system (€/m³).  
-        tax (float): Tax on natural gas (€/m³).  
-        LH (float): Lower heating value (LHV) of natural gas (kWh/m³).  
-        eta_e (float): Effective electrical efficiency of the CHP system.  
-        eta_t (float): Effective thermal efficiency of the CHP system.  
-        eta_t_re (float): Reference thermal efficiency for comparison.  
-        eta_e_CHP_re (float): Reference electrical efficiency for tax exemption calculation (default: 0.474).  
-        M (float): Maintenance costs (€/kWh).  
-
-    Returns:  
-        float: Cost per kWh produced by the CHP system (€/kWh).  
-    """  
-
-    # Formula to compute the cost per kWh produced by CHP
-    c_kWh_CH = (1 / (eta_e * LH)) * (c_NG + (1 - eta_e / eta_e_CHP_re) * tax - (eta_t / eta_t_re) * (c_NG + tax)) + M  
-    return c_kWh_CH  
+from chp_cost import kwh_chp_cost_calculator
 
 # Function to request input with a default value
 def input_with_deafult(prompt, default):
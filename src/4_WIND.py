@@ -1,97 +1,48 @@
+import ast
+import sys
+
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
-def calculate_wind(Z, alpha, AG, Pe, speed_power, K):
-    # Read the file skipping the first 17 rows
-    data_file = 'wind_speed.csv'  # Replace with the correct file name
-    output_pct_file = 'wind_speed_pct.csv'
-
-    # Load the CSV file
-    col_names = ["time(UTC)", "T2m", "RH", "G(h)", "Gb(n)", "Gd(h)", "IR(h)", "WS10m", "WD10m", "SP"]
-    df = pd.read_csv(data_file, skiprows=18, names=col_names)
-
-    # Remove the last 10 rows
-    df = df[:-10]
+from hour_index import align_hours, calendar_hour_index, parse_calendar_hours
+from investment import DISCOUNT_RATE, YEARS, annuity_factor, evaluate_investment
+from pvgis_reader import read_pvgis
+from settlement import BUY_PRICES, SELL_PRICES, band_prices, settle
+from wind_engine import hub_wind_speed, wind_production
 
-    # Keep only the required columns: time(UTC), WS10m
-    df = df[["time(UTC)", "WS10m"]]
+def calculate_wind(Z, alpha, AG, Pe, speed_power, K, data_file='wind_speed.csv', plots=True, show=True):
+    output_pct_file = 'wind_speed_pct.csv'
 
-    # Rename WS10m column to WS
-    df = df.rename(columns={'WS10m': 'WS'})
+    # Read the time(UTC) and WS10m columns of the PVGIS file
+    location = read_pvgis(data_file, columns=['WS10m'])
+    df = pd.DataFrame({"time(UTC)": location['time'], "WS": location['WS10m']})
 
     # Format the time(UTC) column as day-month hour:minute
-    df["time(UTC)"] = pd.to_datetime(df["time(UTC)"], format='%Y%m%d:%H%M').dt.strftime('%d-%m %H:%M')
+    df["time(UTC)"] = df["time(UTC)"].dt.strftime('%d-%m %H:%M')
 
     # Apply the adjustment formula to WS
-    df["WS"] = df["WS"] * (Z / 10) ** alpha
+    df["WS"] = hub_wind_speed(df["WS"], Z, alpha)
 
-    # Round WS and calculate frequency
+    # Calculate hourly power, annual energy and frequency of the wind speed in one pass
     if not df.empty:
-        df["WS"] = df["WS"].round().astype(int)
-        total_hours = len(df)
+        production = wind_production(df["WS"], speed_power)
 
-        # Calculate percentage of occurrences
-        wind_speed_pct = (df["WS"].value_counts(normalize=True) * 100).reset_index()
-        wind_speed_pct.columns = ["WS", "%_h"]
+        # Percentage of occurrences per wind speed
+        wind_speed_pct = production['histogram']
 
         # Save the percentage file
         wind_speed_pct.to_csv(output_pct_file, index=False)
         print(f"Percentage file saved as: {output_pct_file}")
 
-        # Plot the distribution graph
-        fig, ax1 = plt.subplots(figsize=(10, 6))
-
-        # Histogram of wind speed distribution
-        ax1.bar(wind_speed_pct["WS"], wind_speed_pct["%_h"], color='skyblue', label='Wind Speed Distribution')
-        ax1.set_xlabel(f"Wind Speed (WS{Z}m)")
-        ax1.set_ylabel("% of Hours", color='blue')
-        ax1.grid(axis='y', linestyle='--', alpha=0.6)
-        ax1.tick_params(axis='y', labelcolor='blue')
-
-        # Title and legend
-        plt.title("Wind Speed Distribution")
-        fig.tight_layout()
-        plt.savefig('wind_speed_pct.png')
-
-        speed_power_df = pd.DataFrame(speed_power, columns=["Speed", "Power"])
-
-        # Add the power curve line on a second y-axis
-        ax2 = ax1.twinx()
-        ax2.plot(speed_power_df["Speed"], speed_power_df["Power"], color='orange', marker='o', linestyle='-', label='Speed-Power Curve')
-        ax2.set_ylabel("Power", color='orange')
-        ax2.tick_params(axis='y', labelcolor='orange')
-
-        # Title and legend
-        fig.tight_layout()
-        plt.savefig('wind_speed_pct_power_curve.png')
-        plt.show()
-
-        # Linear interpolation for power
-        speed_values = speed_power_df["Speed"].values
-        power_values = speed_power_df["Power"].values
-        power_interpolator = np.interp
-
-        # Calculation of total produced power
-        total_power = 0
-        hours_per_year = 8760
-
-        for _, row in wind_speed_pct.iterrows():
-            speed = row["WS"]
-            pct_hours = row["%_h"] / 100
-            interpolated_power = power_interpolator(speed, speed_values, power_values)
-            total_power += interpolated_power * pct_hours * hours_per_year
-
-        # Revenue calculation
-        f1_buy = 0.169
-        f2_buy = 0.174
-        f3_buy = 0.163
-
-        f1_sell = 0.137
-        f2_sell = 0.142
-        f3_sell = 0.131
-
-        df["Wind Power"] = 0.0
+        # Charts: only with plots, so compute only runs never import matplotlib
+        if plots:
+            from wind_report import render_wind_report
+            render_wind_report(wind_speed_pct, speed_power, Z, show=show)
+
+        # Total produced energy in one year
+        total_power = production['annual_energy']
+
+        df["Wind Power"] = production['power']
         df2 = pd.read_csv("load_preproc_net_cog.csv")
         df2.rename(columns={
             'Tempo': 'time(UTC)',
@@ -100,34 +51,31 @@ def calculate_wind(Z, alpha, AG, Pe, speed_power, K):
         }, inplace=True)
 
         df2 = df2[['time(UTC)', 'Electric Power', 'Time Band']]
-        df = pd.merge(df[['time(UTC)', 'WS', 'Wind Power']], df2, on='time(UTC)', how='inner')
-        df['Wind Power'] = df['WS'].apply(lambda ws: power_interpolator(ws, speed_values, power_values))
-
-        Revenue = AG
-        energy_sold_to_grid = 0  # Variabile per accumulare l'energia venduta alla rete
-
-        for _, row in df.iterrows():
-            wp = row['Wind Power']
-            lp = row['Electric Power']
-            surplus = wp - lp
-
-            if surplus < 0:
-                if row['Time Band'] == "F1":
-                    Revenue += wp * f1_buy
-                elif row['Time Band'] == "F2":
-                    Revenue += wp * f2_buy
-                elif row['Time Band'] == "F3":
-                    Revenue += wp * f3_buy
-            else:
-                if row['Time Band'] == "F1":
-                    Revenue += wp * f1_buy + surplus * f1_sell
-                    energy_sold_to_grid += surplus  # Accumula l'energia venduta alla rete
-                elif row['Time Band'] == "F2":
-                    Revenue += wp * f2_buy + surplus * f2_sell
-                    energy_sold_to_grid += surplus  # Accumula l'energia venduta alla rete
-                elif row['Time Band'] == "F3":
-                    Revenue += wp * f3_buy + surplus * f3_sell
-                    energy_sold_to_grid += surplus  # Accumula l'energia venduta alla rete
+
+        # The day-month labels of 3_CHP_Fixed.py hold one year of hourly load: quarter-hour or multi-year loads
+        # are aligned by pipeline.run_pipeline
+        labels = df2['time(UTC)'].astype(str)
+        load_hours = parse_calendar_hours(labels)
+        if (labels.str[9:11] != '00').any() or len(np.unique(load_hours)) < len(load_hours):
+            raise ValueError("load_preproc_net_cog.csv must hold one year of hourly load; use pipeline.run_pipeline "
+                             "for quarter-hour or multi-year loads.")
+
+        # Align the wind with the load on the calendar hour (day, month and hour), by position
+        wind_rows, load_rows = align_hours(load_hours, calendar_hour_index(location['time']))
+        df = df[['time(UTC)', 'WS', 'Wind Power']].iloc[wind_rows].reset_index(drop=True)
+        df['Electric Power'] = df2['Electric Power'].to_numpy()[load_rows]
+        df['Time Band'] = df2['Time Band'].to_numpy()[load_rows]
+
+        # A wind series of several years matches every load hour once per year: average over the years
+        wind_years = np.bincount(load_rows, minlength=len(df2))[load_rows]
+
+        # Revenue calculation: F1/F2/F3 purchase and sale prices of every hour
+        buy = band_prices(df['Time Band'], BUY_PRICES)
+        sell = band_prices(df['Time Band'], SELL_PRICES)
+        settlement = settle(df['Wind Power'], df['Electric Power'], buy, sell, AG, 1.0 / wind_years)
+
+        Revenue = settlement['revenue']
+        energy_sold_to_grid = settlement['energy_sold_to_grid']  # Energia venduta alla rete
 
         df.to_csv("wind_speed_h.csv", index=False)
 
@@ -153,12 +101,12 @@ def calculate_wind(Z, alpha, AG, Pe, speed_power, K):
         I_Pe = 1500  # Installation Cost per Power
         I = I_Pe * Pe  # Total Installation Cost
         m = 0.03  # Annual Maintenance Cost
-        AF = 12.5  # Capital Recovery Factor, CRF
+        AF = annuity_factor(DISCOUNT_RATE, YEARS)  # Annuity factor over the useful life (5 %, 20 years)
 
         Cue = (I * (1 + m) / Pe) / (AF * H_eq)
 
         Annual_Maintenance = I * m
-        Pay_Back = I / (Revenue - Annual_Maintenance)
+        Pay_Back = evaluate_investment(I, Revenue - Annual_Maintenance)['SPB']
 
         print(f"Unit Energy Cost: {Cue:.2f} €/kWh")
         print(f"Total Revenue: {Revenue:.2f} €")
@@ -166,6 +114,22 @@ def calculate_wind(Z, alpha, AG, Pe, speed_power, K):
         print(f"Annual Maintenance: {Annual_Maintenance:.2f} €")
         print(f"Pay Back: {Pay_Back:.1f} Years")
 
+        # Revenue and costs for the CHP + Wind analysis (5_CHP_Wind.py)
+        pd.DataFrame([{'Pe': Pe, 'Revenue': Revenue, 'Annual_Maintenance': Annual_Maintenance}]).to_csv(
+            "Wind_operating_costs.csv", index=False)
+
+        return {
+            'total_power': total_power,
+            'energy_sold_to_grid': energy_sold_to_grid,
+            'H_eq': H_eq,
+            'Cue': Cue,
+            'Revenue': Revenue,
+            'Pe': Pe,
+            'I': I,
+            'Annual_Maintenance': Annual_Maintenance,
+            'Pay_Back': Pay_Back,
+        }
+
     else:
         print("The dataset does not contain usable data.")
 
@@ -198,41 +162,45 @@ def calculate_wind(Z, alpha, AG, Pe, speed_power, K):
 # speed_power =   [[0, 0], [4, 42], [5, 144], [6, 380], [7, 736],[8,1226],[9,1894],[10,2719], [11,3306],[12,3442],[25,3450]]   # Wind Speed / Power
 # K  = .85        # availability factor
 
-# Default Values From vesta V117/4000-4200
-#
-Z = 90          # High of the turbine
-alpha = 0.34    # Location Factor 
-AG = 0          # Aid Governative
-Pe = 4000       # Wind Turbine Electric Power
-speed_power =   [[0, 0],[1,0],[2,0],[3, 25],[4,159],[5, 356], [6, 645], [7, 1051],[8,1859],[9,2273],[10,3016], [11,3646],[12,3971],[25,4000]]   # Wind Speed / Power
-K  = .85        # availability factor
-
 # Function to request input with a default value
 def input_with_default(prompt, default, type_cast=float):
     user_input = input(f"{prompt} (default: {default}): ")
     return type_cast(user_input) if user_input else default
 
-# Default values
-default_Z = 90
-default_alpha = 0.34
-default_AG = 0
-default_Pe = 4000
-default_speed_power = [[0, 0], [1, 0], [2, 0], [3, 25], [4, 159], [5, 356], [6, 645], [7, 1051], [8, 1859], [9, 2273], [10, 3016], [11, 3646], [12, 3971], [25, 4000]]
-default_K = 0.85
-
-# Ask for user input with default values
-Z = input_with_default("Enter the height of the turbine (Z) in meters", default_Z, int)
-alpha = input_with_default("Enter the location factor (alpha)", default_alpha)
-AG = input_with_default("Enter the government aid (AG) in €", default_AG)
-Pe = input_with_default("Enter the wind turbine electric power (Pe) in kW", default_Pe, int)
-K = input_with_default("Enter the availability factor (K)", default_K)
-
-# For speed_power, we need to handle a list of lists
-print("\nEnter the speed-power curve as a list of lists [wind_speed,power]  (e.g., [[0, 0], [1, 0], [2, 0], ...]).")
-print(f"Default speed-power curve: {default_speed_power}")
-speed_power_input = input("Enter the speed-power curve (leave blank to use default): ")
-speed_power = eval(speed_power_input) if speed_power_input.strip() else default_speed_power
-
-# Call the function with the provided or default values
-calculate_wind(Z, alpha, AG, Pe, speed_power, K)
+
+if __name__ == '__main__':
+
+    # Default Values From vesta V117/4000-4200
+    #
+    Z = 90          # High of the turbine
+    alpha = 0.34    # Location Factor 
+    AG = 0          # Aid Governative
+    Pe = 4000       # Wind Turbine Electric Power
+    speed_power =   [[0, 0],[1,0],[2,0],[3, 25],[4,159],[5, 356], [6, 645], [7, 1051],[8,1859],[9,2273],[10,3016], [11,3646],[12,3971],[25,4000]]   # Wind Speed / Power
+    K  = .85        # availability factor
+
+    # Default values
+    default_Z = 90
+    default_alpha = 0.34
+    default_AG = 0
+    default_Pe = 4000
+    default_speed_power = [[0, 0], [1, 0], [2, 0], [3, 25], [4, 159], [5, 356], [6, 645], [7, 1051], [8, 1859], [9, 2273], [10, 3016], [11, 3646], [12, 3971], [25, 4000]]
+    default_K = 0.85
+
+    # Ask for user input with default values
+    Z = input_with_default("Enter the height of the turbine (Z) in meters", default_Z, int)
+    alpha = input_with_default("Enter the location factor (alpha)", default_alpha)
+    AG = input_with_default("Enter the government aid (AG) in €", default_AG)
+    Pe = input_with_default("Enter the wind turbine electric power (Pe) in kW", default_Pe, int)
+    K = input_with_default("Enter the availability factor (K)", default_K)
+
+    # For speed_power, we need to handle a list of lists
+    print("\nEnter the speed-power curve as a list of lists [wind_speed,power]  (e.g., [[0, 0], [1, 0], [2, 0], ...]).")
+    print(f"Default speed-power curve: {default_speed_power}")
+    speed_power_input = input("Enter the speed-power curve (leave blank to use default): ")
+    speed_power = ast.literal_eval(speed_power_input) if speed_power_input.strip() else default_speed_power
+
+    # Call the function with the provided or default values (python 4_WIND.py --no-plots: numbers only,
+    # the charts can be drawn later from wind_speed_pct.csv with wind_report.py)
+    calculate_wind(Z, alpha, AG, Pe, speed_power, K, plots='--no-plots' not in sys.argv)
 
@@ -1,168 +1,213 @@
 import pandas as pd
 import numpy as np
-import numpy_financial as npf
 
-# ===============================
-# CHP + WIND INTEGRATION
-# ===============================
+from chp_economics import chp_investment, chp_wind_operating_costs
+from hour_index import align_hours, calendar_hour_index, parse_calendar_hours, step_hours
+from investment import evaluate_investment
 
-Pe = 800
+def calculate_chp_wind(Pe=None, chp_economics=None, wind_result=None):
+    # Operating costs of the CHP stage (process_energy_data()['economics']) and rated power, revenue and
+    # maintenance of the wind stage (calculate_wind()), by default from the files of 3_CHP_Fixed.py and 4_WIND.py
+    if chp_economics is None:
+        chp_economics = pd.read_csv("CHP_operating_costs.csv").iloc[0].to_dict()
 
-# Upload CHP and Wind data
-df_chp = pd.read_csv("load_preproc.csv")
-df_chp.rename(columns={'Potenza Elettrica': 'Electric Power', 'Tempo': 'Time', 'Fascia Oraria': 'Time Band'}, inplace=True)
+        # The CHP costs hold for the electric power entered in 3_CHP_Fixed.py
+        if Pe is None:
+            Pe = chp_economics['Pe']
+        elif Pe != chp_economics['Pe']:
+            raise ValueError(f"CHP_operating_costs.csv was computed for Pe = {chp_economics['Pe']} kW, not {Pe} kW: "
+                             "run 3_CHP_Fixed.py again with the same Pe.")
+    if Pe is None:
+        raise ValueError("Pe is required with the chp_economics of process_energy_data.")
+    if wind_result is None:
+        wind_result = pd.read_csv("Wind_operating_costs.csv").iloc[0].to_dict()
 
-df_chp["Time"] = pd.to_datetime(df_chp["Time"], errors='coerce').dt.strftime('%d-%m %H:%M')
-df_wind = pd.read_csv("wind_speed_h.csv")
+    # ===============================
+    # CHP + WIND INTEGRATION
+    # ===============================
 
-#delete Electri Power column
-df_wind = df_wind.drop(columns=['WS','Electric Power','Time Band'])
+    # Upload CHP and Wind data
+    df_chp = pd.read_csv("load_preproc.csv")
+    df_chp.rename(columns={'Potenza Elettrica': 'Electric Power', 'Tempo': 'Time', 'Fascia Oraria': 'Time Band'}, inplace=True)
 
-# Rename columns to merge datasets
-df_wind.rename(columns={'time(UTC)': 'Time'}, inplace=True)
+    df_chp["Time"] = pd.to_datetime(df_chp["Time"], errors='coerce')
+    chp_hours = calendar_hour_index(df_chp["Time"])
 
-# Join datasets on time column
-df_combined = pd.merge(df_chp, df_wind, on='Time', how='inner')
+    # The day-month labels of wind_speed_h.csv hold one year of hourly load: quarter-hour or multi-year loads
+    # are aligned by pipeline.run_pipeline
+    if step_hours(df_chp["Time"]) != 1 or len(np.unique(chp_hours)) < len(chp_hours):
+        raise ValueError("load_preproc.csv must hold one year of hourly load; use pipeline.run_pipeline "
+                         "for quarter-hour or multi-year loads.")
+    df_chp["Time"] = df_chp["Time"].dt.strftime('%d-%m %H:%M')
+    df_wind = pd.read_csv("wind_speed_h.csv")
 
-# Calculate total CHP + Wind production
-df_combined["Total Power"] =  Pe + df_combined["Wind Power"]
-df_combined.set_index('Time')
+    #delete Electri Power column
+    df_wind = df_wind.drop(columns=['WS','Electric Power','Time Band'])
 
+    # Rename columns to merge datasets
+    df_wind.rename(columns={'time(UTC)': 'Time'}, inplace=True)
 
-# Calculating surplus and deficit
-df_combined["Surplus"] = df_combined["Total Power"] - df_combined["Electric Power"]
-df_combined["Grid Import"] = df_combined["Surplus"].apply(lambda x: -x if x < 0 else 0)
-df_combined["Surplus"] = df_combined["Surplus"].apply(lambda x: x if x > 0 else 0)
+    # Join datasets on the calendar hour (day, month and hour), by position, in the order of the load
+    wind_rows, chp_rows = align_hours(chp_hours, parse_calendar_hours(df_wind['Time']))
+    order = np.argsort(chp_rows, kind='stable')
+    chp_rows, wind_rows = chp_rows[order], wind_rows[order]
+    df_combined = df_chp.iloc[chp_rows].reset_index(drop=True)
+    for column in df_wind.columns.drop('Time'):
+        df_combined[column] = df_wind[column].to_numpy()[wind_rows]
 
-# Save the updated file
-df_combined.to_csv("combined_energy_balance.csv", index=False)
-print("CHP + Wind")
+    # A wind series of several years matches every load hour once per year: average over the years
+    wind_years = np.bincount(chp_rows, minlength=len(df_chp))[chp_rows]
 
+    # Calculate total CHP + Wind production
+    df_combined["Total Power"] =  Pe + df_combined["Wind Power"]
+    df_combined.set_index('Time')
 
-# ===============================
-# PRIMARY ENERGY SAVING (PES) CALCULATION
-# ===============================
 
-# Load the combined data
-df_combined = pd.read_csv("combined_energy_balance.csv")
+    # Calculating surplus and deficit
+    balance = df_combined["Total Power"] - df_combined["Electric Power"]
+    df_combined["Surplus"] = balance.clip(lower=0)
+    df_combined["Grid Import"] = (-balance).clip(lower=0)
 
-# Efficiencies of the reference system
-eta_t_ref = 0.9   # Boiler efficiency
-eta_e_ref = 0.46  # Power grid efficiency
+    # Save the updated file
+    df_combined.to_csv("combined_energy_balance.csv", index=False)
+    print("CHP + Wind")
 
-# Energy required by the reference system 
-E_term_ref = df_combined["Potenza Termica"].sum()
-E_elec_ref = df_combined["Electric Power"].sum()
 
-# Primary energy consumption of the reference system
-primary_energy_consumption_ref = (E_term_ref / eta_t_ref) + (E_elec_ref / eta_e_ref)
+    # ===============================
+    # PRIMARY ENERGY SAVING (PES) CALCULATION
+    # ===============================
 
-# CHP Efficiencies
-eta_e_chp = 0.390  
-eta_t_chp = 0.473  
+    # Efficiencies of the reference system
+    eta_t_ref = 0.9   # Boiler efficiency
+    eta_e_ref = 0.46  # Power grid efficiency
 
-# Energy produced by the proposed system
-E_elec_prop = df_combined["Total Power"].sum()
-E_term_prop = df_combined["Potenza Termica"].sum()
+    # Energy required by the reference system 
+    E_term_ref = (df_combined["Potenza Termica"] / wind_years).sum()
+    E_elec_ref = (df_combined["Electric Power"] / wind_years).sum()
 
-# Primary consumption of the proposed system
-primary_energy_consumption = (E_term_prop / eta_t_chp) + (E_elec_prop / eta_e_chp)
+    # Primary energy consumption of the reference system
+    primary_energy_consumption_ref = (E_term_ref / eta_t_ref) + (E_elec_ref / eta_e_ref)
 
-# PES Calculation
-PES = (primary_energy_consumption_ref - primary_energy_consumption) / primary_energy_consumption_ref * 100
-print(f"Primary Energy Saving (PES): {PES:.2f}%")
+    # CHP Efficiencies
+    eta_e_chp = 0.390  
+    eta_t_chp = 0.473  
 
+    # Energy produced by the proposed system
+    E_elec_prop = (df_combined["Total Power"] / wind_years).sum()
+    E_term_prop = (df_combined["Potenza Termica"] / wind_years).sum()
 
-# ===============================
-# CO₂ REDUCTION CALCULATION
-# ===============================
+    # Primary consumption of the proposed system
+    primary_energy_consumption = (E_term_prop / eta_t_chp) + (E_elec_prop / eta_e_chp)
 
-CO2_factor_grid = 0.48   # kg CO2/kWh (rete)
-CO2_factor_gas = 0.2     # kg CO2/kWh (CHP)
+    # PES Calculation
+    PES = (primary_energy_consumption_ref - primary_energy_consumption) / primary_energy_consumption_ref * 100
+    print(f"Primary Energy Saving (PES): {PES:.2f}%")
 
-# Reference system emissions
-co2_emission_ref = (E_term_ref / eta_t_ref) * CO2_factor_gas + (E_elec_ref / eta_e_ref) * CO2_factor_grid
 
-# Emissions of the proposed system
-co2_emission = (E_term_prop / eta_t_chp) * CO2_factor_gas + (E_elec_prop / eta_e_chp) * CO2_factor_grid
+    # ===============================
+    # CO₂ REDUCTION CALCULATION
+    # ===============================
 
-# CO₂ reduction
-CO2_saving = co2_emission_ref - co2_emission
-print(f"CO2 Reduction: {CO2_saving/1000:.2f} tons")
+    CO2_factor_grid = 0.48   # kg CO2/kWh (rete)
+    CO2_factor_gas = 0.2     # kg CO2/kWh (CHP)
 
+    # Reference system emissions
+    co2_emission_ref = (E_term_ref / eta_t_ref) * CO2_factor_gas + (E_elec_ref / eta_e_ref) * CO2_factor_grid
 
-# ===============================
-# ECONOMIC INDICATORS
-# ===============================
+    # Emissions of the proposed system
+    co2_emission = (E_term_prop / eta_t_chp) * CO2_factor_gas + (E_elec_prop / eta_e_chp) * CO2_factor_grid
 
-# Investment costs
+    # CO₂ reduction
+    CO2_saving = co2_emission_ref - co2_emission
+    print(f"CO2 Reduction: {CO2_saving/1000:.2f} tons")
 
-# Turbine
-I = (1000.0 * 4000.0)  + (2.0 * (Pe / 1000.0 ) ** 0.868) * 1000000
-print(f"Total installation Costs {I/1000000:.2f} M")
 
+    # ===============================
+    # ECONOMIC INDICATORS
+    # ===============================
 
-operating_cost_RS = 5.42 * 1000000
-# Operating cost CHP
-operating_cost_CHP = 4.28 * 1000000
-# Operating cost Wind
-operating_cost_wind = 180000
+    # Investment costs
 
-# Operating cost CHP_Wind
-operating_cost_CHP_wind = operating_cost_CHP + operating_cost_wind 
+    # Turbine and CHP
+    I = (1000.0 * wind_result['Pe']) + chp_investment(Pe)
+    print(f"Total installation Costs {I/1000000:.2f} M")
 
-# Annual savings
-annual_savings = operating_cost_RS - operating_cost_CHP_wind
-print(f"Annual Saving: {annual_savings/1000000:.2f} M")
 
-# SPB (Simple Payback Period)
-SPB = I / annual_savings 
-print(f"Simple Payback Period (SPB): {SPB:.2f} anni")
+    # Operating cost CHP, Wind (maintenance minus revenue) and CHP_Wind
+    operating_costs = chp_wind_operating_costs(chp_economics, wind_result['Revenue'], wind_result['Annual_Maintenance'])
+    print(f"Operating Cost Ref.: {operating_costs['operating_cost_RS']/1000000:.2f} M")
+    print(f"Operating Cost CHP + Wind: {operating_costs['operating_cost_CHP_wind']/1000000:.2f} M")
 
-# NPV (Net Present Value)
-r = 0.05  # Tasso di sconto
-years = 20  # Vita utile
-NPV = sum(annual_savings / (1 + r) ** t for t in range(1, years + 1)) - I
-print(f"Net Present Value (NPV): {NPV:.2f} €")
+    # Annual savings
+    annual_savings = operating_costs['annual_savings']
+    print(f"Annual Saving: {annual_savings/1000000:.2f} M")
 
-# PI (Profitability Index)
-PI = (NPV + I) / I
-print(f"Profitability Index (PI): {PI:.2f}")
+    # Investment indicators: 5 % discount rate (Tasso di sconto) over 20 years (Vita utile)
+    indicators = evaluate_investment(I, annual_savings, rate=0.05, years=20)
 
-# IRR (Internal Rate of Return)
-cash_flows = [-I] + [annual_savings] * years
-IRR = npf.irr(cash_flows)  
-print(f"Internal Rate of Return (IRR): {IRR:.2%}")
+    # SPB (Simple Payback Period)
+    SPB = indicators['SPB']
+    print(f"Simple Payback Period (SPB): {SPB:.2f} anni")
 
-# ===============================
-# ENERGY SOLD TO GRID SUMMARY
-# ===============================
+    # NPV (Net Present Value)
+    NPV = indicators['NPV']
+    print(f"Net Present Value (NPV): {NPV:.2f} €")
 
+    # PI (Profitability Index)
+    PI = indicators['PI']
+    print(f"Profitability Index (PI): {PI:.2f}")
 
-# Carica i dati dai CSV
-df_chp = pd.read_csv("CHP_energy_sold.csv")
-df_wind = pd.read_csv("Wind_energy_sold.csv")
+    # IRR (Internal Rate of Return)
+    IRR = indicators['IRR']
+    print(f"Internal Rate of Return (IRR): {IRR:.2%}")
 
-# Converte le energie vendute da kWh a MWh nel dataframe Wind (dividendo per 1000)
-df_wind["Energia Venduta (MWh)"] = df_wind["Energia Venduta (kWh)"] / 1000
+    # ===============================
+    # ENERGY SOLD TO GRID SUMMARY
+    # ===============================
 
-# Unisce i dati in un unico DataFrame
-df_total = pd.concat([df_chp[["Fonte", "Energia Venduta (MWh)"]], df_wind[["Fonte", "Energia Venduta (MWh)"]]])
 
-# Calcola il totale dell'energia venduta in MWh
-total_energy_sold = df_total["Energia Venduta (MWh)"].sum()
+    # Carica i dati dai CSV
+    df_chp = pd.read_csv("CHP_energy_sold.csv")
+    df_wind = pd.read_csv("Wind_energy_sold.csv")
 
-# Aggiunge la riga del totale
-df_total = pd.concat([df_total, pd.DataFrame([{"Fonte": "Totale", "Energia Venduta (MWh)": total_energy_sold}])], ignore_index=True)
+    # Converte le energie vendute da kWh a MWh nel dataframe Wind (dividendo per 1000)
+    df_wind["Energia Venduta (MWh)"] = df_wind["Energia Venduta (kWh)"] / 1000
 
-# Salva la tabella riassuntiva in un CSV
-df_total.to_csv("Total_energy_sold_MWh.csv", index=False)
+    # Unisce i dati in un unico DataFrame
+    df_total = pd.concat([df_chp[["Fonte", "Energia Venduta (MWh)"]], df_wind[["Fonte", "Energia Venduta (MWh)"]]])
 
-# Stampa la tabella riassuntiva
-print("------------------------------------------------------------------")
-print("                      Energy Sold to Grid (MWh)                   ")
-print("------------------------------------------------------------------")
-print(df_total.to_string(index=False))
-print("------------------------------------------------------------------")
+    # Calcola il totale dell'energia venduta in MWh
+    total_energy_sold = df_total["Energia Venduta (MWh)"].sum()
 
-print("Dati salvati in Total_energy_sold_MWh.csv")
\ No newline at end of file
+    # Aggiunge la riga del totale
+    df_total = pd.concat([df_total, pd.DataFrame([{"Fonte": "Totale", "Energia Venduta (MWh)": total_energy_sold}])], ignore_index=True)
+
+    # Salva la tabella riassuntiva in un CSV
+    df_total.to_csv("Total_energy_sold_MWh.csv", index=False)
+
+    # Stampa la tabella riassuntiva
+    print("------------------------------------------------------------------")
+    print("                      Energy Sold to Grid (MWh)                   ")
+    print("------------------------------------------------------------------")
+    print(df_total.to_string(index=False))
+    print("------------------------------------------------------------------")
+
+    print("Dati salvati in Total_energy_sold_MWh.csv")
+
+    return {
+        'PES': PES,
+        'CO2_saving': CO2_saving,
+        'I': I,
+        'annual_savings': annual_savings,
+        'SPB': SPB,
+        'NPV': NPV,
+        'PI': PI,
+        'IRR': IRR,
+        'total_energy_sold': total_energy_sold,
+    }
+
+
+if __name__ == '__main__':
+
+    # The CHP electric power is the one saved by 3_CHP_Fixed.py
+    calculate_chp_wind()
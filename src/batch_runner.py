@@ -0,0 +1,145 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from pipeline import DEFAULT_CHP, DEFAULT_WIND, run_pipeline, summarize_pipeline
+from series_cache import CACHE_DIR
+
+
+def _names(file_paths, kind):
+    # Name of every file without directory and extension; the names identify the jobs, so they must be unique
+    names = {}
+    for file_path in file_paths:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        if name in names.values():
+            other = next(path for path, value in names.items() if value == name)
+            raise ValueError(f"The {kind} files '{other}' and '{file_path}' have the same name '{name}'; "
+                             "rename one of them.")
+        names[file_path] = name
+    return names
+
+
+def make_jobs(load_files, wind_files, chp=None, wind=None, cache_dir=None, freq='h'):
+    """
+    Builds one job for every (load file, wind file) pair of a portfolio.
+
+    Args:
+        load_files (list): Paths of the customer load files (semicolon separated, see pipeline.prepare_load).
+        wind_files (list): Paths of the PVGIS wind files.
+        chp (dict): CHP parameters, missing keys are taken from DEFAULT_CHP.
+        wind (dict): Wind turbine parameters, missing keys are taken from DEFAULT_WIND.
+        cache_dir (str): If given, the parsed load and wind series are cached there and shared by the jobs.
+        freq (str): Resolution of the rows of load files without timestamps, e.g. 'h' or '15min'.
+
+    Returns:
+        list: Jobs accepted by run_site_job and run_portfolio.
+
+    Raises:
+        ValueError: If two load files or two wind files have the same name: their jobs would have the same
+            job_id and output directory.
+    """
+
+    chp = {**DEFAULT_CHP, **(chp or {})}
+    wind = {**DEFAULT_WIND, **(wind or {})}
+    sites = _names(load_files, 'load')
+    scenarios = _names(wind_files, 'wind')
+
+    jobs = []
+    for load_file, wind_file in itertools.product(load_files, wind_files):
+        site = sites[load_file]
+        scenario = scenarios[wind_file]
+        jobs.append({
+            'job_id': f"{site}__{scenario}",
+            'site': site,
+            'scenario': scenario,
+            'load_file': os.path.abspath(load_file),
+            'wind_file': os.path.abspath(wind_file),
+            'chp': chp,
+            'wind': wind,
+            'cache_dir': None if cache_dir is None else os.path.abspath(cache_dir),
+            'freq': freq,
+        })
+    return jobs
+
+
+def run_site_job(job, output_dir=None):
+    """
+    Runs the CHP -> Wind -> CHP+Wind pipeline of one job in memory.
+
+    Args:
+        job (dict): Job built by make_jobs.
+        output_dir (str): If given, the stage CSVs are written to output_dir/job_id, so runs never
+            overwrite each other's files.
+
+    Returns:
+        dict: Summary row of the job.
+    """
+
+    job_dir = None if output_dir is None else os.path.abspath(os.path.join(output_dir, job['job_id']))
+
+    start = time.perf_counter()
+    results = run_pipeline(job['load_file'], job['wind_file'], job['chp'], job['wind'], output_dir=job_dir,
+                           cache_dir=job.get('cache_dir'), freq=job.get('freq', 'h'))
+
+    return {
+        'job_id': job['job_id'],
+        'site': job['site'],
+        'scenario': job['scenario'],
+        **summarize_pipeline(results),
+        'elapsed': time.perf_counter() - start,
+        'output_dir': job_dir,
+    }
+
+
+def run_portfolio(jobs, output_dir='batch_output', max_workers=None, save_stages=False):
+    """
+    Runs independent site/scenario jobs in parallel on a process pool and collects one summary table.
+
+    Args:
+        jobs (list): Jobs built by make_jobs.
+        output_dir (str): Directory of summary.csv and, with save_stages, of the job directories.
+        max_workers (int): Number of worker processes (default: number of CPUs).
+        save_stages (bool): Also write the stage CSVs of every job.
+
+    Returns:
+        DataFrame: One summary row per job, in the order of the jobs. Failed jobs have the error message.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    rows = {}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_site_job, job, output_dir if save_stages else None): job for job in jobs}
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            try:
+                rows[job['job_id']] = future.result()
+                status = 'done'
+            except Exception as error:
+                rows[job['job_id']] = {'job_id': job['job_id'], 'site': job['site'], 'scenario': job['scenario'], 'error': repr(error)}
+                status = 'FAILED'
+            print(f"[{done}/{len(jobs)}] {job['job_id']} {status} ({time.perf_counter() - start:.1f} s)")
+
+    summary = pd.DataFrame([rows[job['job_id']] for job in jobs])
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    print(f"Summary saved to '{os.path.join(output_dir, 'summary.csv')}'")
+    return summary
+
+
+if __name__ == '__main__':
+
+    import glob
+    import sys
+
+    # Usage: python batch_runner.py <load files glob> <wind files glob> [output dir]
+    load_files = sorted(glob.glob(sys.argv[1] if len(sys.argv) > 1 else 'load*.csv'))
+    wind_files = sorted(glob.glob(sys.argv[2] if len(sys.argv) > 2 else 'wind_speed*.csv'))
+    output_dir = sys.argv[3] if len(sys.argv) > 3 else 'batch_output'
+
+    summary = run_portfolio(make_jobs(load_files, wind_files, cache_dir=CACHE_DIR), output_dir)
+    print(summary.to_string(index=False))
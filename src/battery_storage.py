@@ -0,0 +1,142 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from chp_dispatch import TIME_BANDS
+from settlement import BUY_PRICES, SELL_PRICES, band_prices
+from thermal_storage import simulate_storage
+
+BATTERY_COLUMNS = ['grid_import', 'grid_import_battery', 'export', 'export_battery', 'charged', 'discharged',
+                   'revenue_change']
+
+
+def simulate_battery(production, load, bands, capacity, power, round_trip_efficiency=0.9, soc_min=0.1, soc_max=0.9,
+                     discharge_bands=('F1',), buy=None, sell=None, hours_per_step=1.0):
+    """
+    Simulates a behind-the-meter battery that stores the surplus of the plants (CHP + wind) and discharges it
+    into the grid import of the selected time bands.
+
+    Without the battery the surplus is exported and the deficit imported hour by hour, as in calculate_chp_wind.
+    The battery charges the surplus of every hour and covers the deficit of the discharge bands; its state of
+    charge stays between soc_min and soc_max of the capacity and the round-trip losses are split evenly between
+    charge and discharge. Each input can stack scenarios as columns (hours, scenarios) and the battery
+    parameters are broadcast over them, so a whole grid of batteries, turbines and CHP sizes is simulated by
+    one recurrence (see thermal_storage.simulate_storage). For series with another resolution (e.g. 15 minutes)
+    the flows and the power limit are energies per step (kWh = kW * hours_per_step).
+
+    Args:
+        production (array-like): Power of the plants (kW) per hour, e.g. Pe + wind power.
+        load (array-like): Electric load (kW) per hour.
+        bands (array-like): Time band of every hour ('F1', 'F2', 'F3').
+        capacity (float or array-like): Battery capacity (kWh).
+        power (float or array-like): Maximum charge and discharge power (kW).
+        round_trip_efficiency (float or array-like): Share of the charged energy that is delivered back.
+        soc_min (float): Minimum state of charge (share of the capacity); the battery starts the year there.
+        soc_max (float): Maximum state of charge (share of the capacity).
+        discharge_bands (tuple): Time bands in which the battery discharges.
+        buy (array-like): Purchase price (€/kWh) per hour (default: settlement.BUY_PRICES of the time bands).
+        sell (array-like): Sale price (€/kWh) per hour (default: settlement.SELL_PRICES of the time bands).
+        hours_per_step (float): Duration of a step of the series (h), e.g. 0.25 for quarter-hour data.
+
+    Returns:
+        dict:
+            'bands': Per time band grid import and export (kWh) without and with the battery ('grid_import',
+                'grid_import_battery', 'export', 'export_battery'), energy charged and discharged (kWh) and
+                'revenue_change' (€): avoided purchases minus lost sales. A DataFrame for a single scenario,
+                otherwise indexed as bands[quantity][time_band] with arrays (scenarios,).
+            'revenue_change' (float or ndarray): Total change of revenue (€).
+            'soc' (float or ndarray): State of charge at the end of the year (kWh).
+    """
+
+    bands = np.asarray(bands)
+    production = np.asarray(production, dtype=float)
+    load = np.asarray(load, dtype=float)
+    stacked = production.ndim == 2 or load.ndim == 2 or any(np.ndim(value) for value in (capacity, power,
+                                                                                        round_trip_efficiency))
+    production = production[:, None] if production.ndim == 1 else production
+    load = load[:, None] if load.ndim == 1 else load
+
+    buy = band_prices(bands, BUY_PRICES) if buy is None else np.asarray(buy, dtype=float)
+    sell = band_prices(bands, SELL_PRICES) if sell is None else np.asarray(sell, dtype=float)
+
+    # Energy exported and imported per step (kWh)
+    balance = production - load
+    export = np.maximum(balance, 0) * hours_per_step
+    grid_import = np.maximum(-balance, 0) * hours_per_step
+    discharging = np.isin(bands, discharge_bands)[:, None]
+
+    # Battery flows per time band, valued at the sale price lost on the charged surplus and at the purchase
+    # price avoided by the discharge
+    codes = pd.Categorical(bands, categories=TIME_BANDS).codes
+    settled = codes >= 0
+    capacity = np.asarray(capacity, dtype=float)
+    efficiency = np.sqrt(np.asarray(round_trip_efficiency, dtype=float))
+    power = np.asarray(power, dtype=float) * hours_per_step
+    storage = simulate_storage(export, np.where(discharging, grid_import, 0), capacity * soc_max, power, power,
+                               soc0=capacity * soc_min, soc_min=capacity * soc_min, charge_efficiency=efficiency,
+                               discharge_efficiency=efficiency, groups=np.where(settled, codes, len(TIME_BANDS)),
+                               prices=(np.nan_to_num(sell), np.nan_to_num(buy)))
+    charged = storage['charged_groups'][:len(TIME_BANDS)]
+    discharged = storage['discharged_groups'][:len(TIME_BANDS)]
+
+    # Import and export per time band without the battery, as one matrix product with the band indicators
+    indicators = np.stack([bands == fascia for fascia in TIME_BANDS]).astype(float)
+    grid_import = indicators @ grid_import
+    export = indicators @ export
+    banded = {
+        'grid_import': grid_import,
+        'grid_import_battery': grid_import - discharged,
+        'export': export,
+        'export_battery': export - charged,
+        'charged': charged,
+        'discharged': discharged,
+        'revenue_change': (storage['discharged_value_groups'] - storage['charged_value_groups'])[:len(TIME_BANDS)],
+    }
+    totals = {key: dict(zip(TIME_BANDS, np.broadcast_to(values, charged.shape))) for key, values in banded.items()}
+    revenue_change = sum(totals['revenue_change'].values())
+
+    if not stacked:
+        return {
+            'bands': pd.DataFrame({key: {fascia: total[0] for fascia, total in values.items()}
+                                   for key, values in totals.items()}).reindex(TIME_BANDS)[BATTERY_COLUMNS],
+            'revenue_change': revenue_change[0],
+            'soc': storage['soc'][0],
+        }
+    return {'bands': totals, 'revenue_change': revenue_change, 'soc': storage['soc']}
+
+
+def sweep_battery_sizes(load, bands, wind_powers, Pe_values, capacities, powers, **options):
+    """
+    Simulates every (wind turbine, CHP size, battery capacity, battery power) combination in one batched run.
+
+    Args:
+        load (array-like): Electric load (kW) per hour.
+        bands (array-like): Time band of every hour.
+        wind_powers (dict): Hourly wind power (kW) per turbine model, aligned with the load.
+        Pe_values (array-like): Electric powers of the CHP (kW).
+        capacities (array-like): Battery capacities (kWh).
+        powers (array-like): Battery powers (kW).
+        **options: Options of simulate_battery (round_trip_efficiency, soc_min, soc_max, discharge_bands, buy,
+            sell, hours_per_step).
+
+    Returns:
+        DataFrame: One row per combination with the yearly totals of BATTERY_COLUMNS and the F1 grid import
+            with the battery ('grid_import_battery_F1').
+    """
+
+    grid = list(itertools.product(wind_powers, Pe_values, capacities, powers))
+    turbine, Pe, capacity, power = (np.array(values) for values in zip(*grid))
+
+    # One production column per combination: CHP at constant Pe plus the wind power of the turbine
+    wind = np.column_stack([np.asarray(wind_powers[name], dtype=float) for name in wind_powers])
+    column = {name: i for i, name in enumerate(wind_powers)}
+    production = wind[:, [column[name] for name in turbine]] + Pe.astype(float)[None, :]
+
+    result = simulate_battery(production, load, bands, capacity.astype(float), power.astype(float), **options)
+
+    rows = pd.DataFrame({'turbine': turbine, 'Pe': Pe, 'capacity': capacity, 'power': power})
+    for key in BATTERY_COLUMNS:
+        rows[key] = sum(result['bands'][key].values())
+    rows['grid_import_battery_F1'] = result['bands']['grid_import_battery']['F1']
+    return rows
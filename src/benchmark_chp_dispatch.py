@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from chp_dispatch import TIME_BANDS, dispatch_chp
+
+
+def legacy_dispatch_chp(df, Pe, Pt, NumH):
+    """
+    Row by row dispatch loop of process_energy_data, kept as reference for the benchmark.
+    Returns the same structure as dispatch_chp.
+    """
+
+    df_top = df.sort_values(by='Potenza Elettrica', ascending=False).head(NumH)
+
+    keys = ['load', 'surplus', 'integration', 'provided_by_chp', 'self_consumption', 'energy_sold_to_grid']
+    results = {fascia: dict.fromkeys(keys, 0) for fascia in TIME_BANDS}
+
+    provided_by_chp_t = 0
+    surplus_t = 0
+    integration_t = 0
+    tot_t = 0
+    tot_e = 0
+    committed_power = 0
+    committed_power_ref = 0
+
+    for _, row in df_top.iterrows():
+        fascia_oraria = row['Fascia Oraria']
+        potenza_elettrica = row['Potenza Elettrica']
+        potenza_termica = row["Potenza Termica"]
+
+        committed_power_ref = max(committed_power_ref, potenza_elettrica)
+
+        tot_e += potenza_elettrica
+        tot_t += potenza_termica
+        results[fascia_oraria]['load'] += potenza_elettrica
+
+        if potenza_elettrica > Pe:
+            integration = potenza_elettrica - Pe
+            results[fascia_oraria]['integration'] += integration
+            results[fascia_oraria]['self_consumption'] += Pe
+            results[fascia_oraria]['energy_sold_to_grid'] += integration
+            committed_power = max(committed_power, integration)
+        else:
+            surplus = Pe - potenza_elettrica
+            results[fascia_oraria]['surplus'] += surplus
+            results[fascia_oraria]['self_consumption'] += potenza_elettrica
+
+        results[fascia_oraria]['provided_by_chp'] += Pe
+
+        if potenza_termica > Pt:
+            integration_t += potenza_termica - Pt
+            provided_by_chp_t += Pt
+        else:
+            surplus_t += Pt - potenza_termica
+            provided_by_chp_t += potenza_termica
+
+    return {
+        'bands': pd.DataFrame.from_dict(results, orient='index')[keys].astype(float),
+        'provided_by_chp_t': provided_by_chp_t,
+        'surplus_t': surplus_t,
+        'integration_t': integration_t,
+        'tot_e': tot_e,
+        'tot_t': tot_t,
+        'committed_power': committed_power,
+        'committed_power_ref': committed_power_ref,
+    }
+
+
+def same_balance(a, b):
+    # Compare the per band totals and every scalar of two balances
+    if not np.allclose(a['bands'].to_numpy(), b['bands'].to_numpy()):
+        return False
+    return all(np.isclose(a[key], b[key]) for key in a if key != 'bands')
+
+
+def synthetic_sites(df, n_sites, seed=0):
+    # Scale and perturb the reference load to build a batch of sites with the same calendar
+    rng = np.random.default_rng(seed)
+    sites = []
+    for _ in range(n_sites):
+        site = df.copy()
+        for col in ['Potenza Elettrica', 'Potenza Termica']:
+            noise = rng.normal(1.0, 0.1, len(site)).clip(0)
+            site[col] = (site[col] * rng.uniform(0.5, 2.0) * noise).round()
+        sites.append(site)
+    return sites
+
+
+def benchmark(sites, Pe, Pt, NumH):
+    start = time.perf_counter()
+    legacy = [legacy_dispatch_chp(site, Pe, Pt, NumH) for site in sites]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = [dispatch_chp(site, Pe, Pt, NumH) for site in sites]
+    vectorized_time = time.perf_counter() - start
+
+    same = all(same_balance(a, b) for a, b in zip(legacy, vectorized))
+    return legacy_time, vectorized_time, same
+
+
+# Benchmark parameters
+Pe = 800
+Pt = 900
+NumH = 5000
+
+df = pd.read_csv('load_preproc.csv')
+
+print("------------------------------------------------------------------")
+print("              CHP dispatch: iterrows loop vs vectorized           ")
+print("------------------------------------------------------------------")
+print("                     |  Loop (s)  | Vector (s) | Speed-up | Same |")
+
+for name, sites in [("load_preproc.csv", [df]), ("Synthetic 100 sites", synthetic_sites(df, 100))]:
+    legacy_time, vectorized_time, same = benchmark(sites, Pe, Pt, NumH)
+    print(f"{name:<20} | {legacy_time:10.3f} | {vectorized_time:10.3f} | {legacy_time / vectorized_time:8.1f} | {str(same):>4} |")
+
+print("------------------------------------------------------------------")
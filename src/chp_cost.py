@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from settlement import BUY_PRICES
+
+# Parameters of kwh_chp_cost_calculator, in order
+KWH_COST_PARAMETERS = ('c_NG', 'tax', 'LH', 'eta_e', 'eta_t', 'eta_t_re', 'eta_e_CHP_re', 'M')
+
+
+def kwh_chp_cost_calculator(c_NG, tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M):  
+    """  
+    Calculates the cost per kWh produced by a combined heat and power (CHP) system.  
+
+    Args:  
+        c_NG (float): Cost of natural gas for the CHP system (€/m³).  
+        tax (float): Tax on natural gas (€/m³).  
+        LH (float): Lower heating value (LHV) of natural gas (kWh/m³).  
+        eta_e (float): Effective electrical efficiency of the CHP system.  
+        eta_t (float): Effective thermal efficiency of the CHP system.  
+        eta_t_re (float): Reference thermal efficiency for comparison.  
+        eta_e_CHP_re (float): Reference electrical efficiency for tax exemption calculation (default: 0.474).  
+        M (float): Maintenance costs (€/kWh).  
+
+    Returns:  
+        float: Cost per kWh produced by the CHP system (€/kWh).  
+    """  
+
+    # Formula to compute the cost per kWh produced by CHP
+    c_kWh_CH = (1 / (eta_e * LH)) * (c_NG + (1 - eta_e / eta_e_CHP_re) * tax - (eta_t / eta_t_re) * (c_NG + tax)) + M  
+    return c_kWh_CH
+
+
+def _grid_axes(values):
+    # One 1-D axis per parameter, scalars become axes of length 1
+    return {name: np.atleast_1d(np.asarray(values[name], dtype=float)) for name in values}
+
+
+def kwh_cost_grid(c_NG, tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M, labelled=False):
+    """
+    Computes the cost per kWh produced by the CHP on the full grid of the given parameter values.
+
+    Every argument is a scalar or a 1-D array of values; the cost is evaluated on their outer product in a single
+    broadcast of kwh_chp_cost_calculator, so grids of millions of points take a fraction of a second.
+
+    Args:
+        c_NG, tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M (float or array-like): See kwh_chp_cost_calculator.
+        labelled (bool): Return a Series indexed by the parameter values instead of an array.
+
+    Returns:
+        ndarray or Series: Cost per kWh (€/kWh) with one axis per parameter, in the order of the arguments,
+            or 'kwh_cost' Series with a MultiIndex of the parameters.
+    """
+
+    axes = _grid_axes(dict(zip(KWH_COST_PARAMETERS, (c_NG, tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M))))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost = kwh_chp_cost_calculator(*np.ix_(*axes.values()))
+
+    if not labelled:
+        return cost
+    index = pd.MultiIndex.from_product(list(axes.values()), names=list(axes))
+    return pd.Series(cost.ravel(), index=index, name='kwh_cost')
+
+
+def breakeven_gas_price(tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M, prices=BUY_PRICES):
+    """
+    Computes the natural gas price at which the kWh produced by the CHP costs as much as the kWh bought from the
+    grid in each time band: the breakeven contours of the cost grid against the band prices.
+
+    The cost is linear in the gas price, so the contour is solved exactly on the grid of the other parameters
+    (scalars or 1-D arrays, see kwh_cost_grid). Below the breakeven price the CHP is cheaper than the grid.
+
+    Args:
+        tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M (float or array-like): See kwh_chp_cost_calculator.
+        prices (dict): Grid purchase price per time band (€/kWh), as used by 3_CHP_Fixed.py.
+
+    Returns:
+        DataFrame: Breakeven natural gas price (€/m³), one column per time band, indexed by the parameter values.
+            NaN where the cost does not depend on the gas price (eta_t == eta_t_re).
+    """
+
+    axes = _grid_axes(dict(zip(KWH_COST_PARAMETERS[1:], (tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M))))
+    tax, LH, eta_e, eta_t, eta_t_re, eta_e_CHP_re, M = np.ix_(*axes.values())
+
+    # c_kWh = (c_NG * (1 - eta_t / eta_t_re) + tax * (1 - eta_e / eta_e_CHP_re - eta_t / eta_t_re)) / (eta_e * LH) + M
+    slope = 1 - eta_t / eta_t_re
+    offset = tax * (1 - eta_e / eta_e_CHP_re - eta_t / eta_t_re)
+
+    index = pd.MultiIndex.from_product(list(axes.values()), names=list(axes))
+    contours = pd.DataFrame(index=index)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for band, price in prices.items():
+            c_NG = ((price - M) * eta_e * LH - offset) / slope
+            contours[band] = np.where(slope != 0, c_NG, np.nan).ravel()
+    return contours
+
+
+if __name__ == '__main__':
+
+    import time
+
+    # Sensitivity of the default CHP (2_CHP_KWhCostCalculator.py) to gas price, tax, efficiency and maintenance
+    start = time.perf_counter()
+    cost = kwh_cost_grid(c_NG=np.linspace(0.2, 1.2, 201), tax=np.linspace(0, 0.05, 51), LH=9.59,
+                         eta_e=np.linspace(0.30, 0.45, 31), eta_t=0.473, eta_t_re=0.90, eta_e_CHP_re=0.474,
+                         M=np.linspace(0.005, 0.03, 11))
+    print(f"{cost.size} points in {time.perf_counter() - start:.3f} s, cost from {cost.min():.3f} to {cost.max():.3f} €/kWh")
+
+    contours = breakeven_gas_price(tax=0.0187, LH=9.59, eta_e=np.linspace(0.30, 0.45, 16), eta_t=0.473,
+                                   eta_t_re=0.90, eta_e_CHP_re=0.474, M=[0.010, 0.015, 0.020])
+    contours.to_csv('kwh_cost_breakeven.csv')
+    print("Breakeven natural gas price (€/m³) against the F1/F2/F3 purchase prices:")
+    print(contours.reset_index()[['eta_e', 'M', *BUY_PRICES]].to_string(index=False, float_format='%.3f'))
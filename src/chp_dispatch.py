@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+TIME_BANDS = ['F1', 'F2', 'F3']
+
+
+def dispatch_chp(df, Pe, Pt, NumH, hours_per_step=1.0, years=1):
+    """
+    Computes the CHP electric and thermal balances for the NumH hours with the highest electric load.
+
+    The CHP runs at constant Pe/Pt during the selected hours. Every hourly quantity is computed
+    with array operations and then summed per time band with a group-by on 'Fascia Oraria'. For loads with
+    another resolution (e.g. 15 minutes) the NumH hours are NumH / hours_per_step steps and every power (kW) is
+    integrated over the step (kWh = kW * hours_per_step). A load of several years is split into years of
+    equal length (consecutive blocks of rows): the CHP runs the NumH hours of highest load of every year and
+    the energies are yearly averages, so the balance is priced as one year.
+
+    Args:
+        df (DataFrame): Preprocessed load with 'Potenza Elettrica', 'Potenza Termica' and 'Fascia Oraria' columns.
+        Pe (float): Electric power of the CHP (kW).
+        Pt (float): Thermal power of the CHP (kW).
+        NumH (int): Number of operating hours of the CHP.
+        hours_per_step (float): Duration of a row of the load (h), e.g. 0.25 for quarter-hour data.
+        years (int): Number of years of the load (see hour_index.series_years).
+
+    Returns:
+        dict: Balance of the operating hours.
+            'bands' (DataFrame): Per time band (F1, F2, F3) totals in kWh of 'load', 'surplus', 'integration',
+                'provided_by_chp', 'self_consumption' and 'energy_sold_to_grid'.
+            'provided_by_chp_t', 'surplus_t', 'integration_t' (float): Thermal balance in kWh.
+            'tot_e', 'tot_t' (float): Electric and thermal load in kWh.
+            'committed_power', 'committed_power_ref' (float): Peak power drawn from the grid (kW)
+                by the proposed and by the reference system.
+    """
+
+    # Sort by Electric Power Desc and get the steps of the first NumH hours of every year
+    steps = NumH if hours_per_step == 1 else int(round(NumH / hours_per_step))
+    hours_per_year = hours_per_step / years
+    if years == 1:
+        df_top = df.sort_values(by='Potenza Elettrica', ascending=False).head(steps)
+    else:
+        year = np.arange(len(df)) * years // len(df)
+        df_top = df.assign(year=year).sort_values(by='Potenza Elettrica', ascending=False).groupby('year').head(steps)
+
+    potenza_elettrica = df_top['Potenza Elettrica'].to_numpy(dtype=float)
+    potenza_termica = df_top['Potenza Termica'].to_numpy(dtype=float)
+
+    # Electric balance: the load above Pe is integrated from the grid, the CHP power above the load is surplus
+    integration = np.maximum(potenza_elettrica - Pe, 0)
+    hourly = pd.DataFrame({
+        'Fascia Oraria': df_top['Fascia Oraria'].to_numpy(),
+        'load': potenza_elettrica,
+        'surplus': np.maximum(Pe - potenza_elettrica, 0),
+        'integration': integration,
+        'provided_by_chp': np.full(len(df_top), float(Pe)),
+        'self_consumption': np.minimum(potenza_elettrica, Pe),
+        'energy_sold_to_grid': integration,
+    })
+
+    bands = hourly.groupby('Fascia Oraria').sum().reindex(TIME_BANDS, fill_value=0.0) * hours_per_year
+
+    return {
+        'bands': bands,
+        'provided_by_chp_t': np.minimum(potenza_termica, Pt).sum() * hours_per_year,
+        'surplus_t': np.maximum(Pt - potenza_termica, 0).sum() * hours_per_year,
+        'integration_t': np.maximum(potenza_termica - Pt, 0).sum() * hours_per_year,
+        'tot_e': potenza_elettrica.sum() * hours_per_year,
+        'tot_t': potenza_termica.sum() * hours_per_year,
+        'committed_power': integration.max(initial=0),
+        'committed_power_ref': potenza_elettrica.max(initial=0),
+    }
+
+
+# Operating modes of dispatch_chp_modulating
+DISPATCH_MODES = ('thermal', 'electric', 'price')
+
+# Natural gas price with the CHP excise (€/kWh of fuel): 0.6 €/Sm³ + 0.0187 €/Sm³ of tax, LHV 9.59 kWh/Sm³
+GAS_PRICE = (0.6 + 0.0187) / 9.59
+
+
+def _modulating_block(potenza_elettrica, potenza_termica, indicators, Pe, Pt, mode, min_load, buy, sell, heat_value,
+                      cost):
+    # Dispatch of a block of scenarios: hours on axis 0, scenarios on axis 1
+
+    def running(x):
+        # Load factor clipped to the maximum output; below the minimum the unit is off
+        x = np.minimum(x, 1.0)
+        return np.where(x >= min_load, x, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        electric_led = running(np.nan_to_num(potenza_elettrica / Pe))
+        thermal_led = running(np.nan_to_num(potenza_termica / Pt))
+
+    if mode == 'thermal':
+        load_factor = thermal_led
+    elif mode == 'electric':
+        load_factor = electric_led
+    else:
+        def margin(x):
+            electric = x * Pe
+            return (buy * np.minimum(electric, potenza_elettrica) + sell * np.maximum(electric - potenza_elettrica, 0)
+                    + heat_value * np.minimum(x * Pt, potenza_termica) - cost * electric)
+
+        # Best breakpoint of every hour and scenario, keeping only the best margin so far
+        load_factor = np.zeros_like(electric_led)
+        best = margin(load_factor)
+        for x in (min_load, electric_led, thermal_led, 1.0):
+            candidate = margin(x)
+            better = candidate > best
+            load_factor = np.where(better, x, load_factor)
+            best = np.where(better, candidate, best)
+
+    electric = load_factor * Pe
+    thermal = load_factor * Pt
+    surplus = np.maximum(electric - potenza_elettrica, 0)
+    integration = np.maximum(potenza_elettrica - electric, 0)
+
+    # Totals per time band as one matrix product of the band indicators with the hourly matrices
+    hourly = {
+        'load': np.broadcast_to(potenza_elettrica, electric.shape),
+        'surplus': surplus,
+        'integration': integration,
+        'provided_by_chp': electric,
+        'self_consumption': potenza_elettrica - integration,
+        'energy_sold_to_grid': surplus,
+    }
+    totals = {key: indicators @ values for key, values in hourly.items()}
+    totals.update({
+        'provided_by_chp_t': np.minimum(potenza_termica, thermal).sum(axis=0),
+        'surplus_t': np.maximum(thermal - potenza_termica, 0).sum(axis=0),
+        'integration_t': np.maximum(potenza_termica - thermal, 0).sum(axis=0),
+        'committed_power': integration.max(axis=0, initial=0),
+        'load_factor': load_factor,
+    })
+    return totals
+
+
+def dispatch_chp_modulating(df, Pe, Pt, mode='thermal', min_load=0.5, eta_e=0.39, eta_t_ref=0.9, buy=None,
+                            sell=None, gas_price=GAS_PRICE, maintenance=0.015, chunk_size=16, hours_per_step=1.0):
+    """
+    Computes the CHP balances of a unit that modulates its output hour by hour instead of running at Pe/Pt.
+
+    Every hour the unit runs at a load factor x (electric output x * Pe, thermal output x * Pt) that is either 0
+    or between min_load and 1:
+        'thermal': follows the thermal load (heat-led), x = thermal load / Pt;
+        'electric': follows the electric load, x = electric load / Pe;
+        'price': picks the x with the highest hourly margin: electricity valued at the purchase price up to the
+            load and at the sale price above it, heat at the boiler gas it replaces, minus the CHP fuel and
+            maintenance. The margin is piecewise linear in x, so the best x is one of the breakpoints
+            (0, min_load, the two load-following factors, 1), compared for all hours at once.
+    A load factor below min_load switches the unit off for the hour.
+
+    Pe and Pt can be arrays of scenarios: the hours are on axis 0 and the scenarios on axis 1, so the whole
+    year of every scenario is dispatched with array operations, chunk_size scenarios at a time to keep the
+    hourly matrices small. The balance has the structure of dispatch_chp and is evaluated by evaluate_chp; the
+    reference system covers every hour of the load, and 'energy_sold_to_grid' is the electric surplus exported
+    to the grid.
+
+    Args:
+        df (DataFrame): Preprocessed load with 'Potenza Elettrica', 'Potenza Termica' and 'Fascia Oraria' columns.
+        Pe (float or array-like): Maximum electric power of the CHP (kW), one per scenario.
+        Pt (float or array-like): Maximum thermal power of the CHP (kW), one per scenario.
+        mode (str): One of DISPATCH_MODES.
+        min_load (float): Minimum load factor of the running unit.
+        eta_e (float): Electric efficiency of the CHP, for the fuel cost of the 'price' mode.
+        eta_t_ref (float): Efficiency of the reference boiler, for the value of the heat of the 'price' mode.
+        buy (array-like): Purchase price (€/kWh) per hour (default: settlement.BUY_PRICES of the time bands).
+        sell (array-like): Sale price (€/kWh) per hour (default: settlement.SELL_PRICES of the time bands).
+        gas_price (float): Natural gas price (€/kWh of fuel).
+        maintenance (float): Maintenance cost of the CHP (€/kWh of electricity).
+        chunk_size (int): Number of scenarios dispatched together.
+        hours_per_step (float): Duration of a row of the load (h); the energies are power * hours_per_step.
+
+    Returns:
+        dict: Balance with the keys of dispatch_chp ('bands' is a DataFrame for scalar Pe/Pt and a dict of dicts
+            of arrays (scenarios,) otherwise) and 'load_factor', the hourly load factor (hours, scenarios).
+    """
+
+    from settlement import BUY_PRICES, SELL_PRICES, band_prices
+
+    if mode not in DISPATCH_MODES:
+        raise ValueError(f"Unknown dispatch mode '{mode}', use one of {', '.join(DISPATCH_MODES)}.")
+
+    scalar = np.ndim(Pe) == 0 and np.ndim(Pt) == 0
+    Pe, Pt = np.broadcast_arrays(np.atleast_1d(np.asarray(Pe, dtype=float)), np.atleast_1d(np.asarray(Pt, dtype=float)))
+
+    potenza_elettrica = df['Potenza Elettrica'].to_numpy(dtype=float)
+    potenza_termica = df['Potenza Termica'].to_numpy(dtype=float)
+    fascia_oraria = df['Fascia Oraria'].to_numpy()
+    indicators = np.stack([fascia_oraria == fascia for fascia in TIME_BANDS]).astype(float)
+
+    buy = band_prices(fascia_oraria, BUY_PRICES) if buy is None else np.asarray(buy, dtype=float)
+    sell = band_prices(fascia_oraria, SELL_PRICES) if sell is None else np.asarray(sell, dtype=float)
+
+    blocks = [
+        _modulating_block(potenza_elettrica[:, None], potenza_termica[:, None], indicators,
+                          Pe[None, start:start + chunk_size], Pt[None, start:start + chunk_size], mode, min_load,
+                          buy[:, None], sell[:, None], gas_price / eta_t_ref, gas_price / eta_e + maintenance)
+        for start in range(0, len(Pe), chunk_size)
+    ]
+    totals = {key: np.concatenate([block[key] for block in blocks], axis=-1) for key in blocks[0]}
+
+    scenarios = np.ones(len(Pe))
+    balance = {
+        'bands': {key: dict(zip(TIME_BANDS, totals[key] * hours_per_step)) for key in
+                  ['load', 'surplus', 'integration', 'provided_by_chp', 'self_consumption', 'energy_sold_to_grid']},
+        'provided_by_chp_t': totals['provided_by_chp_t'] * hours_per_step,
+        'surplus_t': totals['surplus_t'] * hours_per_step,
+        'integration_t': totals['integration_t'] * hours_per_step,
+        'tot_e': potenza_elettrica.sum() * hours_per_step * scenarios,
+        'tot_t': potenza_termica.sum() * hours_per_step * scenarios,
+        'committed_power': totals['committed_power'],
+        'committed_power_ref': potenza_elettrica.max(initial=0) * scenarios,
+        'load_factor': totals['load_factor'],
+    }
+
+    if scalar:
+        bands = pd.DataFrame({key: {fascia: total[0] for fascia, total in values.items()}
+                              for key, values in balance['bands'].items()}).reindex(TIME_BANDS)
+        balance = {key: value if key == 'load_factor' else value[0] for key, value in balance.items() if key != 'bands'}
+        balance['bands'] = bands
+    return balance
@@ -0,0 +1,407 @@
+import numpy as np
+import pandas as pd
+
+from chp_dispatch import TIME_BANDS
+from settlement import BUY_PRICES, SELL_PRICES
+
+# Prices and rates of the economic evaluation: natural gas without taxes (€/Sm³), electricity purchase and sale
+# per time band, integrated, surplus and reference electricity of the operating costs (€/kWh), excise on natural
+# gas in the industrial and civil regime (€/Sm³), on electricity (€/kWh), power fee (€/kW per month) and CHP
+# maintenance (€/kWh)
+CHP_PRICES = {
+    'gas': 0.6,
+    'buy': BUY_PRICES,
+    'sell': SELL_PRICES,
+    'cu_in': 0.18,
+    'cu_sel': 0.135,
+    'cu_ref': 0.18,
+    'gas_tax': 0.0187,
+    'gas_tax_civil': 0.0181,
+    'electricity_tax': 0.0095,
+    'power_fee': 2.65,
+    'maintenance': 0.015,
+}
+
+# Quantities of chp_quantities that price_chp reads: everything the prices multiply
+QUANTITY_COLUMNS = [
+    'tot_supplied_by_chp', 'tot_self_consumption', 'tot_surplus', 'tot_integration',
+    'integration_F1', 'integration_F2', 'integration_F3', 'surplus_F1', 'surplus_F2', 'surplus_F3',
+    'load_F1', 'load_F2', 'load_F3', 'annual_gas_consumption', 'annual_gas_consumption_ref',
+    'free_tax_annual_consumption', 'industrial_tax_regime', 'committed_power', 'committed_power_ref',
+    'monthly_consumption', 'VNboiler', 'VNCHP',
+]
+
+
+def chp_quantities(balance, eta_e):
+    """
+    Computes the physical quantities of the proposed (CHP) and of the reference system: energy balances,
+    primary energy, emissions, gas volumes and tax regime. None of them depends on the prices, so they can be
+    computed once per dispatch and repriced by price_chp under any number of tariffs.
+
+    Every quantity of the balance can be a scalar or a NumPy array: the formulas broadcast, so a whole
+    grid of CHP sizes can be evaluated in a single call.
+
+    Args:
+        balance (dict): Balance with the structure returned by dispatch_chp. 'bands' is indexed as
+            bands[quantity][time_band], so both the DataFrame of dispatch_chp and a dict of dicts of arrays work.
+        eta_e (float): Electric efficiency of the CHP.
+
+    Returns:
+        dict: Energy balances (kWh), primary energy consumption (kWh), CO2 emissions, natural gas volumes (Sm³)
+            and the QUANTITY_COLUMNS read by price_chp, e.g. the integration, surplus and load per time band.
+    """
+
+    bands = balance['bands']
+    provided_by_chp_t = balance['provided_by_chp_t']
+    surplus_t = balance['surplus_t']
+    integration_t = balance['integration_t']
+    tot_t = balance['tot_t']
+    tot_e = balance['tot_e']
+
+    tot_supplied_by_chp = sum(bands['provided_by_chp'][fascia] for fascia in TIME_BANDS)
+    tot_self_consumption = sum(bands['self_consumption'][fascia] for fascia in TIME_BANDS)
+    tot_surplus = sum(bands['surplus'][fascia] for fascia in TIME_BANDS)
+    tot_integration = sum(bands['integration'][fascia] for fascia in TIME_BANDS)
+    tot_energy_sold_to_grid = sum(bands['energy_sold_to_grid'][fascia] for fascia in TIME_BANDS)
+    F1 = bands['load']['F1']  # ref system
+    F2 = bands['load']['F2']  # ref system
+    F3 = bands['load']['F3']  # ref system
+
+    ## ENERGY ANALYSIS
+    eta_t_ref = 0.9
+    eta_e_ref = 0.46
+
+    # Proposed system
+    primary_energy_consumption_boiler = integration_t / eta_t_ref
+    total_supplied_termal_energy = provided_by_chp_t + integration_t
+    supplied_to_user = tot_supplied_by_chp + tot_integration
+
+    ep_chp = tot_supplied_by_chp / eta_e
+    integration_from_national_grid = tot_integration / eta_e_ref
+    total_primary_energy_consumption = ep_chp + integration_from_national_grid
+
+    supplied_energy = total_supplied_termal_energy + supplied_to_user
+    primary_energy_consumption = primary_energy_consumption_boiler + total_primary_energy_consumption
+    total_fuel_efficiency = supplied_energy / primary_energy_consumption
+    co2_emission = (primary_energy_consumption_boiler + ep_chp) * 0.2 + tot_integration * 0.48
+
+    # Reference system
+    boiler_primary_energy_consumption_ref = tot_t / eta_t_ref
+    consumptio_of_reference_thermal_power_system = tot_e / eta_e_ref
+
+    supplied_energy_ref = tot_t + tot_e
+    primary_energy_consumption_ref = boiler_primary_energy_consumption_ref + consumptio_of_reference_thermal_power_system
+    supplied_energy_surplus = supplied_energy_ref + surplus_t
+    primary_energy_consumption_surplus_ref = primary_energy_consumption_ref + surplus_t / eta_e_ref
+    total_fuel_efficiency_ref = supplied_energy_surplus / primary_energy_consumption_surplus_ref
+    co2_emission_ref = boiler_primary_energy_consumption_ref * 0.2 + tot_e * 0.48
+
+    PES = (primary_energy_consumption_ref - primary_energy_consumption) / primary_energy_consumption_ref * 100
+
+    ## NATURAL GAS VOLUMES
+    LHV = 9.59
+    annual_gas_consumption = (primary_energy_consumption_boiler + ep_chp) / LHV
+
+    # The energy produced by COG must be grater then the 10% of total energy
+    tr = ep_chp / tot_e * 100
+    industrial_tax_regime = tr > 10
+
+    # Gas excemption = Produced Energy (kWh) * 0,22 (Sm³/kWh).
+    tax_exemption_factor = np.where(industrial_tax_regime, 0.22, 0)[()]
+    free_tax_annual_consumption = tax_exemption_factor * tot_supplied_by_chp
+    annual_gas_consumption_ref = boiler_primary_energy_consumption_ref / LHV
+
+    return {
+        # Proposed system: energy balance
+        'tot_supplied_by_chp': tot_supplied_by_chp,
+        'tot_self_consumption': tot_self_consumption,
+        'tot_surplus': tot_surplus,
+        'tot_integration': tot_integration,
+        'tot_energy_sold_to_grid': tot_energy_sold_to_grid,
+        'primary_energy_consumption_boiler': primary_energy_consumption_boiler,
+        'total_supplied_termal_energy': total_supplied_termal_energy,
+        'supplied_to_user': supplied_to_user,
+        'ep_chp': ep_chp,
+        'integration_from_national_grid': integration_from_national_grid,
+        'total_primary_energy_consumption': total_primary_energy_consumption,
+        'supplied_energy': supplied_energy,
+        'primary_energy_consumption': primary_energy_consumption,
+        'total_fuel_efficiency': total_fuel_efficiency,
+        'co2_emission': co2_emission,
+        # Reference system: energy balance
+        'boiler_primary_energy_consumption_ref': boiler_primary_energy_consumption_ref,
+        'consumptio_of_reference_thermal_power_system': consumptio_of_reference_thermal_power_system,
+        'supplied_energy_ref': supplied_energy_ref,
+        'primary_energy_consumption_ref': primary_energy_consumption_ref,
+        'supplied_energy_surplus': supplied_energy_surplus,
+        'primary_energy_consumption_surplus_ref': primary_energy_consumption_surplus_ref,
+        'total_fuel_efficiency_ref': total_fuel_efficiency_ref,
+        'co2_emission_ref': co2_emission_ref,
+        'PES': PES,
+        # Natural gas volumes
+        'annual_gas_consumption': annual_gas_consumption,
+        'tr': tr,
+        'industrial_tax_regime': industrial_tax_regime,
+        'tax_exemption_factor': tax_exemption_factor,
+        'free_tax_annual_consumption': free_tax_annual_consumption,
+        'annual_gas_consumption_ref': annual_gas_consumption_ref,
+        'VNboiler': primary_energy_consumption_boiler / LHV,  # Natural gas volume consumed by the boiler (Sm³)
+        'VNCHP': ep_chp / LHV,                                # Natural gas volume consumed by the CHP (Sm³)
+        # Electricity per time band (kWh) and committed power (kW)
+        **{f'{key}_{fascia}': bands[key][fascia] for key in ('integration', 'surplus', 'load') for fascia in TIME_BANDS},
+        'committed_power': balance['committed_power'],
+        'committed_power_ref': balance['committed_power_ref'],
+        'monthly_consumption': (F1 + F2 + F3) / 12,
+    }
+
+
+def price_chp(quantities, prices=None):
+    """
+    Prices the quantities of chp_quantities: natural gas and electricity costs and operating costs of the
+    proposed and of the reference system.
+
+    The costs are linear in the quantities, so repricing a cached dispatch under a new tariff costs a few array
+    operations. The quantities and the prices can be arrays: the formulas broadcast, e.g. quantities of
+    thousands of scenarios (N,) against several tariff sets given as prices of shape (T, 1) give costs (T, N).
+
+    Args:
+        quantities (dict): Quantities returned by chp_quantities or evaluate_chp (at least QUANTITY_COLUMNS), e.g.
+            the cached economics of a pipeline.run_chp stage.
+        prices (dict): Prices overriding CHP_PRICES; 'buy' and 'sell' are dicts per time band.
+
+    Returns:
+        dict: Natural gas costs, electricity costs and operating costs (€) of the proposed and of the reference
+            system.
+    """
+
+    prices = {**CHP_PRICES, **(prices or {})}
+    buy = prices['buy']
+    sell = prices['sell']
+
+    tot_supplied_by_chp = quantities['tot_supplied_by_chp']
+    annual_gas_consumption = quantities['annual_gas_consumption']
+    annual_gas_consumption_ref = quantities['annual_gas_consumption_ref']
+    F1 = quantities['load_F1']
+    F2 = quantities['load_F2']
+    F3 = quantities['load_F3']
+
+    ## NATURAL GAS COSTS
+    unitary_tax = np.where(quantities['industrial_tax_regime'], prices['gas_tax'], prices['gas_tax_civil'])[()]
+    raw_material_and_gas_network_use = prices['gas'] * annual_gas_consumption
+    taxes = (annual_gas_consumption - quantities['free_tax_annual_consumption']) * unitary_tax
+    total_gas_natural_cost = raw_material_and_gas_network_use + taxes
+
+    raw_material_and_gas_network_use_ref = prices['gas'] * annual_gas_consumption_ref
+    taxes_ref = raw_material_and_gas_network_use_ref * 0.181
+    total_gas_natural_cost_ref = taxes_ref + raw_material_and_gas_network_use_ref
+
+    ## ELECTRICITY COSTS
+    maintenance_cost = tot_supplied_by_chp * prices['maintenance']
+    energy_fee = quantities['integration_F1'] * buy['F1'] + quantities['integration_F2'] * buy['F2'] + quantities['integration_F3'] * buy['F3']
+    power_fee = quantities['committed_power'] * prices['power_fee'] * 12
+    total_tax_fee = energy_fee + power_fee
+    monthly_consumption = quantities['monthly_consumption']
+
+    total_tax = np.where(
+        monthly_consumption < 200000,
+        monthly_consumption * 0.0125,
+        np.where(monthly_consumption < 1200000, monthly_consumption * 0.0075, 4800 + 0.0125 * 200000)
+    )[()]
+
+    total_electricity_costs = total_tax + total_tax_fee + maintenance_cost
+    total_revenue = quantities['surplus_F1'] * sell['F1'] + quantities['surplus_F2'] * sell['F2'] + quantities['surplus_F3'] * sell['F3']
+    total_net_costs = total_electricity_costs - total_revenue + total_gas_natural_cost
+
+    energy_fee_ref = F1 * buy['F1'] + F2 * buy['F2'] + F3 * buy['F3']
+    power_fee_ref = quantities['committed_power_ref'] * prices['power_fee'] * 12
+    total_tax_fee_ref = energy_fee_ref + power_fee_ref
+    total_electricity_costs_ref = total_tax + total_tax_fee_ref
+    total_net_costs_ref = total_electricity_costs_ref + total_gas_natural_cost_ref
+
+    ## OPERATING COSTS
+    VNboiler = quantities['VNboiler']                   # VNboiler is the natural gas volume consumed by the boiler, calculated in standard cubic meters (Sm³).
+    VNCHP = quantities['VNCHP']                         # VNCHP is the natural gas volume consumed by the CHP, calculated in standard cubic meters (Sm³).
+    cu_N_tax_free = prices['gas']                       # cu_N_tax_free is the natural gas cost without taxes in €/Sm³.
+    ECHP = tot_supplied_by_chp                          # ECHP is the electrical energy produced by the CHP in kWh.
+    Ein = quantities['tot_integration']                 # Ein is the electrical energy integrated from the grid in kWh.
+    Esel = quantities['tot_self_consumption']           # Esel is the self-consumed electrical energy in kWh.
+    cu_in = prices['cu_in']                             # cu_in is the cost of the integrated electrical energy from the grid in €/kWh.
+    cu_sel = prices['cu_sel']                           # cu_sel is the selling price of the electrical energy surplus in €/kWh.
+    Esur = quantities['tot_surplus']                    # Esur is the surplus electrical energy sold to the grid in kWh.
+    M = prices['maintenance']                           # M represents maintenance costs in €/kWh.
+    TAXe = prices['electricity_tax']                    # TAXe is the tax on electrical energy in €/kWh.
+    TAXuN = prices['gas_tax']                           # TAXuN is the unit tax on natural gas in €/Sm³.
+
+    operating_cost_CHP = (VNboiler + VNCHP) * cu_N_tax_free + (VNCHP - 0.22 * ECHP) * TAXuN + Ein * cu_in - Esur * cu_sel + M * ECHP + TAXe * (Ein + Esel)
+
+    VNboiler_to = annual_gas_consumption_ref
+    Eto = F1 + F2 + F3
+    cu_ref_tax_free = prices['cu_ref']
+    TAXe_ref = prices['electricity_tax']
+    TAXuN_ref = prices['gas_tax_civil']
+
+    operating_cost_RS = VNboiler_to * (cu_N_tax_free + TAXuN_ref) + Eto * (cu_ref_tax_free + TAXe_ref)
+
+    return {
+        # Natural gas costs
+        'unitary_tax': unitary_tax,
+        'raw_material_and_gas_network_use': raw_material_and_gas_network_use,
+        'taxes': taxes,
+        'total_gas_natural_cost': total_gas_natural_cost,
+        'raw_material_and_gas_network_use_ref': raw_material_and_gas_network_use_ref,
+        'taxes_ref': taxes_ref,
+        'total_gas_natural_cost_ref': total_gas_natural_cost_ref,
+        # Electricity costs
+        'maintenance_cost': maintenance_cost,
+        'energy_fee': energy_fee,
+        'power_fee': power_fee,
+        'total_tax_fee': total_tax_fee,
+        'total_tax': total_tax,
+        'total_electricity_costs': total_electricity_costs,
+        'total_revenue': total_revenue,
+        'total_net_costs': total_net_costs,
+        'energy_fee_ref': energy_fee_ref,
+        'power_fee_ref': power_fee_ref,
+        'total_tax_fee_ref': total_tax_fee_ref,
+        'total_electricity_costs_ref': total_electricity_costs_ref,
+        'total_net_costs_ref': total_net_costs_ref,
+        # Operating costs
+        'operating_cost_CHP': operating_cost_CHP,
+        'operating_cost_RS': operating_cost_RS,
+    }
+
+
+def evaluate_chp(balance, eta_e, prices=None):
+    """
+    Computes the energy, emission and economic indicators of the proposed (CHP) and of the reference system:
+    the physical quantities of chp_quantities priced by price_chp.
+
+    Every quantity of the balance can be a scalar or a NumPy array: the formulas broadcast, so a whole
+    grid of CHP sizes can be evaluated in a single call. The prices can be arrays too, e.g. one per draw and
+    year of a Monte Carlo simulation (see monte_carlo.simulate_draws).
+
+    Args:
+        balance (dict): Balance with the structure returned by dispatch_chp. 'bands' is indexed as
+            bands[quantity][time_band], so both the DataFrame of dispatch_chp and a dict of dicts of arrays work.
+        eta_e (float): Electric efficiency of the CHP.
+        prices (dict): Prices overriding CHP_PRICES; 'buy' and 'sell' are dicts per time band.
+
+    Returns:
+        dict: Energy balances (kWh), primary energy consumption (kWh), CO2 emissions, natural gas and
+            electricity costs (€) and operating costs (€) of the proposed and of the reference system.
+    """
+
+    quantities = chp_quantities(balance, eta_e)
+    return {**quantities, **price_chp(quantities, prices)}
+
+
+def reprice_chp(quantities, prices=None):
+    """
+    Reprices a table of cached quantities, e.g. the sweep_chp_sizes(..., quantities=True) rows of many
+    scenarios, under a new tariff without dispatching them again.
+
+    Args:
+        quantities (DataFrame): One row per scenario with the QUANTITY_COLUMNS.
+        prices (dict): Prices overriding CHP_PRICES (scalars).
+
+    Returns:
+        DataFrame: The costs of price_chp, one row per scenario.
+    """
+
+    columns = {key: quantities[key].to_numpy() for key in QUANTITY_COLUMNS}
+    costs = price_chp(columns, prices)
+    return pd.DataFrame({key: np.broadcast_to(value, len(quantities)) for key, value in costs.items()},
+                        index=quantities.index)
+
+
+def chp_investment(Pe):
+    """
+    Returns the investment cost of a CHP unit (€) from its electric power, with the scale law of the CHP + Wind
+    stage.
+
+    Args:
+        Pe (float or ndarray): Electric power of the CHP (kW).
+    """
+
+    return (2.0 * (Pe / 1000.0) ** 0.868) * 1000000
+
+
+def chp_wind_operating_costs(economics, wind_revenue, wind_maintenance):
+    """
+    Combines the operating costs of the CHP stage with the costs of the wind stage.
+
+    The wind turbine costs its annual maintenance and saves the value of its production (the revenue of the
+    wind stage), so its net operating cost is the maintenance minus the revenue.
+
+    Args:
+        economics (dict): Indicators returned by evaluate_chp ('operating_cost_CHP', 'operating_cost_RS').
+        wind_revenue (float): Revenue of the wind turbine (€), as computed by the wind stage.
+        wind_maintenance (float): Annual maintenance of the wind turbine (€).
+
+    Returns:
+        dict: 'operating_cost_RS', 'operating_cost_CHP', 'operating_cost_wind', 'operating_cost_CHP_wind' and
+            'annual_savings' (€).
+    """
+
+    operating_cost_wind = wind_maintenance - wind_revenue
+    operating_cost_CHP_wind = economics['operating_cost_CHP'] + operating_cost_wind
+    return {
+        'operating_cost_RS': economics['operating_cost_RS'],
+        'operating_cost_CHP': economics['operating_cost_CHP'],
+        'operating_cost_wind': operating_cost_wind,
+        'operating_cost_CHP_wind': operating_cost_CHP_wind,
+        'annual_savings': economics['operating_cost_RS'] - operating_cost_CHP_wind,
+    }
+
+
+def chp_results(balance, economics):
+    """
+    Collects the balances of the proposed and of the reference system in one structured result, without
+    formatting anything (see chp_report.render_chp_report).
+
+    Args:
+        balance (dict): Balance returned by dispatch_chp.
+        economics (dict): Indicators returned by evaluate_chp for the balance.
+
+    Returns:
+        dict:
+            'proposed' (DataFrame): Electricity provided by the CHP, self-consumed, surplus, integration and
+                sold to the grid (kWh) and the reference unit cost 'ckw_he_ref' (€/kWh) per time band.
+            'reference' (Series): Electric load per time band (kWh), supplied by the grid in the reference system.
+            'thermal' (dict): Thermal energy provided by the CHP, surplus, boiler integration and load (kWh).
+            'tot_e' (float): Electric load (kWh).
+            'energy_sold' (DataFrame): Energy sold to the grid per time band and in total (MWh).
+            'economics' (dict): The indicators of evaluate_chp.
+    """
+
+    bands = balance['bands']
+    proposed = pd.DataFrame(
+        {key: bands[key].reindex(TIME_BANDS) for key in
+         ['provided_by_chp', 'self_consumption', 'surplus', 'integration', 'energy_sold_to_grid']}
+    )
+
+    # Unit cost of the CHP electricity at the reference prices: self-consumed share at the sale price, the rest
+    # at the purchase price
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = proposed['self_consumption'] / proposed['provided_by_chp']
+    proposed['ckw_he_ref'] = p * pd.Series(SELL_PRICES) + (1 - p) * pd.Series(BUY_PRICES)
+
+    sold = [bands.at[fascia, 'energy_sold_to_grid'] / 1E3 for fascia in TIME_BANDS]
+    energy_sold = pd.DataFrame({
+        "Fonte": TIME_BANDS + ["Totale"],
+        "Energia Venduta (MWh)": sold + [sold[0] + sold[1] + sold[2]]
+    })
+
+    return {
+        'proposed': proposed,
+        'reference': bands['load'].reindex(TIME_BANDS),
+        'thermal': {
+            'provided_by_chp': balance['provided_by_chp_t'],
+            'surplus': balance['surplus_t'],
+            'integration': balance['integration_t'],
+            'load': balance['tot_t'],
+        },
+        'tot_e': balance['tot_e'],
+        'energy_sold': energy_sold,
+        'economics': economics,
+    }
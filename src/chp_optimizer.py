@@ -0,0 +1,250 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from chp_economics import chp_investment
+from chp_sizing import SWEEP_COLUMNS, sweep_chp_sizes
+from hour_index import check_hourly_year
+from investment import DISCOUNT_RATE, YEARS, evaluate_investment
+from pipeline import prepare_load
+
+# Objectives of optimize_chp_size: column of the evaluations and direction (+1 maximize, -1 minimize).
+# total_net_costs is only comparable between candidates with the same NumH (the costs cover the NumH hours),
+# so it is meant for searches with NumH_bounds=(n, n).
+OBJECTIVES = {
+    'net_cost_saving': 1,
+    'total_net_costs': -1,
+    'NPV': 1,
+    'IRR': 1,
+}
+
+# Golden ratio conjugate of the golden-section search
+_INVERSE_PHI = (math.sqrt(5) - 1) / 2
+
+
+def add_investment_indicators(evaluations, discount_rate=DISCOUNT_RATE, years=YEARS):
+    """
+    Adds the savings and investment indicators of the CHP to the evaluations of sweep_chp_sizes.
+
+    The annual saving of a candidate is its net cost saving on the reference system over the NumH hours; the
+    investment follows chp_investment.
+
+    Args:
+        evaluations (DataFrame): Rows of sweep_chp_sizes.
+        discount_rate (float): Discount rate of the NPV.
+        years (int): Useful life of the CHP (years).
+
+    Returns:
+        DataFrame: The evaluations with 'net_cost_saving', 'I', 'NPV' and 'IRR' columns.
+    """
+
+    evaluations = evaluations.copy()
+    evaluations['net_cost_saving'] = evaluations['total_net_costs_ref'] - evaluations['total_net_costs']
+    evaluations['I'] = chp_investment(evaluations['Pe'].to_numpy())
+    indicators = evaluate_investment(evaluations['I'].to_numpy(), evaluations['net_cost_saving'].to_numpy(),
+                                     discount_rate, years)
+    evaluations['NPV'] = indicators['NPV']
+    evaluations['IRR'] = indicators['IRR']
+    return evaluations
+
+
+def optimize_chp_size(df, eta_e, objective='net_cost_saving', Pe_bounds=(100, 5000), Pt_bounds=(100, 5000),
+                      NumH_bounds=(438, 8760), min_tr=10, max_evaluations=250, grid=5, max_cycles=4):
+    """
+    Searches the CHP size (Pe, Pt) and number of operating hours (NumH) that optimize an objective.
+
+    The search starts from the best point of a coarse grid evaluated in one batched call of sweep_chp_sizes,
+    then improves one variable at a time with golden-section searches until a full cycle brings no gain.
+    The tax regime constraint (tr > min_tr) only depends on Pe and NumH and grows with both, so on every line
+    the feasible interval is found by bisection before the golden-section search. Pe and Pt are rounded to
+    1 kW and NumH to whole hours; every candidate is evaluated at most once (the evaluations are cached) and
+    the search stops after max_evaluations evaluations.
+
+    Args:
+        df (DataFrame): Preprocessed load with 'Potenza Elettrica', 'Potenza Termica' and 'Fascia Oraria' columns,
+            one year of hourly steps (see hour_index.check_hourly_year).
+        eta_e (float): Electric efficiency of the CHP.
+        objective (str): One of OBJECTIVES.
+        Pe_bounds (tuple): Range of the electric power of the CHP (kW).
+        Pt_bounds (tuple): Range of the thermal power of the CHP (kW).
+        NumH_bounds (tuple): Range of the number of operating hours.
+        min_tr (float): The CHP must produce more than min_tr % of the electric load (industrial tax regime);
+            None disables the constraint.
+        max_evaluations (int): Maximum number of evaluated candidates, the coarse grid included.
+        grid (int): Points per variable of the coarse grid (grid ** 3 candidates).
+        max_cycles (int): Maximum number of golden-section cycles over the three variables.
+
+    Returns:
+        dict:
+            'Pe', 'Pt', 'NumH': Best candidate (None if no candidate satisfies the constraint).
+            'objective' (str) and 'value' (float): Objective and its value at the best candidate.
+            'best' (Series): Evaluation of the best candidate (see add_investment_indicators).
+            'evaluations' (DataFrame): Every evaluated candidate, in evaluation order.
+
+    Raises:
+        ValueError: If the objective is unknown, the grid does not fit in max_evaluations or the load is not one
+            year of hourly steps.
+    """
+
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}', use one of {', '.join(OBJECTIVES)}.")
+    if grid ** 3 > max_evaluations:
+        raise ValueError(f"The coarse grid ({grid ** 3} candidates) exceeds max_evaluations ({max_evaluations}).")
+
+    # The NumH bound is the number of rows: check the load once, the evaluations only get its columns
+    check_hourly_year(df)
+    df = df[['Potenza Elettrica', 'Potenza Termica', 'Fascia Oraria']].reset_index(drop=True)
+
+    direction = OBJECTIVES[objective]
+    bounds = {
+        'Pe': (float(round(Pe_bounds[0])), float(round(Pe_bounds[1]))),
+        'Pt': (float(round(Pt_bounds[0])), float(round(Pt_bounds[1]))),
+        'NumH': (int(NumH_bounds[0]), min(int(NumH_bounds[1]), len(df))),
+    }
+
+    # Evaluated candidates: (Pe, Pt, NumH) -> row of add_investment_indicators
+    cache = {}
+
+    def key(point):
+        return float(round(point['Pe'])), float(round(point['Pt'])), int(round(point['NumH']))
+
+    def score(row):
+        feasible = min_tr is None or row['tr'] > min_tr
+        value = row[objective]
+        return direction * value if feasible and np.isfinite(value) else -np.inf
+
+    def evaluate(point):
+        # Score of a candidate, -inf once the budget is spent on other candidates
+        point = key(point)
+        if point not in cache:
+            if len(cache) >= max_evaluations:
+                return -np.inf
+            cache[point] = add_investment_indicators(sweep_chp_sizes(df, *([value] for value in point), eta_e)).iloc[0]
+        return score(cache[point])
+
+    def tr(point):
+        evaluate(point)
+        return cache[key(point)]['tr'] if key(point) in cache else -np.inf
+
+    # Coarse grid in one batched call; its rows fill the cache
+    axes = [np.unique(np.linspace(low, high, grid).round()) for low, high in bounds.values()]
+    coarse = add_investment_indicators(sweep_chp_sizes(df, *axes, eta_e))
+    for _, row in coarse.iterrows():
+        cache[key(row)] = row
+    best = max(cache, key=lambda point: score(cache[point]))
+    if score(cache[best]) == -np.inf:
+        # No feasible grid point: start from the largest Pe and NumH, where tr is the highest
+        best = (bounds['Pe'][1], best[1], bounds['NumH'][1])
+    current = dict(zip(('Pe', 'Pt', 'NumH'), best))
+
+    def feasible_low(name, low):
+        # Smallest value of the variable with tr > min_tr, by bisection between low and the current feasible value
+        if min_tr is None or name == 'Pt' or tr({**current, name: low}) > min_tr:
+            return low
+        high = current[name]
+        while high - low > 1 and len(cache) < max_evaluations:
+            middle = round((low + high) / 2)
+            if tr({**current, name: middle}) > min_tr:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def golden_section(name, low, high):
+        # Best value of the variable on [low, high], the other variables fixed at the current point
+        line = {round(value): evaluate({**current, name: value}) for value in (low, high, current[name])}
+        c = high - _INVERSE_PHI * (high - low)
+        d = low + _INVERSE_PHI * (high - low)
+        while high - low > 1 and len(cache) < max_evaluations:
+            line[round(c)] = evaluate({**current, name: c})
+            line[round(d)] = evaluate({**current, name: d})
+            if line[round(c)] > line[round(d)]:
+                high, d = d, c
+                c = high - _INVERSE_PHI * (high - low)
+            else:
+                low, c = c, d
+                d = low + _INVERSE_PHI * (high - low)
+        return max(line, key=line.get)
+
+    for _ in range(max_cycles):
+        start = evaluate(current)
+        if start == -np.inf:
+            break
+        for name in ('Pe', 'Pt', 'NumH'):
+            low = feasible_low(name, bounds[name][0])
+            current[name] = golden_section(name, low, bounds[name][1])
+        if evaluate(current) <= start or len(cache) >= max_evaluations:
+            break
+
+    evaluations = pd.DataFrame(list(cache.values())).reset_index(drop=True)
+    scores = np.array([score(row) for row in cache.values()])
+    best = evaluations.iloc[int(scores.argmax())] if scores.max() > -np.inf else None
+
+    return {
+        'Pe': None if best is None else best['Pe'],
+        'Pt': None if best is None else best['Pt'],
+        'NumH': None if best is None else int(best['NumH']),
+        'objective': objective,
+        'value': np.nan if best is None else best[objective],
+        'best': best,
+        'evaluations': evaluations,
+    }
+
+
+def _optimize_site(load_file, eta_e, cache_dir, options):
+    start = time.perf_counter()
+    result = optimize_chp_size(prepare_load(load_file, cache_dir=cache_dir), eta_e, **options)
+    row = {'site': os.path.splitext(os.path.basename(load_file))[0], 'load_file': load_file}
+    if result['best'] is not None:
+        row.update(result['best'][SWEEP_COLUMNS + ['net_cost_saving', 'I', 'NPV', 'IRR']].to_dict())
+        row['NumH'] = result['NumH']
+    row['evaluations'] = len(result['evaluations'])
+    row['elapsed'] = time.perf_counter() - start
+    return row
+
+
+def optimize_portfolio(load_files, eta_e, max_workers=None, cache_dir=None, **options):
+    """
+    Optimizes the CHP size of every customer of a portfolio in parallel on a process pool.
+
+    Args:
+        load_files (list): Customer load files (see prepare_load).
+        eta_e (float): Electric efficiency of the CHP.
+        max_workers (int): Number of worker processes (default: number of CPUs).
+        cache_dir (str): If given, the parsed load series are cached there.
+        **options: Options of optimize_chp_size (objective, bounds, min_tr, max_evaluations, ...).
+
+    Returns:
+        DataFrame: One row per customer with the best candidate (no values if none satisfies the constraint),
+            the number of evaluations and the elapsed time.
+    """
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_optimize_site, os.path.abspath(load_file), eta_e, cache_dir, options)
+                   for load_file in load_files]
+        return pd.DataFrame([future.result() for future in futures])
+
+
+if __name__ == '__main__':
+
+    from series_cache import CACHE_DIR
+
+    parser = argparse.ArgumentParser(description="Optimizes the CHP size of the customers of a portfolio.")
+    parser.add_argument('load_files', nargs='+', help="Customer load files (semicolon separated, 8760 rows)")
+    parser.add_argument('--objective', default='net_cost_saving', choices=list(OBJECTIVES))
+    parser.add_argument('--eta-e', type=float, default=0.39, help="Electric efficiency of the CHP")
+    parser.add_argument('--min-tr', type=float, default=10, help="Minimum CHP share of the electric load (%%)")
+    parser.add_argument('--max-evaluations', type=int, default=250, help="Evaluations per customer")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: number of CPUs)")
+    parser.add_argument('-o', '--output', default='chp_optimal_sizes.csv', help="Results file")
+    args = parser.parse_args()
+
+    results = optimize_portfolio(args.load_files, args.eta_e, max_workers=args.workers, cache_dir=CACHE_DIR,
+                                 objective=args.objective, min_tr=args.min_tr, max_evaluations=args.max_evaluations)
+    results.to_csv(args.output, index=False)
+    print(results.to_string(index=False))
@@ -0,0 +1,295 @@
+import functools
+import io
+
+
+def render_chp_report(result, saved_file=None):
+    """
+    Formats the CHP results as the text report of 3_CHP_Fixed.py.
+
+    The computation never formats anything: call this only when the report is read by someone.
+
+    Args:
+        result (dict): Result of chp_economics.chp_results.
+        saved_file (str): Name of the CSV file of the energy sold to the grid, to confirm in the report.
+
+    Returns:
+        str: The report.
+    """
+
+    buffer = io.StringIO()
+    write = functools.partial(print, file=buffer)
+
+    economics = result['economics']
+    proposed = result['proposed']
+    reference = result['reference']
+    thermal = result['thermal']
+    provided_by_chp_t = thermal['provided_by_chp']
+    surplus_t = thermal['surplus']
+    integration_t = thermal['integration']
+    tot_t = thermal['load']
+    tot_e = result['tot_e']
+    committed_power = economics['committed_power']
+    committed_power_ref = economics['committed_power_ref']
+
+    # Results for each Time Band
+    for fascia, cKW in proposed['ckw_he_ref'].items():
+        write(f"  CKW_heRef {fascia}: {cKW:.4f}")
+
+    write()
+    write()
+
+    write("------------------------------------------------------------------")
+    write(f"  Thermal Energy Provided By CHP: {provided_by_chp_t / 1000:.2f} MWh")
+    write(f"  Thermal Surplus (Heat Waste): {surplus_t / 1000:.2f} MWh")
+    write(f"  Boiler Integration: {integration_t / 1000:.2f} MWh")
+    write("------------------------------------------------------------------")
+
+    write()
+    write()
+
+    write("------------------------------------------------------------------")
+    write("                     PROPOSED SYSTEM                              ")
+    write("----------------- Thermal Energy Balance (MWh) -------------------")
+    write("------------------------------------------------------------------")
+    write("                 THERMAL ENERGY BALANCE (MWh)                     ")
+    write("------------------------------------------------------------------")
+    write("                        Supplyed Energy                           ")
+    write("------------------------------------------------------------------")
+    write(f" Recovered from CHP plant          : {provided_by_chp_t / 1E3:.2f} MWh")
+    write(f" Supplyed by boiler                : {integration_t / 1E3:.2f} MWh")
+    write(f" TOTAL                             : {economics['total_supplied_termal_energy'] / 1E3:.2f} MWh")
+    write("------------------------------------------------------------------")
+    write(f" Primary Energy consumption boiler : {economics['primary_energy_consumption_boiler'] / 1E3:.2f}")
+    write("------------------------------------------------------------------")
+    write("                      ELECTRICITY (MWh)                           ")
+    write("------------------------------------------------------------------")
+    write("                      Supplyed Electricity                        ")
+    write("------------------------------------------------------------------")
+    write("                     |    F1    |    F2    |    F3    |  TOTAL   |")
+
+    f1 = proposed.at['F1', 'provided_by_chp']
+    f2 = proposed.at['F2', 'provided_by_chp']
+    f3 = proposed.at['F3', 'provided_by_chp']
+    write(f"Supplied by CHP      | {f1 / 1E3:8.2f} | {f2 / 1E3:8.2f} | {f3 / 1E3:8.2f} | {economics['tot_supplied_by_chp'] / 1E3:8.2f} |")
+
+    f1 = proposed.at['F1', 'self_consumption']
+    f2 = proposed.at['F2', 'self_consumption']
+    f3 = proposed.at['F3', 'self_consumption']
+    write(f"Self-consumption     | {f1 / 1E3:8.2f} | {f2 / 1E3:8.2f} | {f3 / 1E3:8.2f} | {economics['tot_self_consumption'] / 1E3:8.2f} |")
+
+    f1 = proposed.at['F1', 'surplus']
+    f2 = proposed.at['F2', 'surplus']
+    f3 = proposed.at['F3', 'surplus']
+    write(f"Surplus              | {f1 / 1E3:8.2f} | {f2 / 1E3:8.2f} | {f3 / 1E3:8.2f} | {economics['tot_surplus'] / 1E3:8.2f} |")
+
+    f1 = proposed.at['F1', 'integration']
+    f2 = proposed.at['F2', 'integration']
+    f3 = proposed.at['F3', 'integration']
+    write(f"Integration          | {f1 / 1E3:8.2f} | {f2 / 1E3:8.2f} | {f3 / 1E3:8.2f} | {economics['tot_integration'] / 1E3:8.2f} |")
+
+
+    write("------------------------------------------------------------------")
+    write(f"Supplied to user (E_CHP + Integration) : {economics['supplied_to_user'] / 1E3:.2f} MWh")
+    write("------------------------------------------------------------------")
+
+    # Print Energy Sold to Grid
+    write("------------------------------------------------------------------")
+    write("                      Energy Sold to Grid (MWh)                   ")
+    write("------------------------------------------------------------------")
+    write("                     |    F1    |    F2    |    F3    |  TOTAL   |")
+    f1_sold, f2_sold, f3_sold, total_sold = result['energy_sold']['Energia Venduta (MWh)']
+    write(f"Energy Sold to Grid | {f1_sold:8.2f} | {f2_sold:8.2f} | {f3_sold:8.2f} | {total_sold:8.2f} |")
+    write("------------------------------------------------------------------")
+
+    if saved_file is not None:
+        write(f"Dati salvati in {saved_file}")
+
+
+    write("------------------------------------------------------------------")
+    write("                  Primary Energy Consumption                      ")
+    write("------------------------------------------------------------------")
+    write(f" CHP plant                         : {economics['ep_chp']/1E3:.2f} MWh")                            #EpCHP
+    write(f" Integration from national grid    : {economics['integration_from_national_grid']/1E3:.2f} MWh")
+    write("------------------------------------------------------------------")
+    write(f" TOTAL: {economics['total_primary_energy_consumption']/1E3:.2f} MWh")                              #C
+    write("------------------------------------------------------------------")      
+
+
+    write("------------------------------------------------------------------")
+    write("                  Overall Energy Balance                          ")
+    write("------------------------------------------------------------------")
+    write(f" Supplied energy (heat + electricity)       : {economics['supplied_energy']/1E3:.2f} MWh")                           
+    write(f" Primary energy consumption                 : {economics['primary_energy_consumption']/1E3:.2f} MWh")
+    write(f" Total fuel efficiency                      : {economics['total_fuel_efficiency']/1E3:.2f} MWh")
+    write(f" C02 emissions (t)                          : {economics['co2_emission']:.2f}")
+    write("------------------------------------------------------------------")
+   
+    write()
+    write()
+
+
+    write("------------------------------------------------------------------")
+    write("                     Reference System                             ")
+    write("------------------------------------------------------------------")
+    write("                   Thermal Energy Balance                         ")
+    write("------------------------------------------------------------------")
+    write("                       Supplied Energy                            ")
+    write("------------------------------------------------------------------")
+    write(f" Supplied by boiler: {tot_t/1E3:.2f}")    #1'
+    write("------------------------------------------------------------------")
+    write("                   Primary energy consmption                      ")
+    write("------------------------------------------------------------------")
+    write(f" Boiler primary energy consumption: {economics['boiler_primary_energy_consumption_ref']/1E3:.2f}"); #A'
+    write("------------------------------------------------------------------")
+    write("                      ELECTRICITY (MWh)                           ")
+    write("------------------------------------------------------------------")
+    write("                      Supplyed Electricity                        ")
+    write("------------------------------------------------------------------")
+    write("                     |    F1    |    F2    |    F3    |  TOTAL   |")
+    write(f"                     | {reference['F1']/1E3:8.2f} | {reference['F2']/1E3:8.2f} | {reference['F3']/1E3:8.2f} | {tot_e/1E3:8.2f} |") 
+    write("------------------------------------------------------------------")
+    write(f" Supplied to user: {tot_t/1E3:.2f}")    #3'
+    write("------------------------------------------------------------------")
+    write("                   Primary energy consmption                      ")
+    write("------------------------------------------------------------------")
+    write(f" Consumptio of reference thermal-power system: {economics['consumptio_of_reference_thermal_power_system']/1E3:.2f}"); #C'
+
+ 
+    write("------------------------------------------------------------------")
+    write("                  Overall Energy Balance                          ")
+    write("------------------------------------------------------------------")
+    write(f" Supplied energy (heat + electricity)       : {economics['supplied_energy_ref']/1E3:.2f} MWh")                           
+    write(f" Primary energy consumption                 : {economics['primary_energy_consumption_ref']/1E3:.2f} MWh")
+    write(f" Supplied energy + Surplus                  : {economics['supplied_energy_surplus']/1E3:.2f} MWh") 
+    write(f" Primary energy consumption + surplus       : {economics['primary_energy_consumption_surplus_ref']/1E3:.2f} MWh") 
+    write(f" Total fuel efficiency                      : {economics['total_fuel_efficiency_ref']:.2f}")
+    write(f" C02 emissions (t)                          : {economics['co2_emission_ref']:.2f}")
+    write("------------------------------------------------------------------")
+
+
+    write()
+    write()
+    write()
+    write()
+
+    write("------------------------------------------------------------------")
+    write("         PROPOSED SYSTEM: econimc analysis                         ")
+    write("------------------------------------------------------------------")
+    write("                 Natural Gas Costs                                ")
+    write("------------------------------------------------------------------")
+    write(f" Annual consumption (Sm3)                   : {economics['annual_gas_consumption']:.2f}")                           
+    write(" Charge e/Sm3                               :" ,0.6)
+    write(f" Tax regime                                 : {'industriale' if economics['industrial_tax_regime'] else 'civile'}  {economics['tr']:.2f}%") 
+    write(f" Tax exemption factor (Sm3/kEhe)            : {economics['tax_exemption_factor']:.2f}") 
+    write(f" Free-tax annual consumption (Sm3)          : {economics['free_tax_annual_consumption']:.2f}")
+    write(f" Raw material and gas network use           : {economics['raw_material_and_gas_network_use']/1E6:.4f} M")
+    write(f" Taxes                                      : {economics['taxes']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+    write(f" Total natural gas costs                    : {economics['total_gas_natural_cost']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+
+
+    write()
+    
+    write("------------------------------------------------------------------")
+    write("        Reference System: economic analysis                       ")
+    write("------------------------------------------------------------------")
+    write("                 Natural Gas Costs                                ")
+    write("------------------------------------------------------------------")
+    write(f" Annual consumption (Sm3)                   : {economics['annual_gas_consumption_ref']:.4f}")                          
+    write(" Charge e/Sm3                               :" ,0.6)
+    write(f" Tax regime                                 : civile") 
+    write(f" Raw material and gas network use           : {economics['raw_material_and_gas_network_use_ref']/1E6:.4f} M")
+    write(f" Taxes                                      : {economics['taxes_ref']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+    write(f" Total natural gas costs                    : {economics['total_gas_natural_cost_ref']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+
+
+    write("------------------------------------------------------------------")
+    write("        PROPOSED SYSTEM: econimc analysis                         ")
+    write("------------------------------------------------------------------")
+    write("                 Electricity Costs                                ")
+    write("------------------------------------------------------------------")    
+    write(" Maintenence charge (e/kWh)                       :" ,0.015)
+    write(f" Maintenence cost                                 : {economics['maintenance_cost']/1E6:.4f} M")
+    write("------------------------------------------------------------------") 
+    write("                 Integration Costs                                ")    
+    write("------------------------------------------------------------------")    
+    write(" F1 charge (e/kWh)                       :" ,0.169)
+    write(" F2 cahrge (e/kWh)                       :" ,0.174)
+    write(" F3 charge (e/kWh)                       :" ,0.163)
+    write(" Energy fee                              :", economics['energy_fee'])
+    write(f" Committed Power                         : {committed_power:.2f} kW")
+    write(f" Power fee                               : {economics['power_fee']/1E6:.4f} M")
+    write(f" Total Tax fee                           : {economics['total_tax_fee']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+    write("                 Tax (self-consumption and integration)")
+    write("------------------------------------------------------------------")
+    write(f"  Monthly consumption (kWhe/month)       : {economics['monthly_consumption']:.2f}")
+    write("  Tax Ee (e/kWh) 1                       :",0.0075)
+    write("  Tax Ee (e/kWh) 2                       :",0.0125)
+    write(f"  Total Tax                              : {economics['total_tax']/1E6:.4f} M")
+    write(f"  TOTAL Electricity Costs                : {economics['total_electricity_costs']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+    write("                 Sale of Electricity                              ")
+    write("------------------------------------------------------------------")
+    write(" F1 sell (e/kWh)                       :" ,0.137)
+    write(" F2 sell (e/kWh)                       :" ,0.142)
+    write(" F3 sell (e/kWh)                       :" ,0.131)
+    write(f" Total revenu                          : {economics['total_revenue']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+    write(f" TOTAL NET COSTS                       : {economics['total_net_costs']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+
+
+    write()
+
+    write("------------------------------------------------------------------")
+    write("        Reference System: econimc analysis                        ")
+    write("------------------------------------------------------------------")
+    write("                 Electricity Costs                                ")
+    write("------------------------------------------------------------------")    
+    write(" F1 charge (e/kWh)                       :" ,0.169)
+    write(" F2 cahrge (e/kWh)                       :" ,0.174)
+    write(" F3 charge (e/kWh)                       :" ,0.163)
+    write(f" Energy fee                              : {economics['energy_fee']/1E6:.4f} M")
+    write(f" Committed Power                         : {committed_power_ref:.2f} kW")
+    write(f" Power fee                               : {economics['power_fee_ref']/1E6:.4f} M")
+    write(f" Total Tax fee                           : {economics['total_tax_fee_ref']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+    write(f"  Monthly consumption (kWhe/month)       : {economics['monthly_consumption']:.2f}")
+    write("  Tax Ee (e/kWh) 1                       :",0.0075)
+    write("  Tax Ee (e/kWh) 2                       :",0.0125)
+    write(f"  Total Tax                              : {economics['total_tax']/1E6:.4f} M")
+    write(f"  Total Electricity Costs                : {economics['total_electricity_costs_ref']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+    write(f" TOTAL NET COSTS                       : {economics['total_net_costs_ref']/1E6:.4f} M")
+    write("------------------------------------------------------------------")
+
+
+    write()
+    write()
+
+    write(f"  Primary Energy Consumption P.S. :{economics['primary_energy_consumption']:.2f}")
+    write(f"  Primary Energy Consumption Ref. : {economics['primary_energy_consumption_ref']:.2f}")    
+    diff = economics['primary_energy_consumption']-economics['primary_energy_consumption_ref']
+    write(f"  Diff : {diff:.2f}") 
+
+    write()
+
+    write(f"  CO2 Emission P.S. : {economics['co2_emission']:.2f}")
+    write(f"  CO2 Emission Ref. : {economics['co2_emission_ref']:.2f}")
+    diff = economics['co2_emission']-economics['co2_emission_ref']
+    write(f"  Diff : {diff:.2f}")
+
+    write()
+
+    write(f"  Operating Cost P.S. : {economics['operating_cost_CHP']/1000000:.2f} M")
+    write(f"  Operating Cost Ref. : {economics['operating_cost_RS']/1000000:.2f} M")
+    diff = economics['operating_cost_CHP']-economics['operating_cost_RS']
+    write(f"  Diff : {diff/1000000:.2f} M")
+
+    write()
+
+    return buffer.getvalue()
@@ -0,0 +1,137 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from chp_dispatch import TIME_BANDS
+from chp_economics import QUANTITY_COLUMNS, evaluate_chp, reprice_chp
+from hour_index import check_hourly_year
+
+SWEEP_COLUMNS = [
+    'Pe', 'Pt', 'NumH', 'PES', 'tr', 'co2_emission', 'co2_emission_ref', 'operating_cost_CHP', 'operating_cost_RS',
+    'committed_power', 'total_net_costs', 'total_net_costs_ref'
+]
+
+
+def _prefix_sums(values, n):
+    # Sum of the first n hours along the last axis for every n in the array n
+    cumulative = np.cumsum(values, axis=-1)
+    cumulative = np.concatenate([np.zeros(cumulative.shape[:-1] + (1,)), cumulative], axis=-1)
+    return cumulative[..., n]
+
+
+def sweep_chp_sizes(df, Pe_values, Pt_values, NumH_values, eta_e, quantities=False):
+    """
+    Evaluates every (Pe, Pt, NumH) combination of a CHP sizing grid in one batched pass.
+
+    The load is sorted once by electric power: the NumH operating hours of every candidate are a prefix of
+    the sorted load, so the balances of all the candidates are prefix sums of the hourly surplus and
+    integration matrices broadcast over Pe and Pt. The economics are then evaluated by evaluate_chp on the
+    whole grid at once. Every row of the load is an operating hour, so the load must hold one year of hourly
+    steps (see hour_index.check_hourly_year).
+
+    Args:
+        df (DataFrame): Preprocessed load with 'Potenza Elettrica', 'Potenza Termica' and 'Fascia Oraria' columns.
+        Pe_values (array-like): Electric powers of the CHP to evaluate (kW).
+        Pt_values (array-like): Thermal powers of the CHP to evaluate (kW).
+        NumH_values (array-like): Numbers of operating hours to evaluate.
+        eta_e (float): Electric efficiency of the CHP.
+        quantities (bool): Also return the QUANTITY_COLUMNS of chp_economics, so that the candidates can be
+            repriced under other tariffs by chp_economics.reprice_chp without sweeping again.
+
+    Returns:
+        DataFrame: One row per candidate with the columns listed in SWEEP_COLUMNS (and QUANTITY_COLUMNS).
+
+    Raises:
+        ValueError: If the load is not one year of hourly steps.
+    """
+
+    check_hourly_year(df)
+
+    df_sorted = df.sort_values(by='Potenza Elettrica', ascending=False)
+    potenza_elettrica = df_sorted['Potenza Elettrica'].to_numpy(dtype=float)
+    potenza_termica = df_sorted['Potenza Termica'].to_numpy(dtype=float)
+    fascia_oraria = df_sorted['Fascia Oraria'].to_numpy()
+
+    # Grid axes: Pe (axis 0), Pt (axis 1), NumH (axis 2)
+    Pe = np.asarray(Pe_values, dtype=float).reshape(-1, 1, 1)
+    Pt = np.asarray(Pt_values, dtype=float).reshape(1, -1, 1)
+    NumH = np.clip(np.asarray(NumH_values, dtype=int), 0, len(df_sorted))
+
+    # Hourly electric balance of every Pe: shape (Pe, hours)
+    Pe_h = Pe[:, 0]
+    integration = np.maximum(potenza_elettrica - Pe_h, 0)
+    surplus = np.maximum(Pe_h - potenza_elettrica, 0)
+
+    bands = {key: {} for key in ['load', 'surplus', 'integration', 'provided_by_chp', 'self_consumption', 'energy_sold_to_grid']}
+    for fascia in TIME_BANDS:
+        mask = fascia_oraria == fascia
+        hours = _prefix_sums(mask.astype(float), NumH)
+        load = _prefix_sums(np.where(mask, potenza_elettrica, 0), NumH)
+        band_integration = _prefix_sums(np.where(mask, integration, 0), NumH)[:, None, :]
+
+        bands['load'][fascia] = load
+        bands['surplus'][fascia] = _prefix_sums(np.where(mask, surplus, 0), NumH)[:, None, :]
+        bands['integration'][fascia] = band_integration
+        bands['provided_by_chp'][fascia] = Pe * hours
+        bands['self_consumption'][fascia] = load - band_integration
+        bands['energy_sold_to_grid'][fascia] = band_integration
+
+    # Hourly thermal balance of every Pt: shape (Pt, hours)
+    Pt_h = Pt[0]
+    integration_t = _prefix_sums(np.maximum(potenza_termica - Pt_h, 0), NumH)
+    surplus_t = _prefix_sums(np.maximum(Pt_h - potenza_termica, 0), NumH)
+    tot_t = _prefix_sums(potenza_termica, NumH)
+
+    # The peak load is always the first hour of the sorted load
+    running = NumH > 0
+    peak = potenza_elettrica[0] if len(potenza_elettrica) else 0.0
+
+    balance = {
+        'bands': bands,
+        'provided_by_chp_t': (tot_t - integration_t)[None, :, :],
+        'surplus_t': surplus_t[None, :, :],
+        'integration_t': integration_t[None, :, :],
+        'tot_e': _prefix_sums(potenza_elettrica, NumH),
+        'tot_t': tot_t,
+        'committed_power': np.where(running, np.maximum(peak - Pe, 0), 0),
+        'committed_power_ref': np.where(running, max(peak, 0), 0),
+    }
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        economics = evaluate_chp(balance, eta_e)
+
+    shape = (Pe.shape[0], Pt.shape[1], NumH.shape[0])
+    columns = {
+        'Pe': Pe,
+        'Pt': Pt,
+        'NumH': NumH.reshape(1, 1, -1),
+    }
+    for key in SWEEP_COLUMNS[3:] + (QUANTITY_COLUMNS if quantities else []):
+        columns[key] = economics[key]
+
+    return pd.DataFrame({key: np.broadcast_to(value, shape).ravel() for key, value in columns.items()})
+
+
+if __name__ == '__main__':
+
+    df = pd.read_csv('load_preproc.csv')
+
+    Pe_values = np.linspace(100, 5000, 50)
+    Pt_values = np.linspace(100, 5000, 50)
+    NumH_values = np.linspace(438, 8760, 20).astype(int)
+
+    start = time.perf_counter()
+    sweep = sweep_chp_sizes(df, Pe_values, Pt_values, NumH_values, eta_e=0.39)
+    elapsed = time.perf_counter() - start
+
+    print(f"Evaluated {len(sweep)} candidates in {elapsed:.2f} s")
+    # The reference system covers the same NumH hours, so candidates are ranked by their saving on it
+    sweep['net_cost_saving'] = sweep['total_net_costs_ref'] - sweep['total_net_costs']
+    print(sweep.nlargest(10, 'net_cost_saving').to_string(index=False))
+
+    # Repricing the cached quantities under a new tariff is a few array operations, without sweeping again
+    sweep = sweep_chp_sizes(df, Pe_values, Pt_values, NumH_values, eta_e=0.39, quantities=True)
+    start = time.perf_counter()
+    costs = reprice_chp(sweep, {'gas': 0.7, 'buy': {'F1': 0.2, 'F2': 0.19, 'F3': 0.17}})
+    print(f"Repriced {len(sweep)} candidates in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+
+# Hours of the calendar used by calendar_hours: a leap year, so that 29 February has its own hours
+CALENDAR_HOURS = 366 * 24
+
+# First day of every month in a leap year (0-based day of the year)
+_MONTH_START = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+_NS_PER_HOUR = 3600 * 10 ** 9
+
+
+def calendar_hours(month, day, hour):
+    """
+    Returns the hour of the calendar year (0 to 8783) of month/day/hour values, ignoring the year.
+
+    The calendar has 366 days, so the same day and hour get the same key in every year and 29 February keeps
+    its own hours: series of different years are aligned on the calendar as the day-month hour strings did.
+    """
+
+    month, day, hour = (np.asarray(values, dtype=np.int64) for values in (month, day, hour))
+    return (_MONTH_START[month - 1] + day - 1) * 24 + hour
+
+
+def calendar_hour_index(index):
+    """
+    Returns the calendar hour (see calendar_hours) of every timestamp of a DatetimeIndex.
+    """
+
+    index = pd.DatetimeIndex(index)
+    return calendar_hours(index.month, index.day, index.hour)
+
+
+def step_hours(index, default=1.0):
+    """
+    Returns the duration (h) of a step of a regular series: the most common difference between its timestamps,
+    so a DST change or a gap between years does not matter. Series with less than two timestamps get default.
+    """
+
+    values = pd.DatetimeIndex(index).as_unit('ns').asi8
+    if len(values) < 2:
+        return default
+    steps, counts = np.unique(np.diff(values), return_counts=True)
+    return steps[np.argmax(counts)] / _NS_PER_HOUR
+
+
+def series_years(index):
+    """
+    Returns the number of whole years (of 365 days) covered by a regular series, at least 1: a year of hourly
+    or quarter-hour steps, leap year included, counts as 1.
+    """
+
+    return max(1, int(round(len(index) * step_hours(index) / (365 * 24))))
+
+
+def check_hourly_year(load):
+    """
+    Checks that a load holds one year of hourly steps, as the tools that count the operating hours as rows of the
+    load do (e.g. chp_sizing.sweep_chp_sizes). The timestamps are the DatetimeIndex of the load or its 'Tempo'
+    column; a load without timestamps must not exceed the hours of a leap year.
+
+    Raises:
+        ValueError: If the steps of the load are not hourly or the load covers more than one year.
+    """
+
+    if isinstance(load.index, pd.DatetimeIndex):
+        times = load.index
+    elif 'Tempo' in load:
+        times = pd.to_datetime(load['Tempo'])
+    else:
+        times = None
+
+    if times is None:
+        hours, years = 1.0, 1 if len(load) <= CALENDAR_HOURS else int(np.ceil(len(load) / CALENDAR_HOURS))
+    else:
+        hours, years = step_hours(times), series_years(times)
+    if hours != 1 or years > 1:
+        raise ValueError(f"The load has {len(load)} steps of {hours * 60:g} minutes over {years} years, but one "
+                         "year of hourly steps is required: average sub-hourly steps with downsample_steps and "
+                         "size every year on its own.")
+
+
+def calendar_step_index(index, step_minutes=60):
+    """
+    Returns the calendar step of every timestamp of a DatetimeIndex: its calendar hour (see calendar_hours)
+    split into steps of step_minutes, so sub-hourly series of different years also align on the calendar.
+    With step_minutes=60 the keys are the calendar hours.
+
+    Raises:
+        ValueError: If step_minutes does not divide the hour.
+    """
+
+    if step_minutes < 1 or 60 % step_minutes:
+        raise ValueError(f"Steps of {step_minutes} minutes do not divide the hour.")
+    index = pd.DatetimeIndex(index)
+    return (calendar_hours(index.month, index.day, index.hour) * (60 // step_minutes)
+            + index.minute.to_numpy() // step_minutes)
+
+
+def parse_calendar_hours(labels):
+    """
+    Returns the calendar hour (see calendar_hours) of 'dd-mm HH:MM' labels, as written by the stage CSV files.
+    """
+
+    labels = pd.Series(np.asarray(labels, dtype=str))
+    return calendar_hours(labels.str[3:5].astype(int), labels.str[0:2].astype(int), labels.str[6:8].astype(int))
+
+
+def epoch_hours(index):
+    """
+    Returns the number of whole hours since 1970-01-01 of every timestamp of a DatetimeIndex: the key of series
+    that must be aligned on the actual time, year included (e.g. hourly market prices).
+    """
+
+    return pd.DatetimeIndex(index).as_unit('ns').asi8 // _NS_PER_HOUR
+
+
+def align_hours(source, target, missing='drop'):
+    """
+    Matches the hours of two series by their integer keys (see calendar_hour_index and epoch_hours).
+
+    The result gives positions into both series, so the values are aligned with plain array indexing:
+    source_values[source_rows] lines up with target_values[target_rows].
+
+    Args:
+        source (array-like): Hour keys of the series to align; they must be unique.
+        target (array-like): Hour keys of the reference series; the matches follow its order.
+        missing (str): What to do with target hours without a source hour: 'drop' them (inner join) or 'raise'.
+
+    Returns:
+        tuple: (target_rows, source_rows) integer arrays of the matching positions.
+
+    Raises:
+        ValueError: If the source has duplicate hours (e.g. several years, or a DST change, on calendar keys),
+            or if missing is 'raise' and some target hours are not in the source.
+    """
+
+    if missing not in ('drop', 'raise'):
+        raise ValueError(f"Unknown missing policy '{missing}', use 'drop' or 'raise'.")
+
+    source = np.asarray(source, dtype=np.int64)
+    target = np.asarray(target, dtype=np.int64)
+
+    order = np.argsort(source, kind='stable')
+    ordered = source[order]
+    duplicated = ordered[1:][ordered[1:] == ordered[:-1]]
+    if len(duplicated):
+        raise ValueError(f"The series to align has {len(duplicated)} duplicate hours (first key: {duplicated[0]}); "
+                         "select one year or align on epoch hours.")
+
+    i = np.searchsorted(ordered, target).clip(max=max(len(ordered) - 1, 0))
+    found = ordered[i] == target if len(ordered) else np.zeros(len(target), dtype=bool)
+
+    if missing == 'raise' and not found.all():
+        raise ValueError(f"{np.count_nonzero(~found)} of {len(target)} hours have no matching hour "
+                         f"(first key: {target[~found][0]}).")
+
+    target_rows = np.flatnonzero(found)
+    return target_rows, order[i[target_rows]]
+
+
+def reindex_hours(values, source, target, fill_value=np.nan):
+    """
+    Reindexes the values of a series on the hours of a target series, filling the hours it does not cover.
+
+    Args:
+        values (array-like): Values of the series, one per source hour.
+        source (array-like): Hour keys of the series (unique).
+        target (array-like): Hour keys of the target series.
+        fill_value (float): Value of the target hours without a source hour.
+
+    Returns:
+        ndarray: One value per target hour.
+    """
+
+    values = np.asarray(values)
+    target_rows, source_rows = align_hours(source, target)
+    result = np.full(len(target), fill_value, dtype=np.result_type(values, np.asarray(fill_value)))
+    result[target_rows] = values[source_rows]
+    return result
+
+
+def align_steps(source_index, target_index, missing='drop'):
+    """
+    Matches every step of a target series with the step of a source series that contains it, on the calendar.
+
+    The source has the same or a coarser resolution than the target, e.g. hourly PVGIS wind and a quarter-hour
+    load: the four quarter-hours of an hour all take the wind of that hour. Only row positions are computed,
+    so no resampled copy of either series is built.
+
+    Args:
+        source_index (DatetimeIndex): Timestamps of the series to align (unique calendar steps, at most hourly).
+        target_index (DatetimeIndex): Timestamps of the reference series; the matches follow its order.
+        missing (str): What to do with target steps without a source step (see align_hours).
+
+    Returns:
+        tuple: (target_rows, source_rows) integer arrays of the matching positions, as align_hours.
+
+    Raises:
+        ValueError: If the steps of the source are longer than one hour or do not divide it.
+    """
+
+    step_minutes = int(round(step_hours(source_index) * 60))
+    if step_minutes > 60:
+        raise ValueError(f"The series to align has steps of {step_minutes} minutes, longer than one hour.")
+    return align_hours(calendar_step_index(source_index, step_minutes),
+                       calendar_step_index(target_index, step_minutes), missing)
+
+
+def downsample_steps(values, factor):
+    """
+    Averages every factor consecutive steps of a series, e.g. factor=4 turns quarter-hour power into hourly power
+    for the hourly-only tools. The mean is taken over a reshaped view of the last axis, without building a frame.
+
+    Args:
+        values (array-like): Power per step, the steps on the last axis; their number must be a multiple of factor.
+        factor (int): Steps per output step.
+
+    Returns:
+        ndarray: Mean power per output step.
+    """
+
+    values = np.asarray(values)
+    if values.shape[-1] % factor:
+        raise ValueError(f"{values.shape[-1]} steps are not a multiple of {factor}.")
+    return values.reshape(values.shape[:-1] + (-1, factor)).mean(axis=-1)
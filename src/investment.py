@@ -0,0 +1,194 @@
+import numpy as np
+
+# Default investment horizon: discount rate and useful life (years), as in the CHP + Wind stage
+DISCOUNT_RATE = 0.05
+YEARS = 20
+
+
+def annuity_factor(rate, years):
+    """
+    Returns the present value of 1 € per year for the given years (the limit for rate -> 0 is the number of years).
+    """
+
+    rate = np.asarray(rate, dtype=float)
+    safe = np.where(np.abs(rate) < 1e-12, 1.0, rate)
+    return np.where(np.abs(rate) < 1e-12, float(years), (1 - (1 + safe) ** -years) / safe)[()]
+
+
+def cash_flows(investment, annual_savings, years=YEARS, degradation=0.0, escalation=0.0, replacements=None):
+    """
+    Builds the yearly cash flows of investments: the investment in year 0, then the annual savings.
+
+    The savings of year t are annual_savings * (1 - degradation) ** (t - 1) * (1 + escalation) ** (t - 1): the
+    output of the plant degrades while the energy prices escalate. Every input can be an array of scenarios;
+    they are broadcast against each other.
+
+    Args:
+        investment (float or array-like): Initial investment (€).
+        annual_savings (float or array-like): Savings of the first year (€).
+        years (int): Useful life (years).
+        degradation (float or array-like): Yearly loss of output (share).
+        escalation (float or array-like): Yearly increase of the energy prices (share).
+        replacements (dict): Replacement events {year: cost (€)}, e.g. {10: 150000} for an overhaul in year 10;
+            the costs can be arrays of scenarios.
+
+    Returns:
+        ndarray: Cash flows (€), shape (scenarios..., years + 1).
+    """
+
+    investment = np.asarray(investment, dtype=float)[..., None]
+    annual_savings = np.asarray(annual_savings, dtype=float)[..., None]
+    degradation = np.asarray(degradation, dtype=float)[..., None]
+    escalation = np.asarray(escalation, dtype=float)[..., None]
+
+    t = np.arange(1, years + 1)
+    savings = annual_savings * ((1 - degradation) * (1 + escalation)) ** (t - 1)
+    shape = np.broadcast_shapes(investment.shape, savings.shape[:-1] + (1,))[:-1]
+    flows = np.concatenate([np.broadcast_to(-investment, shape + (1,)), np.broadcast_to(savings, shape + (years,))],
+                           axis=-1)
+
+    for year, cost in (replacements or {}).items():
+        if not 0 < year <= years:
+            raise ValueError(f"Replacement year {year} is outside the useful life (1 to {years}).")
+        flows = np.broadcast_to(flows, np.broadcast_shapes(flows.shape, np.shape(cost) + (1,))).copy()
+        flows[..., year] -= np.asarray(cost, dtype=float)
+    return flows
+
+
+def npv(flows, rate=DISCOUNT_RATE):
+    """
+    Net present value of yearly cash flows (year 0 first), for every scenario at once.
+
+    Args:
+        flows (array-like): Cash flows (€), shape (scenarios..., years + 1).
+        rate (float or array-like): Discount rate, scalar or one per scenario.
+
+    Returns:
+        float or ndarray: NPV (€) per scenario.
+    """
+
+    flows = np.asarray(flows, dtype=float)
+    t = np.arange(flows.shape[-1])
+    discount = (1 + np.asarray(rate, dtype=float)[..., None]) ** -t
+    return (flows * discount).sum(axis=-1)[()]
+
+
+def irr(flows, low=-0.99, high=10.0, tol=1e-12, max_iterations=100):
+    """
+    Internal rate of return of yearly cash flows for every scenario at once.
+
+    Newton steps on the NPV are safeguarded by a bisection bracket: a step that leaves the bracket is replaced
+    by its midpoint, so every scenario converges like Newton near the root and never worse than bisection.
+    For conventional cash flows (an investment followed by positive savings) the NPV decreases with the rate
+    and the root is unique.
+
+    Args:
+        flows (array-like): Cash flows (€), shape (scenarios..., years + 1).
+        low (float): Lowest rate searched.
+        high (float): Highest rate searched.
+        tol (float): Tolerance on the rate.
+        max_iterations (int): Maximum number of iterations.
+
+    Returns:
+        float or ndarray: IRR per scenario, NaN where the NPV does not change sign between low and high.
+    """
+
+    flows = np.asarray(flows, dtype=float)
+    t = np.arange(flows.shape[-1])
+
+    def value_and_slope(rate):
+        discount = (1 + rate[..., None]) ** -t
+        return (flows * discount).sum(axis=-1), (-t * flows * discount / (1 + rate[..., None])).sum(axis=-1)
+
+    shape = flows.shape[:-1]
+    low = np.full(shape, float(low))
+    high = np.full(shape, float(high))
+    value_low, _ = value_and_slope(low)
+    value_high, _ = value_and_slope(high)
+    bracketed = np.sign(value_low) != np.sign(value_high)
+
+    rate = np.where(bracketed, 0.1, np.nan)
+    rate = np.where((rate > low) & (rate < high), rate, (low + high) / 2)
+    # A converged scenario keeps its rate, so its IRR does not depend on the other scenarios of the call
+    done = ~bracketed
+    for _ in range(max_iterations):
+        value, slope = value_and_slope(rate)
+
+        # Keep the root between low and high
+        same_as_low = np.sign(value) == np.sign(value_low)
+        low = np.where(same_as_low, rate, low)
+        high = np.where(same_as_low, high, rate)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = rate - value / slope
+        inside = np.isfinite(step) & (step > low) & (step < high)
+        next_rate = np.where(inside, step, (low + high) / 2)
+        converged = (np.abs(next_rate - rate) <= tol * (1 + np.abs(rate))) | (value == 0)
+        rate = np.where(done | (value == 0), rate, next_rate)
+        done |= converged
+        if np.all(done):
+            break
+
+    return np.where(bracketed, rate, np.nan)[()]
+
+
+def discounted_payback(flows, rate=DISCOUNT_RATE):
+    """
+    Years until the discounted cash flows repay the investment, interpolated within the year.
+
+    Args:
+        flows (array-like): Cash flows (€), shape (scenarios..., years + 1).
+        rate (float or array-like): Discount rate (0 gives the payback of the undiscounted cash flows).
+
+    Returns:
+        float or ndarray: Payback (years) per scenario, NaN if the investment is not repaid in its life.
+    """
+
+    flows = np.asarray(flows, dtype=float)
+    t = np.arange(flows.shape[-1])
+    cumulative = np.cumsum(flows * (1 + np.asarray(rate, dtype=float)[..., None]) ** -t, axis=-1)
+
+    repaid = cumulative >= 0
+    year = np.argmax(repaid, axis=-1)
+    found = np.take_along_axis(repaid, year[..., None], axis=-1)[..., 0] & (year > 0)
+    year = np.maximum(year, 1)
+    before = np.take_along_axis(cumulative, year[..., None] - 1, axis=-1)[..., 0]
+    after = np.take_along_axis(cumulative, year[..., None], axis=-1)[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payback = year - 1 + -before / (after - before)
+    return np.where(found, payback, np.nan)[()]
+
+
+def evaluate_investment(investment, annual_savings, rate=DISCOUNT_RATE, years=YEARS, degradation=0.0, escalation=0.0,
+                        replacements=None):
+    """
+    Computes the investment indicators of one or many scenarios from their cash-flow profiles.
+
+    Args:
+        investment (float or array-like): Initial investment (€).
+        annual_savings (float or array-like): Savings of the first year (€).
+        rate (float or array-like): Discount rate.
+        years (int): Useful life (years).
+        degradation, escalation, replacements: Cash-flow profile (see cash_flows).
+
+    Returns:
+        dict: 'cash_flows' (€), 'NPV' (€), 'PI' (profitability index), 'SPB' (simple payback on the first-year
+            savings, years), 'DPB' (discounted payback, years) and 'IRR', as scalars or arrays of scenarios.
+    """
+
+    flows = cash_flows(investment, annual_savings, years, degradation, escalation, replacements)
+    investment = np.asarray(investment, dtype=float)
+    NPV = npv(flows, rate)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        SPB = (investment / np.asarray(annual_savings, dtype=float))[()]
+        PI = ((NPV + investment) / investment)[()]
+
+    return {
+        'cash_flows': flows,
+        'NPV': NPV,
+        'PI': PI,
+        'SPB': SPB,
+        'DPB': discounted_payback(flows, rate),
+        'IRR': irr(flows),
+    }
@@ -0,0 +1,159 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from pipeline import prepare_load
+
+# Daily charts: (statistic, title, y label, file name)
+DAILY_CHARTS = (
+    ('mean', 'Daily Power Averages', 'Average Power (kW)', 'daily_mean_values.png'),
+    ('max', 'Max Daily Power', 'Max Power (kW)', 'daily_max_values.png'),
+    ('min', 'Min Daily Power', 'Min Power (kW)', 'daily_min_values.png'),
+)
+
+BAND_COLORS = {'F1': 'blue', 'F2': 'green', 'F3': 'red'}
+
+CHART_FILES = [name for _, _, _, name in DAILY_CHARTS] + ['electric_load_chart.png', 'thermal_load_chart.png']
+
+
+def daily_statistics(data):
+    """
+    Computes the daily mean, minimum and maximum of the thermal and electric power in one resampling pass.
+
+    Args:
+        data (DataFrame): Hourly load indexed by time, with 'Potenza Termica' and 'Potenza Elettrica'.
+
+    Returns:
+        DataFrame: Daily values with (power, statistic) columns, e.g. ('Potenza Elettrica', 'max').
+    """
+
+    return data[['Potenza Termica', 'Potenza Elettrica']].resample('D').agg(['mean', 'min', 'max'])
+
+
+def _draw_duration(ax, values, mask, color, label, style):
+    # One bar per hour at x = 1, 2, ... where mask is set: a filled polygon over the hour edges, so that every
+    # run of consecutive hours is a single shape and isolated hours keep their width, or the bars of plt.bar
+    x = np.arange(1, len(values) + 1)
+    if style == 'bars':
+        ax.bar(x[mask], values[mask], color=color, alpha=0.7, label=label)
+    else:
+        edges = (x[:, None] + np.array([-0.5, 0.5])).ravel()
+        ax.fill_between(edges, np.repeat(values, 2), where=np.repeat(mask, 2), color=color, alpha=0.7,
+                        linewidth=0, label=label)
+
+
+def render_load_charts(data, output_dir='.', dpi=300, style='step', figure=None):
+    """
+    Draws the daily and load duration charts of a customer on a single reusable figure.
+
+    The duration curves are drawn as one filled polygon per time band instead of one bar per hour, which gives
+    the same picture at the resolution of the images in a fraction of the time. style='bars' draws the
+    individual bars as plt.bar did.
+
+    Args:
+        data (DataFrame): Hourly load returned by prepare_load (or read from load_preproc.csv with 'Tempo'
+            as the index).
+        output_dir (str): Directory of the PNG files (see CHART_FILES).
+        dpi (int): Resolution of the PNG files.
+        style (str): 'step' or 'bars' for the duration curves.
+        figure (Figure): Figure to draw on, e.g. to reuse it across customers (default: a new figure).
+
+    Returns:
+        list: Paths of the PNG files.
+    """
+
+    if style not in ('step', 'bars'):
+        raise ValueError(f"Unknown duration curve style '{style}', use 'step' or 'bars'.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    fig = figure if figure is not None else Figure()
+    paths = []
+
+    def save(name):
+        fig.tight_layout()
+        paths.append(os.path.join(output_dir, name))
+        fig.savefig(paths[-1], dpi=dpi)
+
+    # Daily mean, max and min power
+    daily = daily_statistics(data)
+    for statistic, title, ylabel, name in DAILY_CHARTS:
+        fig.clear()
+        fig.set_size_inches(15, 8)
+        ax = fig.add_subplot()
+        ax.plot(daily.index, daily['Potenza Termica', statistic], label='Thermal Power', color='red', linewidth=1.5)
+        ax.plot(daily.index, daily['Potenza Elettrica', statistic], label='Electrical Power', color='blue',
+                linestyle='--', linewidth=1.5)
+        ax.set_title(title, fontsize=16)
+        ax.set_xlabel('Date', fontsize=14)
+        ax.set_ylabel(ylabel, fontsize=14)
+        ax.legend()
+        ax.grid(True)
+        save(name)
+
+    # Hours sorted by decreasing electric power
+    data = data.sort_values(by='Potenza Elettrica', ascending=False)
+    electric = data['Potenza Elettrica'].to_numpy()
+    bands = data['Fascia Oraria'].to_numpy()
+
+    # Electric power duration curve, split by time band
+    fig.clear()
+    fig.set_size_inches(14, 7)
+    ax = fig.add_subplot()
+    for band, color in BAND_COLORS.items():
+        _draw_duration(ax, electric, bands == band, color, band, style)
+    ax.set_title('Electric Power', fontsize=16)
+    ax.set_xlabel('Index', fontsize=14)
+    ax.set_ylabel('Electric Power', fontsize=14)
+    ax.legend()
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    save('electric_load_chart.png')
+
+    # Thermal power, in the same order
+    fig.clear()
+    fig.set_size_inches(14, 7)
+    ax = fig.add_subplot()
+    _draw_duration(ax, data['Potenza Termica'].to_numpy(), np.ones(len(data), dtype=bool), 'red', 'Thermal Power', style)
+    ax.set_title('Thermal Power', fontsize=16)
+    ax.set_xlabel('Index (Counter)', fontsize=14)
+    ax.set_ylabel('Thermal Power', fontsize=14)
+    ax.legend()
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    save('thermal_load_chart.png')
+
+    return paths
+
+
+def _render_site(load_file, output_dir, options):
+    return render_load_charts(prepare_load(load_file), output_dir, **options)
+
+
+def render_portfolio_charts(load_files, output_dir='charts', max_workers=None, **options):
+    """
+    Draws the load charts of several customers in parallel on a process pool, one directory per customer.
+
+    Args:
+        load_files (list): Customer load files (see prepare_load).
+        output_dir (str): Directory of the customer chart directories.
+        max_workers (int): Number of worker processes (default: number of CPUs).
+        **options: Options of render_load_charts (dpi, style).
+
+    Returns:
+        dict: Paths of the PNG files per customer.
+
+    Raises:
+        ValueError: If two load files have the same name: their charts would share one directory.
+    """
+
+    sites = {}
+    for load_file in load_files:
+        site = os.path.splitext(os.path.basename(load_file))[0]
+        if site in sites:
+            raise ValueError(f"The load files '{sites[site]}' and '{load_file}' have the same site name '{site}'; "
+                             "rename one of them.")
+        sites[site] = load_file
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {site: executor.submit(_render_site, load_file, os.path.join(output_dir, site), options)
+                   for site, load_file in sites.items()}
+        return {site: future.result() for site, future in futures.items()}
@@ -0,0 +1,319 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from chp_economics import CHP_PRICES, chp_investment, chp_quantities, chp_wind_operating_costs, price_chp
+from investment import DISCOUNT_RATE, YEARS, discounted_payback, irr, npv
+from hour_index import series_years, step_hours
+from pipeline import prepare_load, read_wind_production, run_chp, run_wind
+from settlement import BUY_PRICES, SELL_PRICES, band_prices, settle
+
+# Uncertainty of the energy prices: yearly drift and volatility of the log prices of gas and electricity and the
+# correlation of their yearly shocks
+UNCERTAINTY = {
+    'gas_drift': 0.0,
+    'gas_volatility': 0.15,
+    'electricity_drift': 0.0,
+    'electricity_volatility': 0.10,
+    'correlation': 0.6,
+}
+
+PERCENTILES = (10, 50, 90)
+
+# Investment indicators of every draw, for the CHP alone and for CHP + Wind
+INDICATORS = ['NPV', 'SPB', 'DPB', 'IRR']
+SYSTEMS = {'CHP': 'CHP', 'CHP+Wind': 'CHP_Wind'}
+
+
+def sample_price_paths(rng, years, uncertainty=None):
+    """
+    Samples the yearly multipliers of the gas and electricity prices over the useful life.
+
+    The log prices follow correlated random walks: every year adds a normal shock with the drift and volatility
+    of UNCERTAINTY, so the multiplier of year t is exp of the sum of the shocks of years 1 to t.
+
+    Args:
+        rng (Generator): Random number generator of the draw.
+        years (int): Useful life (years).
+        uncertainty (dict): Values overriding UNCERTAINTY.
+
+    Returns:
+        dict: 'gas' and 'electricity' price multipliers per year (years,).
+    """
+
+    uncertainty = {**UNCERTAINTY, **(uncertainty or {})}
+    shocks = rng.standard_normal((2, years))
+    rho = uncertainty['correlation']
+    correlated = {'gas': shocks[0], 'electricity': rho * shocks[0] + np.sqrt(1 - rho ** 2) * shocks[1]}
+
+    paths = {}
+    for carrier, shock in correlated.items():
+        drift = uncertainty[f'{carrier}_drift']
+        volatility = uncertainty[f'{carrier}_volatility']
+        paths[carrier] = np.exp(np.cumsum(drift - volatility ** 2 / 2 + volatility * shock))
+    return paths
+
+
+def day_pools(wind_index, load_index):
+    """
+    Prepares the day-block bootstrap of a wind series over the hours of a load.
+
+    Args:
+        wind_index (DatetimeIndex): Timestamps of the wind series (one or more years, hourly).
+        load_index (DatetimeIndex): Timestamps of the load.
+
+    Returns:
+        dict: 'starts' (first row of every complete day of the wind series, sorted by month), 'offsets' and
+            'counts' (position and number of the days of every month in 'starts'), 'day_month' (month of every
+            day of the load, 0 to 11), 'day' (day of every hour of the load) and 'hour' (hour of the day).
+
+    Raises:
+        ValueError: If a month of the load has no complete day in the wind series.
+    """
+
+    wind_index = pd.DatetimeIndex(wind_index)
+    days = wind_index.normalize()
+    first = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    complete = first[np.diff(np.r_[first, len(days)]) == 24]
+    months = wind_index.month.to_numpy()[complete] - 1
+    order = np.argsort(months, kind='stable')
+    counts = np.bincount(months, minlength=12)
+
+    load_index = pd.DatetimeIndex(load_index)
+    day, load_days = pd.factorize(load_index.normalize())
+    day_month = load_days.month.to_numpy() - 1
+    missing = sorted(set(day_month[counts[day_month] == 0] + 1))
+    if missing:
+        raise ValueError(f"The wind series has no complete day in the months {missing} of the load.")
+
+    return {
+        'starts': complete[order],
+        'offsets': np.r_[0, np.cumsum(counts)[:-1]],
+        'counts': counts,
+        'day_month': day_month,
+        'day': day,
+        'hour': load_index.hour.to_numpy(),
+    }
+
+
+def resample_wind_rows(pools, rng):
+    """
+    Resamples one wind year over the hours of the load: every day of the load takes a random complete day of the
+    same calendar month from any year of the series, so a single PVGIS year still yields distinct years.
+
+    Args:
+        pools (dict): Day pools returned by day_pools.
+        rng (Generator): Random number generator of the draw.
+
+    Returns:
+        ndarray: Row of the wind series for every hour of the load.
+    """
+
+    month = pools['day_month']
+    choice = pools['offsets'][month] + rng.integers(0, pools['counts'][month])
+    return pools['starts'][choice][pools['day']] + pools['hour']
+
+
+def prepare_inputs(load_file, wind_file, chp, wind, cache_dir=None, freq='h'):
+    """
+    Runs the deterministic stages once and collects the inputs of the draws.
+
+    The physical balances do not depend on the prices: the CHP quantities of process_energy_data are computed
+    once and repriced in every draw (see chp_economics.price_chp), and the wind production of the whole series is computed once and resampled.
+
+    Args:
+        load_file (str): Customer load file (see pipeline.prepare_load).
+        wind_file (str): PVGIS wind file (see pipeline.read_wind).
+        chp (dict): CHP parameters 'Pe', 'Pt', 'NumH', 'eta_e'.
+        wind (dict): Wind turbine or wind farm parameters (see pipeline.run_pipeline).
+        cache_dir (str): If given, the parsed load and wind series are cached there (see series_cache).
+        freq (str): Resolution of the rows of a load file without timestamps (see pipeline.prepare_load).
+
+    Returns:
+        dict: Inputs of simulate_draws.
+    """
+
+    load = prepare_load(load_file, cache_dir=cache_dir, freq=freq)
+    chp_result = run_chp(load, chp['Pe'], chp['Pt'], chp['NumH'], chp['eta_e'])
+    stage = read_wind_production(wind_file, wind, cache_dir=cache_dir)
+    wind_result = run_wind(stage['wind'], chp_result['net_load'], wind['AG'], stage['Pe'], wind.get('speed_power'),
+                           stage['K'], production=stage['production'])
+
+    net_load = chp_result['net_load']
+    bands = net_load['Fascia Oraria'].to_numpy()
+    return {
+        'quantities': chp_quantities(chp_result['balance'], chp['eta_e']),
+        'net_load': net_load['Potenza Elettrica'].to_numpy(dtype=float),
+        'buy': band_prices(bands, BUY_PRICES),
+        'sell': band_prices(bands, SELL_PRICES),
+        'wind_power': np.asarray(stage['production']['power'], dtype=float),
+        'pools': day_pools(stage['wind'].index, net_load.index),
+        # Yearly hours of a step of the load, also for quarter-hour or multi-year loads
+        'hours': step_hours(net_load.index) / series_years(net_load.index),
+        'AG': wind['AG'],
+        'wind_maintenance': wind_result['Annual_Maintenance'],
+        # Investments as in the CHP + Wind stage: CHP scale law plus 1000 €/kW of wind power
+        'I_CHP': chp_investment(chp['Pe']),
+        'I_CHP_Wind': 1000.0 * stage['Pe'] + chp_investment(chp['Pe']),
+    }
+
+
+def _indicators(investment, savings, rate):
+    # Investment indicators of the cash flows of every draw: the investment in year 0, then the yearly savings
+    flows = np.concatenate([np.full(savings.shape[:-1] + (1,), -float(investment)), savings], axis=-1)
+    return {
+        'NPV': npv(flows, rate),
+        'SPB': discounted_payback(flows, 0.0),
+        'DPB': discounted_payback(flows, rate),
+        'IRR': irr(flows),
+    }
+
+
+def _simulate_chunk(inputs, seeds, uncertainty, years, rate):
+    # Draws of one chunk: every draw has its own random stream, so the results do not depend on the chunking
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    paths = [sample_price_paths(rng, years, uncertainty) for rng in rngs]
+    gas = np.stack([path['gas'] for path in paths])
+    electricity = np.stack([path['electricity'] for path in paths])
+    rows = np.stack([resample_wind_rows(inputs['pools'], rng) for rng in rngs], axis=1)
+
+    # Wind settlement of the resampled years, (steps, draws), at the reference prices. The revenue is linear in
+    # the prices, so the revenue of every year is the electricity multiplier times this revenue.
+    settlement = settle(inputs['wind_power'][rows], inputs['net_load'][:, None], inputs['buy'][:, None],
+                        inputs['sell'][:, None], hours_per_step=inputs['hours'])
+    wind_revenue = settlement['revenue']
+
+    # CHP quantities repriced for every draw and year, (draws, years)
+    prices = {
+        'gas': CHP_PRICES['gas'] * gas,
+        'buy': {fascia: price * electricity for fascia, price in CHP_PRICES['buy'].items()},
+        'sell': {fascia: price * electricity for fascia, price in CHP_PRICES['sell'].items()},
+        'cu_in': CHP_PRICES['cu_in'] * electricity,
+        'cu_sel': CHP_PRICES['cu_sel'] * electricity,
+        'cu_ref': CHP_PRICES['cu_ref'] * electricity,
+    }
+    economics = price_chp(inputs['quantities'], prices)
+    savings = {
+        'CHP': economics['operating_cost_RS'] - economics['operating_cost_CHP'],
+        'CHP+Wind': chp_wind_operating_costs(economics, inputs['AG'] + electricity * wind_revenue[:, None],
+                                             inputs['wind_maintenance'])['annual_savings'],
+    }
+
+    results = {
+        'gas': gas.mean(axis=1),
+        'electricity': electricity.mean(axis=1),
+        'wind_revenue': wind_revenue,
+        'wind_energy_sold': settlement['energy_sold_to_grid'],
+    }
+    for system, suffix in SYSTEMS.items():
+        indicators = _indicators(inputs[f'I_{suffix}'], savings[system], rate)
+        results.update({f'{key}_{suffix}': value for key, value in indicators.items()})
+    return pd.DataFrame(results)
+
+
+def simulate_draws(inputs, draws=10000, seed=0, uncertainty=None, years=YEARS, rate=DISCOUNT_RATE, chunk_size=256,
+                   max_workers=1):
+    """
+    Simulates the economics of the CHP and of CHP + Wind under sampled price paths and resampled wind years.
+
+    Every draw samples the yearly gas and electricity multipliers (sample_price_paths) and a wind year
+    (resample_wind_rows), settles the resampled wind production against the net load and reprices the CHP
+    balance for every year of the useful life. The draws are processed chunk_size at a time, so the hourly
+    matrices never exceed (hours, chunk_size), and the chunks can run on a process pool. Every draw has its own
+    random stream spawned from the seed, so the results are reproducible and independent of chunk_size and
+    max_workers.
+
+    Args:
+        inputs (dict): Inputs returned by prepare_inputs.
+        draws (int): Number of draws.
+        seed (int): Seed of the random streams.
+        uncertainty (dict): Values overriding UNCERTAINTY.
+        years (int): Useful life (years).
+        rate (float): Discount rate.
+        chunk_size (int): Number of draws simulated together.
+        max_workers (int): Number of worker processes (1 runs the chunks in this process, None uses every CPU).
+
+    Returns:
+        DataFrame: One row per draw with the mean price multipliers ('gas', 'electricity'), the wind revenue (€)
+            and energy sold (kWh) of the resampled year at the reference prices and the INDICATORS of every
+            system ('NPV_CHP', 'SPB_CHP', ..., 'IRR_CHP_Wind'). SPB and DPB are the simple and discounted paybacks
+            of the sampled cash flows (years), NaN if the investment is not repaid in its life.
+    """
+
+    seeds = np.random.SeedSequence(seed).spawn(draws)
+    chunks = [seeds[start:start + chunk_size] for start in range(0, draws, chunk_size)]
+
+    if max_workers == 1:
+        frames = [_simulate_chunk(inputs, chunk, uncertainty, years, rate) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(_simulate_chunk, repeat(inputs), chunks, repeat(uncertainty), repeat(years),
+                                       repeat(rate)))
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize_draws(draws, percentiles=PERCENTILES):
+    """
+    Computes the percentiles of the investment indicators of the draws.
+
+    Paybacks not reached within the useful life count as infinite, so they rank above every finite payback.
+
+    Args:
+        draws (DataFrame): Draws returned by simulate_draws.
+        percentiles (tuple): Percentiles to compute.
+
+    Returns:
+        DataFrame: One row per indicator and system ('NPV_CHP', ...) and one column per percentile ('P10', ...).
+    """
+
+    columns = [f'{key}_{suffix}' for suffix in SYSTEMS.values() for key in INDICATORS]
+    summary = {}
+    for column in columns:
+        values = draws[column].to_numpy(dtype=float)
+        if column.startswith(('SPB', 'DPB')):
+            values = np.where(np.isnan(values), np.inf, values)
+        summary[column] = np.nanpercentile(values, percentiles, method='inverted_cdf')
+    return pd.DataFrame(summary, index=[f'P{p}' for p in percentiles]).T
+
+
+def run_monte_carlo(load_file, wind_file, chp, wind, draws=10000, seed=0, cache_dir=None, freq='h', **options):
+    """
+    Runs the Monte Carlo analysis of a site.
+
+    Args:
+        load_file, wind_file, chp, wind, cache_dir, freq: Site and plants (see prepare_inputs).
+        draws (int): Number of draws.
+        seed (int): Seed of the random streams.
+        **options: Options of simulate_draws (uncertainty, years, rate, chunk_size, max_workers).
+
+    Returns:
+        dict: 'draws' (simulate_draws) and 'summary' (summarize_draws).
+    """
+
+    inputs = prepare_inputs(load_file, wind_file, chp, wind, cache_dir=cache_dir, freq=freq)
+    results = simulate_draws(inputs, draws, seed, **options)
+    return {'draws': results, 'summary': summarize_draws(results)}
+
+
+if __name__ == '__main__':
+
+    from pipeline import DEFAULT_CHP, DEFAULT_WIND
+
+    parser = argparse.ArgumentParser(description="Monte Carlo analysis of the CHP and CHP + Wind investments.")
+    parser.add_argument('--load', default='load.csv', help="Customer load file (semicolon separated, 8760 rows)")
+    parser.add_argument('--freq', default='h', help="Resolution of a load file without timestamps, e.g. 15min")
+    parser.add_argument('--wind', default='wind_speed.csv', help="PVGIS wind file")
+    parser.add_argument('--draws', type=int, default=10000, help="Number of draws")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random streams")
+    parser.add_argument('--chunk-size', type=int, default=256, help="Draws simulated together")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes (0: number of CPUs)")
+    parser.add_argument('-o', '--output', default='monte_carlo_draws.csv', help="Draws file")
+    args = parser.parse_args()
+
+    results = run_monte_carlo(args.load, args.wind, DEFAULT_CHP, DEFAULT_WIND, draws=args.draws, seed=args.seed,
+                              freq=args.freq, chunk_size=args.chunk_size, max_workers=args.workers or None)
+    results['draws'].to_csv(args.output, index=False)
+    print(results['summary'].to_string())
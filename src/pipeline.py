@@ -0,0 +1,472 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from chp_dispatch import TIME_BANDS, dispatch_chp
+from chp_economics import chp_investment, chp_wind_operating_costs, evaluate_chp
+from hour_index import align_hours, align_steps, calendar_hour_index, series_years, step_hours
+from investment import DISCOUNT_RATE, YEARS, annuity_factor, evaluate_investment
+from pvgis_reader import read_pvgis
+from series_cache import cached_frame, source_hash
+from settlement import BUY_PRICES, SELL_PRICES, align_prices, band_prices, settle
+from time_bands import classify_time_bands
+from wind_engine import HOURS_PER_YEAR, TURBINES, hub_wind_speed, wind_production
+from wind_farm import farm_production
+
+# Operating costs saved by the CHP and wind stages for 5_CHP_Wind.py
+CHP_COST_COLUMNS = ['operating_cost_CHP', 'operating_cost_RS']
+WIND_COST_COLUMNS = ['Pe', 'Revenue', 'Annual_Maintenance']
+
+# Default CHP parameters (3_CHP_Fixed.py)
+DEFAULT_CHP = {'Pe': 800, 'Pt': 900, 'NumH': 5000, 'eta_e': 0.39, 'eta_t': 0.473}
+
+# Default wind turbine parameters (4_WIND.py, Vestas V117/4000-4200)
+DEFAULT_WIND = {'Z': 90, 'alpha': 0.34, 'AG': 0, **TURBINES['V117/4000'], 'K': 0.85}
+
+
+def prepare_load(file_path='load.csv', holidays=False, cache_dir=None, freq='h'):
+    """
+    Reads and preprocesses a customer load file of any time resolution.
+
+    Without a 'Tempo' column the rows are consecutive steps of freq from 2024-01-01, and the file must hold whole
+    years of 365 days (8760 hourly or 35040 quarter-hour rows per year). The powers are stored as float32,
+    which is exact for the rounded kW, and the time band as a categorical (one byte per step), so multi-year
+    quarter-hour portfolios fit in memory.
+
+    Args:
+        file_path (str): Semicolon separated CSV with 'Potenza Elettrica' and 'Potenza Termica' columns and,
+            optionally, the 'Tempo' timestamps of the rows.
+        holidays (bool): Bill the Italian national holidays in the F3 band (see time_bands.classify_time_bands).
+        cache_dir (str): If given, the preprocessed load is cached there and memory-mapped on later runs
+            (see series_cache.cached_frame).
+        freq (str): Resolution of the rows of a file without timestamps, e.g. 'h' or '15min'.
+
+    Returns:
+        DataFrame: Load indexed by 'Tempo' with float32 'Potenza Elettrica' and 'Potenza Termica' (kW, rounded)
+            and the 'Fascia Oraria' time band. The duration of a step is hour_index.step_hours(load.index).
+    """
+
+    if cache_dir is not None:
+        return cached_frame('load', file_path, {'holidays': bool(holidays), 'freq': freq},
+                            lambda: prepare_load(file_path, holidays, freq=freq), cache_dir)
+
+    data = pd.read_csv(file_path, sep=";")
+
+    if 'Tempo' in data:
+        data['Tempo'] = pd.to_datetime(data['Tempo'])
+    else:
+        # Check the file size: whole years of steps
+        steps_per_year = int(round(HOURS_PER_YEAR * pd.Timedelta(hours=1) / pd.Timedelta(to_offset(freq))))
+        if len(data) == 0 or len(data) % steps_per_year:
+            raise ValueError(f"The CSV file must contain a multiple of {steps_per_year} rows to represent whole "
+                             f"years of consumption with steps of {freq}.")
+
+        # Add the 'Tempo' column with a datetime index
+        data['Tempo'] = pd.date_range(start='2024-01-01', periods=len(data), freq=freq)
+    data.set_index('Tempo', inplace=True)
+
+    # Convert columns to numeric, replacing non-numeric values with NaN
+    data['Potenza Termica'] = pd.to_numeric(data['Potenza Termica'], errors='coerce')
+    data['Potenza Elettrica'] = pd.to_numeric(data['Potenza Elettrica'], errors='coerce')
+
+    # Replace NaN values with 0
+    data.fillna(0, inplace=True)
+
+    # Round values to the nearest whole number
+    data['Potenza Termica'] = data['Potenza Termica'].round().astype(np.float32)
+    data['Potenza Elettrica'] = data['Potenza Elettrica'].round().astype(np.float32)
+
+    # Add the 'Fascia Oraria' column based on time ranges
+    data['Fascia Oraria'] = pd.Categorical(classify_time_bands(data.index, holidays=holidays))
+
+    return data
+
+
+def run_chp(load, Pe, Pt, NumH, eta_e):
+    """
+    CHP stage: balances and economics of a CHP running at constant Pe/Pt for NumH hours, at the resolution of
+    the load.
+
+    Args:
+        load (DataFrame): Load returned by prepare_load.
+        Pe (float): Electric power of the CHP (kW).
+        Pt (float): Thermal power of the CHP (kW).
+        NumH (int): Number of operating hours of the CHP.
+        eta_e (float): Electric efficiency of the CHP.
+
+    Returns:
+        dict: 'Pe' (kW), 'balance' (dispatch_chp), 'economics' (evaluate_chp), 'net_load' (the load with the CHP
+            electric power subtracted) and 'energy_sold' (energy sold to the grid per time band, MWh).
+    """
+
+    # A load of several years is priced on its yearly averages
+    balance = dispatch_chp(load, Pe, Pt, NumH, step_hours(load.index), series_years(load.index))
+    economics = evaluate_chp(balance, eta_e)
+
+    net_load = load.copy()
+    net_load['Potenza Elettrica'] = net_load['Potenza Elettrica'].astype(float) - Pe
+
+    sold = balance['bands']['energy_sold_to_grid'] / 1E3
+    energy_sold = pd.DataFrame({
+        "Fonte": TIME_BANDS + ["Totale"],
+        "Energia Venduta (MWh)": list(sold) + [sold.sum()]
+    })
+
+    return {'Pe': Pe, 'balance': balance, 'economics': economics, 'net_load': net_load, 'energy_sold': energy_sold}
+
+
+def read_wind(file_path, Z, alpha, cache_dir=None):
+    """
+    Reads a PVGIS hourly file and scales the 10 m wind speed to the hub height.
+
+    Args:
+        file_path (str): PVGIS CSV export, the first location is read (see pvgis_reader.iter_pvgis).
+        Z (float): Hub height of the turbine (m).
+        alpha (float): Wind shear (location) factor.
+        cache_dir (str): If given, the hub height wind speed is cached there and memory-mapped on later runs
+            (see series_cache.cached_frame).
+
+    Returns:
+        DataFrame: Hub height wind speed 'WS' (m/s) indexed by 'time(UTC)'.
+    """
+
+    if cache_dir is not None:
+        return cached_frame('wind', file_path, {'Z': float(Z), 'alpha': float(alpha)},
+                            lambda: read_wind(file_path, Z, alpha), cache_dir)
+
+    location = read_pvgis(file_path, columns=['WS10m'])
+
+    wind = pd.DataFrame(
+        {'WS': hub_wind_speed(location['WS10m'], Z, alpha)},
+        index=pd.DatetimeIndex(location['time'], name='time(UTC)')
+    )
+    return wind
+
+
+def run_wind(wind, net_load, AG, Pe, speed_power, K, buy_prices=None, sell_prices=None, production=None):
+    """
+    Wind stage: production, revenue and costs of a wind turbine covering the load left by the CHP.
+
+    Args:
+        wind (DataFrame): Wind speed returned by read_wind.
+        net_load (DataFrame): Net load returned by run_chp.
+        AG (float): Government aid (€).
+        Pe (float): Rated power of the turbine (kW).
+        speed_power (list): Power curve as [[wind speed (m/s), power (kW)], ...].
+        K (float): Availability factor.
+        buy_prices (Series): Hourly purchase prices (€/kWh) indexed like net_load (default: F1/F2/F3 prices).
+        sell_prices (Series): Hourly sale prices (€/kWh) indexed like net_load (default: F1/F2/F3 prices).
+        production (dict): Production of the wind series computed elsewhere, e.g. by wind_farm.farm_production,
+            used instead of the power curve speed_power.
+
+    Returns:
+        dict: 'hourly' (wind speed, wind power, net load and time band per step of the load), 'load_rows'
+            (position in net_load of every 'hourly' row), 'row_hours' (yearly hours of every 'hourly' row),
+            'wind_speed_pct' (wind speed histogram), energies (kWh) and economic indicators.
+    """
+
+    if wind.empty:
+        raise ValueError("The dataset does not contain usable data.")
+
+    # Hourly power, annual energy and wind speed distribution in one pass
+    if production is None:
+        production = wind_production(wind['WS'].to_numpy(), speed_power)
+    wind_speed_pct = production['histogram']
+    total_power = production['annual_energy']
+
+    # Align the wind with the net load on the calendar hour (day, month and hour of any year). A finer load
+    # (e.g. quarter-hour) or a load of several years takes the wind of its calendar hour at every step;
+    # otherwise every wind hour, of one or more years, takes the load of its calendar hour
+    hours_per_step = step_hours(net_load.index)
+    load_hours = calendar_hour_index(net_load.index)
+    if hours_per_step < 1 or hours_per_step < step_hours(wind.index) or len(np.unique(load_hours)) < len(load_hours):
+        load_rows, wind_rows = align_steps(wind.index, net_load.index)
+        times = net_load.index[load_rows]
+    else:
+        wind_rows, load_rows = align_hours(load_hours, calendar_hour_index(wind.index))
+        times = wind.index[wind_rows]
+    bands = net_load['Fascia Oraria'].to_numpy()[load_rows]
+    hourly = pd.DataFrame({
+        'time(UTC)': times,
+        'WS': wind['WS'].to_numpy()[wind_rows],
+        'Wind Power': production['power'][wind_rows],
+        'Electric Power': net_load['Potenza Elettrica'].to_numpy()[load_rows],
+        'Time Band': bands,
+    })
+    buy = band_prices(bands, BUY_PRICES) if buy_prices is None else align_prices(buy_prices, net_load.index)[load_rows]
+    sell = band_prices(bands, SELL_PRICES) if sell_prices is None else align_prices(sell_prices, net_load.index)[load_rows]
+
+    # Yearly hours of every row: a load of several years is averaged over its years, and a load hour matched by
+    # the wind of several years over those years
+    matches = np.bincount(load_rows, minlength=len(net_load))[load_rows]
+    row_hours = hours_per_step / series_years(net_load.index) / matches
+
+    # Revenue: self-consumed wind at the purchase price, surplus sold at the sale price, per year
+    settlement = settle(hourly['Wind Power'], hourly['Electric Power'], buy, sell, AG, row_hours)
+    energy_sold_to_grid = settlement['energy_sold_to_grid']
+    Revenue = settlement['revenue']
+
+    Ee = total_power * K
+    H_eq = Ee / Pe
+
+    I_Pe = 1500  # Installation Cost per Power
+    I = I_Pe * Pe  # Total Installation Cost
+    m = 0.03  # Annual Maintenance Cost
+    AF = annuity_factor(DISCOUNT_RATE, YEARS)  # Annuity factor over the useful life (5 %, 20 years)
+
+    Cue = (I * (1 + m) / Pe) / (AF * H_eq)
+    Annual_Maintenance = I * m
+    Pay_Back = evaluate_investment(I, Revenue - Annual_Maintenance)['SPB']
+
+    return {
+        'hourly': hourly,
+        'wind_speed_pct': wind_speed_pct,
+        'total_power': total_power,
+        'energy_sold_to_grid': energy_sold_to_grid,
+        'H_eq': H_eq,
+        'Cue': Cue,
+        'Revenue': Revenue,
+        'Pe': Pe,
+        'I': I,
+        'Annual_Maintenance': Annual_Maintenance,
+        'Pay_Back': Pay_Back,
+        'load_rows': load_rows,
+        'row_hours': row_hours,
+    }
+
+
+def read_wind_production(wind_file, wind, cache_dir=None):
+    """
+    Reads the wind series of the Wind stage and computes the production of the turbine or of the wind farm.
+
+    Args:
+        wind_file (str): PVGIS wind file (see read_wind).
+        wind (dict): Wind turbine parameters (see run_pipeline).
+        cache_dir (str): If given, the parsed wind series is cached there (see series_cache).
+
+    Returns:
+        dict: 'wind' (wind speed read by read_wind), 'production' (see wind_engine.wind_production), 'Pe' (rated
+            power, kW) and 'K' (availability factor) of the turbine or of the farm.
+    """
+
+    if 'turbines' in wind:
+        # Wind farm: the 10 m wind speed is scaled to the hub height of every turbine group
+        wind_speed = read_wind(wind_file, 10, wind['alpha'], cache_dir=cache_dir)
+        production = farm_production(wind_speed['WS'].to_numpy(), wind['turbines'], wind['alpha'])
+        return {'wind': wind_speed, 'production': production, 'Pe': production['Pe'], 'K': 1.0}
+
+    wind_speed = read_wind(wind_file, wind['Z'], wind['alpha'], cache_dir=cache_dir)
+    production = wind_production(wind_speed['WS'].to_numpy(), wind['speed_power'])
+    return {'wind': wind_speed, 'production': production, 'Pe': wind['Pe'], 'K': wind['K']}
+
+
+def run_chp_wind(load, chp_result, wind_result, Pe):
+    """
+    CHP + Wind stage: combined energy balance, primary energy saving, CO2 reduction and investment indicators.
+
+    Args:
+        load (DataFrame): Load returned by prepare_load.
+        chp_result (dict): Result of run_chp.
+        wind_result (dict): Result of run_wind.
+        Pe (float): Electric power of the CHP (kW).
+
+    Returns:
+        dict: 'combined' (hourly balance), 'energy_sold' (energy sold to the grid, MWh), the operating costs of
+            chp_economics.chp_wind_operating_costs and the indicators.
+    """
+
+    # Rows of the wind stage in the order of the load, with the yearly hours of every row
+    hourly = wind_result['hourly']
+    wind_rows = np.argsort(wind_result['load_rows'], kind='stable')
+    load_rows = wind_result['load_rows'][wind_rows]
+    hours = wind_result['row_hours'][wind_rows]
+    combined = pd.DataFrame({
+        'Time': load.index[load_rows],
+        'Electric Power': load['Potenza Elettrica'].to_numpy(dtype=float)[load_rows],
+        'Potenza Termica': load['Potenza Termica'].to_numpy(dtype=float)[load_rows],
+        'Time Band': load['Fascia Oraria'].to_numpy()[load_rows],
+        'Wind Power': hourly['Wind Power'].to_numpy()[wind_rows],
+    })
+
+    # Calculate total CHP + Wind production, surplus and deficit
+    combined["Total Power"] = Pe + combined["Wind Power"]
+    balance = combined["Total Power"] - combined["Electric Power"]
+    combined["Surplus"] = balance.clip(lower=0)
+    combined["Grid Import"] = (-balance).clip(lower=0)
+
+    # Primary energy saving
+    eta_t_ref = 0.9   # Boiler efficiency
+    eta_e_ref = 0.46  # Power grid efficiency
+    eta_e_chp = 0.390
+    eta_t_chp = 0.473
+
+    # Yearly energies, also for a load or a wind series of several years
+    E_term_ref = (combined["Potenza Termica"] * hours).sum()
+    E_elec_ref = (combined["Electric Power"] * hours).sum()
+    E_elec_prop = (combined["Total Power"] * hours).sum()
+    E_term_prop = E_term_ref
+
+    primary_energy_consumption_ref = (E_term_ref / eta_t_ref) + (E_elec_ref / eta_e_ref)
+    primary_energy_consumption = (E_term_prop / eta_t_chp) + (E_elec_prop / eta_e_chp)
+    PES = (primary_energy_consumption_ref - primary_energy_consumption) / primary_energy_consumption_ref * 100
+
+    # CO2 reduction
+    CO2_factor_grid = 0.48   # kg CO2/kWh (rete)
+    CO2_factor_gas = 0.2     # kg CO2/kWh (CHP)
+    co2_emission_ref = (E_term_ref / eta_t_ref) * CO2_factor_gas + (E_elec_ref / eta_e_ref) * CO2_factor_grid
+    co2_emission = (E_term_prop / eta_t_chp) * CO2_factor_gas + (E_elec_prop / eta_e_chp) * CO2_factor_grid
+    CO2_saving = co2_emission_ref - co2_emission
+
+    # Investment: turbine + CHP
+    I = (1000.0 * wind_result['Pe']) + chp_investment(Pe)
+
+    # Operating costs of the CHP stage and of the wind stage
+    operating_costs = chp_wind_operating_costs(chp_result['economics'], wind_result['Revenue'],
+                                               wind_result['Annual_Maintenance'])
+    annual_savings = operating_costs['annual_savings']
+
+    # 5 % discount rate over a useful life of 20 years
+    indicators = evaluate_investment(I, annual_savings)
+    SPB = indicators['SPB']
+    NPV = indicators['NPV']
+    PI = indicators['PI']
+    IRR = indicators['IRR']
+
+    # Energy sold to the grid by the CHP and by the wind turbine
+    energy_sold = pd.concat([
+        chp_result['energy_sold'],
+        pd.DataFrame({"Fonte": ["Eolico"], "Energia Venduta (MWh)": [wind_result['energy_sold_to_grid'] / 1000]})
+    ], ignore_index=True)
+    total_energy_sold = energy_sold["Energia Venduta (MWh)"].sum()
+    energy_sold = pd.concat([energy_sold, pd.DataFrame([{"Fonte": "Totale", "Energia Venduta (MWh)": total_energy_sold}])], ignore_index=True)
+
+    return {
+        'combined': combined,
+        'energy_sold': energy_sold,
+        'PES': PES,
+        'CO2_saving': CO2_saving,
+        'I': I,
+        **operating_costs,
+        'SPB': SPB,
+        'NPV': NPV,
+        'PI': PI,
+        'IRR': IRR,
+        'total_energy_sold': total_energy_sold,
+    }
+
+
+def save_results(results, output_dir):
+    """
+    Writes the stage results to output_dir with the file names used by the scripts in src/.
+    """
+
+    os.makedirs(output_dir, exist_ok=True)
+    results['load'].to_csv(os.path.join(output_dir, 'load_preproc.csv'))
+    results['chp']['net_load'].to_csv(os.path.join(output_dir, 'load_preproc_net_cog.csv'))
+    results['chp']['energy_sold'].to_csv(os.path.join(output_dir, 'CHP_energy_sold.csv'), index=False)
+    results['wind']['wind_speed_pct'].to_csv(os.path.join(output_dir, 'wind_speed_pct.csv'), index=False)
+    results['wind']['hourly'].to_csv(os.path.join(output_dir, 'wind_speed_h.csv'), index=False)
+    pd.DataFrame({
+        "Fonte": ["Eolico"],
+        "Energia Venduta (kWh)": [results['wind']['energy_sold_to_grid']]
+    }).to_csv(os.path.join(output_dir, 'Wind_energy_sold.csv'), index=False)
+    results['chp_wind']['combined'].to_csv(os.path.join(output_dir, 'combined_energy_balance.csv'), index=False)
+    results['chp_wind']['energy_sold'].to_csv(os.path.join(output_dir, 'Total_energy_sold_MWh.csv'), index=False)
+    pd.DataFrame([{'Pe': results['chp']['Pe'], **{key: results['chp']['economics'][key] for key in CHP_COST_COLUMNS}}]).to_csv(
+        os.path.join(output_dir, 'CHP_operating_costs.csv'), index=False)
+    pd.DataFrame([{key: results['wind'][key] for key in WIND_COST_COLUMNS}]).to_csv(
+        os.path.join(output_dir, 'Wind_operating_costs.csv'), index=False)
+
+
+def stage_key(stage, *inputs):
+    """
+    Builds the memoization key of a pipeline stage from its inputs (JSON serializable parameters or the keys of
+    the upstream stages).
+    """
+
+    return stage + ':' + json.dumps(inputs, sort_keys=True, default=str)
+
+
+def _memoized(memo, key, compute):
+    # Result of a stage, computed only if memo has no result for its key
+    if memo is None:
+        return compute()
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def run_pipeline(load_file, wind_file, chp, wind, output_dir=None, cache_dir=None, memo=None, freq='h'):
+    """
+    Runs the CHP -> Wind -> CHP+Wind pipeline in memory: every stage feeds its DataFrames to the next one.
+
+    With memo, the result of every stage is stored keyed by its inputs: the content of the input files and the
+    parameters the stage depends on, including those of its upstream stages. A run that changes only downstream
+    parameters (e.g. the wind turbine, or NumH for the wind stage, which only depends on Pe) reuses the
+    upstream results instead of recomputing them. The stored results are shared between runs and must not be
+    modified.
+
+    Args:
+        load_file (str): Customer load file (see prepare_load).
+        wind_file (str): PVGIS wind file (see read_wind).
+        chp (dict): CHP parameters 'Pe', 'Pt', 'NumH', 'eta_e'.
+        wind (dict): Wind turbine parameters 'Z', 'alpha', 'AG', 'Pe', 'speed_power', 'K', or 'alpha', 'AG' and
+            the 'turbines' groups of a wind farm (see wind_farm.farm_turbines).
+        output_dir (str): If given, the stage results are also written there as CSV files.
+        cache_dir (str): If given, the parsed load and wind series are cached there (see series_cache).
+        memo (dict): If given, the stage results are stored there and reused by later runs with the same inputs.
+        freq (str): Resolution of the rows of a load file without timestamps (see prepare_load).
+
+    Returns:
+        dict: 'load', 'chp', 'wind' and 'chp_wind' stage results.
+    """
+
+    chp_parameters = {key: chp[key] for key in ('Pe', 'Pt', 'NumH', 'eta_e')}
+    load_key = stage_key('load', source_hash(load_file) if memo is not None else load_file, freq)
+    chp_key = stage_key('chp', load_key, chp_parameters)
+    production_key = stage_key('wind_production', source_hash(wind_file) if memo is not None else wind_file,
+                               {key: value for key, value in wind.items() if key != 'AG'})
+    wind_key = stage_key('wind', load_key, chp['Pe'], production_key, wind.get('AG'))
+
+    load = _memoized(memo, load_key, lambda: prepare_load(load_file, cache_dir=cache_dir, freq=freq))
+    chp_result = _memoized(memo, chp_key, lambda: run_chp(load, chp['Pe'], chp['Pt'], chp['NumH'], chp['eta_e']))
+    stage = _memoized(memo, production_key, lambda: read_wind_production(wind_file, wind, cache_dir=cache_dir))
+    wind_result = _memoized(memo, wind_key, lambda: run_wind(stage['wind'], chp_result['net_load'], wind['AG'],
+                                                             stage['Pe'], wind.get('speed_power'), stage['K'],
+                                                             production=stage['production']))
+    chp_wind_result = _memoized(memo, stage_key('chp_wind', chp_key, wind_key),
+                                lambda: run_chp_wind(load, chp_result, wind_result, chp['Pe']))
+
+    results = {'load': load, 'chp': chp_result, 'wind': wind_result, 'chp_wind': chp_wind_result}
+    if output_dir is not None:
+        save_results(results, output_dir)
+    return results
+
+
+def summarize_pipeline(results):
+    """
+    Collects the key indicators of the stage results of run_pipeline in one flat dict.
+    """
+
+    chp_results = results['chp']['economics']
+    wind_results = results['wind']
+    chp_wind_results = results['chp_wind']
+
+    return {
+        'PES_CHP': chp_results['PES'],
+        'operating_cost_CHP': chp_results['operating_cost_CHP'],
+        'operating_cost_RS': chp_results['operating_cost_RS'],
+        'total_net_costs': chp_results['total_net_costs'],
+        'wind_energy': wind_results['total_power'],
+        'wind_revenue': wind_results['Revenue'],
+        'wind_pay_back': wind_results['Pay_Back'],
+        'PES': chp_wind_results['PES'],
+        'CO2_saving': chp_wind_results['CO2_saving'],
+        'NPV': chp_wind_results['NPV'],
+        'IRR': chp_wind_results['IRR'],
+        'SPB': chp_wind_results['SPB'],
+        'total_energy_sold': chp_wind_results['total_energy_sold'],
+    }
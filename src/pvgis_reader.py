@@ -0,0 +1,145 @@
+import io
+import re
+
+import numpy as np
+import pandas as pd
+
+# Timestamps of the PVGIS hourly exports, e.g. 20060101:0000
+TIME_FORMAT = '%Y%m%d:%H%M'
+
+_DATA_ROW = re.compile(r'\d{8}:\d{4},')
+
+
+def _metadata(line):
+    # 'Latitude (decimal degrees): 41.273' -> ('latitude', 41.273); None for lines without a numeric value
+    key, separator, value = line.partition(':')
+    if not separator:
+        return None
+    try:
+        value = float(value)
+    except ValueError:
+        return None
+    return key.split('(')[0].strip().lower().replace(' ', '_'), value
+
+
+def _parse_chunk(lines, names, columns, dtype):
+    # Parses a block of data rows, keeping only the time and the requested columns
+    chunk = pd.read_csv(io.StringIO(''.join(lines)), header=None, names=names, usecols=[names[0], *columns],
+                        dtype={column: dtype for column in columns}, engine='c')
+    time = pd.to_datetime(chunk[names[0]], format=TIME_FORMAT).to_numpy()
+    return [time] + [chunk[column].to_numpy() for column in columns]
+
+
+def iter_pvgis_chunks(file_path, columns=('WS10m',), dtype=np.float64, chunk_rows=8760):
+    """
+    Streams the data rows of a PVGIS hourly export (TMY or multi-year time series) in chunks of at most
+    chunk_rows rows, so memory stays flat whatever the length of the series, e.g. to accumulate statistics
+    over decades of data.
+
+    The blocks of the file are recognized by their content instead of fixed offsets: the location metadata
+    (latitude, longitude, elevation, ...) and the month/year table before the column header, the data rows
+    (timestamps like 20060101:0000) and the variable legend after them. Files holding several exports one after
+    the other yield the chunks of every location in turn. Only the requested columns are parsed.
+
+    Args:
+        file_path (str): PVGIS CSV export.
+        columns (tuple): Columns to read besides the time, e.g. ('WS10m',) or ('WS10m', 'T2m').
+        dtype (type): Type of the values of the columns.
+        chunk_rows (int): Maximum number of data rows of a chunk.
+
+    Yields:
+        dict: 'location' (number of the location in the file, from 0), 'metadata' (dict of the numeric header
+            values of the location, e.g. 'latitude', 'longitude', 'elevation'), 'time' (datetime64 array, UTC)
+            and one array per requested column. A location without data rows yields one empty chunk.
+    """
+
+    columns = list(columns)
+    metadata = {}
+    names = None
+    lines = []
+    location = 0
+    parsed = False
+
+    def chunk():
+        if lines:
+            arrays = _parse_chunk(lines, names, columns, dtype)
+        else:
+            arrays = [np.empty(0, 'datetime64[ns]')] + [np.empty(0, dtype) for _ in columns]
+        return {'location': location, 'metadata': metadata, 'time': arrays[0], **dict(zip(columns, arrays[1:]))}
+
+    with open(file_path) as file:
+        for line in file:
+            if names is not None:
+                if _DATA_ROW.match(line):
+                    lines.append(line)
+                    if len(lines) >= chunk_rows:
+                        yield chunk()
+                        lines, parsed = [], True
+                    continue
+
+                # First line after the data rows: the legend of the location starts
+                if lines or not parsed:
+                    yield chunk()
+                metadata, names, lines, parsed = {}, None, [], False
+                location += 1
+
+            if line.startswith('time') and ',' in line:
+                names = [name.strip() for name in line.split(',')]
+                missing = [column for column in columns if column not in names]
+                if missing:
+                    raise ValueError(f"Columns {missing} not found in '{file_path}', available: {names[1:]}.")
+                continue
+
+            item = _metadata(line)
+            if item is not None:
+                metadata[item[0]] = item[1]
+
+    if names is not None and (lines or not parsed):
+        yield chunk()
+
+
+def iter_pvgis(file_path, columns=('WS10m',), dtype=np.float64, chunk_rows=8760):
+    """
+    Reads the locations of a PVGIS hourly export one at a time (see iter_pvgis_chunks).
+
+    The rows are parsed in chunks, but the whole series of a location is joined before it is yielded, so memory
+    grows with the length of the requested series; use iter_pvgis_chunks to keep it flat.
+
+    Args:
+        file_path (str): PVGIS CSV export.
+        columns (tuple): Columns to read besides the time, e.g. ('WS10m',) or ('WS10m', 'T2m').
+        dtype (type): Type of the values of the columns.
+        chunk_rows (int): Number of data rows parsed at once.
+
+    Yields:
+        dict: 'metadata' (dict of the numeric header values, e.g. 'latitude', 'longitude', 'elevation'),
+            'time' (datetime64 array, UTC) and one array per requested column.
+    """
+
+    keys = ['time', *columns]
+    chunks = []
+    for chunk in iter_pvgis_chunks(file_path, columns, dtype, chunk_rows):
+        if chunks and chunk['location'] != chunks[0]['location']:
+            yield _join(chunks, keys)
+            chunks = []
+        chunks.append(chunk)
+    if chunks:
+        yield _join(chunks, keys)
+
+
+def _join(chunks, keys):
+    # One location from its chunks
+    return {'metadata': chunks[0]['metadata'], **{key: np.concatenate([chunk[key] for chunk in chunks]) for key in keys}}
+
+
+def read_pvgis(file_path, columns=('WS10m',), dtype=np.float64):
+    """
+    Reads the first location of a PVGIS hourly export (see iter_pvgis).
+
+    Returns:
+        dict: 'metadata', 'time' and one array per requested column.
+    """
+
+    for location in iter_pvgis(file_path, columns, dtype):
+        return location
+    raise ValueError(f"No PVGIS data rows found in '{file_path}'.")
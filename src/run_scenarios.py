@@ -0,0 +1,200 @@
+import argparse
+import ast
+import json
+import os
+import time
+from functools import lru_cache
+
+import pandas as pd
+
+from chp_cost import kwh_chp_cost_calculator
+from pipeline import DEFAULT_CHP, DEFAULT_WIND, prepare_load, run_chp, run_pipeline, summarize_pipeline
+from series_cache import CACHE_DIR
+from wind_engine import TURBINES
+
+# Default calculation data of the kWh cost calculator (2_CHP_KWhCostCalculator.py)
+DEFAULT_KWH_COST = {'c_NG': 0.60, 'tax': 0.0187, 'LH': 9.59, 'eta_t_re': 0.90, 'eta_e_CHP_re': 0.474, 'M': 0.015}
+
+# Default files of a scenario, resolved against the directory of the scenario file
+DEFAULT_FILES = {'load_file': 'load.csv', 'wind_file': 'wind_speed.csv'}
+
+STAGES = ('kwh_cost', 'chp', 'pipeline')
+
+# Scenario keys of the wind turbine: the turbine rated power is 'wind_Pe', since 'Pe' is the CHP one
+WIND_KEYS = {'Z': 'Z', 'alpha': 'alpha', 'AG': 'AG', 'wind_Pe': 'Pe', 'speed_power': 'speed_power', 'K': 'K'}
+
+
+def load_scenarios(file_path):
+    """
+    Reads the scenarios of a batch run from a YAML, JSON or CSV file.
+
+    YAML and JSON files hold either a list of scenarios or a mapping with optional 'defaults', applied to every
+    scenario, and 'scenarios'. CSV files hold one scenario per row, empty cells take the default value.
+
+    Args:
+        file_path (str): Scenario file (.yaml, .yml, .json or .csv).
+
+    Returns:
+        list: One dict of parameters per scenario, relative file paths resolved against the scenario file.
+    """
+
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Reading YAML scenario files requires PyYAML (pip install pyyaml), or use a JSON/CSV file.")
+        with open(file_path) as file:
+            content = yaml.safe_load(file)
+    elif extension == '.json':
+        with open(file_path) as file:
+            content = json.load(file)
+    elif extension == '.csv':
+        rows = pd.read_csv(file_path).to_dict(orient='records')
+        content = [{key: value for key, value in row.items() if not pd.isna(value)} for row in rows]
+    else:
+        raise ValueError(f"Unsupported scenario file '{file_path}': use .yaml, .yml, .json or .csv.")
+
+    if isinstance(content, dict):
+        defaults = content.get('defaults') or {}
+        content = [{**defaults, **scenario} for scenario in content.get('scenarios') or []]
+
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    scenarios = []
+    for number, scenario in enumerate(content, start=1):
+        scenario = {**DEFAULT_FILES, **scenario}
+        scenario.setdefault('name', f"scenario_{number}")
+        for key in DEFAULT_FILES:
+            scenario[key] = os.path.join(base_dir, os.path.expanduser(str(scenario[key])))
+        scenarios.append(scenario)
+    return scenarios
+
+
+def _chp_parameters(scenario):
+    chp = {key: scenario.get(key, default) for key, default in DEFAULT_CHP.items()}
+    chp['NumH'] = int(chp['NumH'])
+    return chp
+
+
+def _wind_parameters(scenario):
+    wind = dict(DEFAULT_WIND)
+    if 'turbine' in scenario:
+        if scenario['turbine'] not in TURBINES:
+            raise ValueError(f"Unknown turbine '{scenario['turbine']}', available: {', '.join(TURBINES)}.")
+        wind.update(TURBINES[scenario['turbine']])
+    for key, name in WIND_KEYS.items():
+        if key in scenario:
+            wind[name] = scenario[key]
+    if isinstance(wind['speed_power'], str):
+        # Power curves in CSV cells are written as Python lists, e.g. "[[0, 0], [4, 159], [25, 4000]]"
+        wind['speed_power'] = ast.literal_eval(wind['speed_power'])
+    return wind
+
+
+# The input series are shared by all the scenarios of a run: read every file only once per process
+@lru_cache(maxsize=None)
+def _cached_load(file_path, cache_dir=None, freq='h'):
+    return prepare_load(file_path, cache_dir=cache_dir, freq=freq)
+
+
+def run_scenario(scenario, cache_dir=None, memo=None):
+    """
+    Runs one scenario up to its stage.
+
+    Args:
+        scenario (dict): Parameters of the scenario, see load_scenarios. 'stage' selects what is computed:
+            'kwh_cost' (cost per kWh produced by the CHP), 'chp' (CHP stage on 'load_file') or 'pipeline'
+            (default: CHP -> Wind -> CHP+Wind on 'load_file' and 'wind_file'). 'freq' is the resolution of a
+            load file without timestamps (default 'h', see pipeline.prepare_load).
+        cache_dir (str): If given, the parsed load and wind series are also cached on disk across runs.
+        memo (dict): Stage results shared with other scenarios (see pipeline.run_pipeline).
+
+    Returns:
+        dict: Results of the scenario.
+    """
+
+    stage = scenario.get('stage', 'pipeline')
+
+    if stage == 'kwh_cost':
+        values = {key: scenario.get(key, default) for key, default in DEFAULT_KWH_COST.items()}
+        eta_e = scenario.get('eta_e', DEFAULT_CHP['eta_e'])
+        eta_t = scenario.get('eta_t', DEFAULT_CHP['eta_t'])
+        kwh_cost = kwh_chp_cost_calculator(values['c_NG'], values['tax'], values['LH'], eta_e, eta_t,
+                                           values['eta_t_re'], values['eta_e_CHP_re'], values['M'])
+        return {'kwh_cost': kwh_cost}
+
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage '{stage}', use one of: {', '.join(STAGES)}.")
+
+    chp = _chp_parameters(scenario)
+
+    if stage == 'chp':
+        load = _cached_load(scenario['load_file'], cache_dir, scenario.get('freq', 'h'))
+        chp_result = run_chp(load, chp['Pe'], chp['Pt'], chp['NumH'], chp['eta_e'])
+        economics = chp_result['economics']
+        return {
+            'PES_CHP': economics['PES'],
+            **{key: economics[key] for key in ('tr', 'co2_emission', 'co2_emission_ref', 'operating_cost_CHP',
+                                               'operating_cost_RS', 'total_net_costs', 'total_net_costs_ref')},
+        }
+
+    wind = _wind_parameters(scenario)
+    results = run_pipeline(scenario['load_file'], scenario['wind_file'], chp, wind, cache_dir=cache_dir,
+                           memo=memo, freq=scenario.get('freq', 'h'))
+    return summarize_pipeline(results)
+
+
+def run_scenarios(scenarios, cache_dir=None):
+    """
+    Runs a list of scenarios and collects the inputs and results in one table.
+
+    Args:
+        scenarios (list): Scenarios, see load_scenarios.
+        cache_dir (str): Disk cache of the parsed series, see run_scenario.
+
+    Returns:
+        DataFrame: One row per scenario with its parameters and results. Failed scenarios have the error message.
+    """
+
+    # Stage results of this run: scenarios that differ only downstream share the upstream stages
+    memo = {}
+    rows = []
+    for number, scenario in enumerate(scenarios, start=1):
+        start = time.perf_counter()
+        row = {key: (json.dumps(value) if isinstance(value, (list, dict)) else value) for key, value in scenario.items()}
+        try:
+            row.update(run_scenario(scenario, cache_dir, memo))
+            status = 'done'
+        except Exception as error:
+            row['error'] = repr(error)
+            status = 'FAILED'
+        row['elapsed'] = time.perf_counter() - start
+        rows.append(row)
+        print(f"[{number}/{len(scenarios)}] {scenario['name']} {status} ({row['elapsed']:.2f} s)")
+    return pd.DataFrame(rows)
+
+
+def save_table(results, file_path):
+    """
+    Writes the results table as CSV or JSON (records), following the extension of file_path.
+    """
+
+    if file_path.lower().endswith('.json'):
+        results.to_json(file_path, orient='records', indent=2)
+    else:
+        results.to_csv(file_path, index=False)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Runs the CHP / Wind scenarios of a configuration file without prompts.")
+    parser.add_argument('scenarios', help="Scenario file (.yaml, .yml, .json or .csv)")
+    parser.add_argument('-o', '--output', default='scenario_results.csv', help="Results file (.csv or .json)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Cache of the parsed load and wind series")
+    parser.add_argument('--no-cache', action='store_true', help="Always parse the input files")
+    args = parser.parse_args()
+
+    results = run_scenarios(load_scenarios(args.scenarios), None if args.no_cache else args.cache_dir)
+    save_table(results, args.output)
+    print(f"Results saved to '{args.output}'")
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Default cache directory, next to the input files of the run
+CACHE_DIR = '.series_cache'
+
+# Bump when the preprocessing of the cached series changes, so that old entries are not reused
+CACHE_VERSION = 2
+
+_HASH_BLOCK = 1 << 20
+
+
+def file_hash(file_path):
+    """
+    Returns the SHA-1 hash of the content of a file.
+    """
+
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Content hashes of the source files, keyed by (path, size, mtime): unchanged files are hashed only once per process
+_hashes = {}
+
+
+def source_hash(file_path):
+    """
+    Returns the content hash of a source file, recomputed only when its size or modification time change.
+    """
+
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        _hashes[key] = file_hash(file_path)
+    return _hashes[key]
+
+
+def cache_key(kind, file_path, params):
+    """
+    Builds the key of a cache entry from the content of the source file and the preprocessing parameters.
+
+    Args:
+        kind (str): Kind of series, e.g. 'load' or 'wind'.
+        file_path (str): Source file of the series.
+        params (dict): Preprocessing parameters (JSON serializable), e.g. {'Z': 90, 'alpha': 0.34}.
+
+    Returns:
+        str: Key of the entry.
+    """
+
+    payload = json.dumps({'kind': kind, 'version': CACHE_VERSION, 'source': source_hash(file_path), 'params': params},
+                         sort_keys=True)
+    return f"{kind}-{hashlib.sha1(payload.encode()).hexdigest()[:20]}"
+
+
+def save_frame(df, entry_dir):
+    """
+    Writes a DataFrame with a DatetimeIndex as one .npy file per column, so that later runs can memory-map it.
+    Text and categorical columns (e.g. the 'Fascia Oraria' time band) are stored as integer codes of their labels.
+    """
+
+    tmp_dir = f"{entry_dir}.tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    columns = []
+    for number, column in enumerate(df.columns):
+        values = df[column].to_numpy()
+        meta = {'name': column, 'file': f"{number}.npy"}
+        if values.dtype == object:
+            codes, labels = pd.factorize(values)
+            values = codes.astype(np.int16)
+            meta['labels'] = [str(label) for label in labels]
+        np.save(os.path.join(tmp_dir, meta['file']), values)
+        columns.append(meta)
+
+    np.save(os.path.join(tmp_dir, 'index.npy'), df.index.asi8)
+    with open(os.path.join(tmp_dir, 'columns.json'), 'w') as file:
+        json.dump({'index': df.index.name, 'columns': columns}, file)
+
+    # Publish the entry in one step: concurrent workers never read half written entries
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another process stored the same entry first
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+def load_frame(entry_dir):
+    """
+    Reads a DataFrame written by save_frame, memory-mapping the numeric columns; labelled columns come back as
+    categoricals.
+    """
+
+    with open(os.path.join(entry_dir, 'columns.json')) as file:
+        meta = json.load(file)
+
+    index = pd.DatetimeIndex(np.load(os.path.join(entry_dir, 'index.npy')).view('datetime64[ns]'), name=meta['index'])
+    data = {}
+    for column in meta['columns']:
+        values = np.load(os.path.join(entry_dir, column['file']), mmap_mode='r')
+        if 'labels' in column:
+            values = pd.Categorical.from_codes(values, column['labels'])
+        data[column['name']] = values
+    return pd.DataFrame(data, index=index)
+
+
+def cached_frame(kind, file_path, params, build, cache_dir=CACHE_DIR):
+    """
+    Returns the preprocessed series of a source file from the cache, building and storing it on a miss.
+
+    The entry is keyed by the content hash of the source file and by the preprocessing parameters, so editing
+    the file or changing a parameter (e.g. the hub height Z or alpha) makes a new entry.
+
+    Args:
+        kind (str): Kind of series, e.g. 'load' or 'wind'.
+        file_path (str): Source file of the series.
+        params (dict): Preprocessing parameters (JSON serializable).
+        build (callable): Function without arguments parsing the source file into a DataFrame with a DatetimeIndex.
+        cache_dir (str): Cache directory.
+
+    Returns:
+        DataFrame: Preprocessed series.
+    """
+
+    entry_dir = os.path.join(cache_dir, cache_key(kind, file_path, params))
+    if os.path.isdir(entry_dir):
+        return load_frame(entry_dir)
+
+    df = build()
+    os.makedirs(cache_dir, exist_ok=True)
+    save_frame(df, entry_dir)
+    return df
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Grid purchase and sale prices per time band (€/kWh)
+BUY_PRICES = {'F1': 0.169, 'F2': 0.174, 'F3': 0.163}
+SELL_PRICES = {'F1': 0.137, 'F2': 0.142, 'F3': 0.131}
+
+
+def band_prices(bands, prices):
+    """
+    Maps an array of time bands to an array of prices. Hours in a band without a price get NaN and are not settled.
+
+    Args:
+        bands (array-like): Time band of every hour ('F1', 'F2', 'F3').
+        prices (dict): Price per time band (€/kWh), e.g. BUY_PRICES or SELL_PRICES.
+
+    Returns:
+        ndarray: Price of every hour (€/kWh).
+    """
+
+    return pd.Series(np.asarray(bands)).map(prices).to_numpy(dtype=float)
+
+
+def load_hourly_prices(file_path, price_column='PUN', time_column='Time', sep=',', scale=1E-3):
+    """
+    Reads an hourly price series (e.g. PUN or zonal prices) from a CSV file.
+
+    Args:
+        file_path (str): CSV file with a timestamp and a price column.
+        price_column (str): Name of the price column.
+        time_column (str): Name of the timestamp column.
+        sep (str): Column separator.
+        scale (float): Conversion factor to €/kWh (default: prices in €/MWh).
+
+    Returns:
+        Series: Price (€/kWh) indexed by timestamp.
+    """
+
+    df = pd.read_csv(file_path, sep=sep, usecols=[time_column, price_column], parse_dates=[time_column])
+    prices = df.set_index(time_column)[price_column].astype(float) * scale
+    prices.index.name = None
+    return prices
+
+
+def align_prices(prices, index):
+    """
+    Aligns a price series to the timestamps of a balance. Timestamps without a price get NaN and are not settled.
+    """
+
+    return prices.reindex(pd.DatetimeIndex(index)).to_numpy(dtype=float)
+
+
+def _as_columns(values):
+    # Hours on axis 0, scenarios on axis 1
+    values = np.asarray(values, dtype=float)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def settle(production, load, buy, sell, AG=0, hours_per_step=1.0):
+    """
+    Settles the energy produced by a plant against the load of the user, hour by hour.
+
+    Every hour the whole production is valued at the purchase price, and the surplus over the load is also
+    sold to the grid at the sale price, as in calculate_wind. Hours with a NaN price are not settled. For series
+    with another resolution every power is integrated over its step (kWh = kW * hours_per_step); an array of
+    hours weights every step on its own, e.g. the hours of a wind series of several years matched to one
+    yearly load.
+    Each input is an hourly array (hours,) or a matrix (hours, scenarios) of scenarios stacked as columns;
+    they are broadcast against each other.
+
+    Args:
+        production (array-like): Power produced (kW) per hour.
+        load (array-like): Load of the user (kW) per hour.
+        buy (array-like): Purchase price (€/kWh) per hour, e.g. from band_prices or load_hourly_prices.
+        sell (array-like): Sale price (€/kWh) per hour.
+        AG (float): Government aid added to the revenue (€).
+        hours_per_step (float or array-like): Duration of a step of the series (h), e.g. 0.25 for quarter-hour
+            data, or the hours of every step (steps,).
+
+    Returns:
+        dict: 'revenue', 'energy_sold_to_grid' (kWh), 'self_consumption_value' and 'export_value' (€),
+            as scalars for hourly arrays and as arrays (scenarios,) for matrices.
+    """
+
+    inputs = [production, load, buy, sell]
+    stacked = any(np.ndim(values) == 2 for values in inputs)
+    production, load, buy, sell = (_as_columns(values) for values in inputs)
+
+    settled = ~np.isnan(buy) & ~np.isnan(sell)
+    surplus = production - load
+    exported = np.where((surplus >= 0) & settled, surplus, 0)
+
+    # Hours of every step, applied before the sum when they differ between steps
+    hours = 1.0
+    if np.ndim(hours_per_step):
+        hours, hours_per_step = _as_columns(hours_per_step), 1.0
+
+    self_consumption_value = (np.where(settled, production * buy, 0) * hours).sum(axis=0) * hours_per_step
+    export_value = (np.where(settled, exported * sell, 0) * hours).sum(axis=0) * hours_per_step
+
+    results = {
+        'revenue': AG + self_consumption_value + export_value,
+        'energy_sold_to_grid': (exported * hours).sum(axis=0) * hours_per_step,
+        'self_consumption_value': self_consumption_value,
+        'export_value': export_value,
+    }
+    if not stacked:
+        results = {key: value[0] for key, value in results.items()}
+    return results
@@ -0,0 +1,161 @@
+import numpy as np
+
+
+def _as_columns(values):
+    # Hours on axis 0, scenarios on axis 1
+    values = np.asarray(values, dtype=float)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def simulate_storage(surplus, deficit, capacity, charge_limit=np.inf, discharge_limit=np.inf, loss_rate=0.0,
+                     soc0=0.0, soc_min=0.0, charge_efficiency=1.0, discharge_efficiency=1.0, keep_hourly=False,
+                     groups=None, prices=None):
+    """
+    Simulates a storage (hot water tank, battery) that absorbs a surplus and returns it in the hours of deficit.
+
+    Every hour the storage first loses loss_rate of its content, then charges the surplus up to the charge limit
+    and the free capacity, then discharges the deficit up to the discharge limit and its content above soc_min.
+    The state of charge is sequential, so the recurrence loops over the hours, but every step works on all the
+    scenarios at once: a year over a whole sizing grid costs 8760 small array operations. Without losses,
+    limits and conversion losses the storage is never full or limited and the state of charge is a running
+    sum floored at zero, computed with cumulative sums in one pass.
+
+    Args:
+        surplus (array-like): Energy available to charge (kWh per hour), (hours,) or (hours, scenarios).
+        deficit (array-like): Demand the storage can cover (kWh per hour), same shape as surplus.
+        capacity (float or array-like): Maximum stored energy (kWh), one per scenario.
+        charge_limit (float or array-like): Maximum charged energy per hour, before the conversion losses (kW).
+        discharge_limit (float or array-like): Maximum delivered energy per hour (kW).
+        loss_rate (float or array-like): Share of the stored energy lost every hour (standing losses).
+        soc0 (float or array-like): Stored energy at the start of the year (kWh).
+        soc_min (float or array-like): Stored energy below which the storage does not discharge (kWh).
+        charge_efficiency (float or array-like): Share of the charged energy that is stored.
+        discharge_efficiency (float or array-like): Share of the stored energy withdrawn that is delivered.
+        keep_hourly (bool): Also return the hourly state of charge and energy flows.
+        groups (array-like): Group of every hour (integers from 0, e.g. the time band) to also return the energy
+            flows per group, which is much cheaper than keeping the hourly flows.
+        prices (tuple): (charge price, discharge price) per hour (€/kWh) to also value the flows per group.
+
+    Returns:
+        dict: 'charged' (absorbed surplus), 'discharged' (delivered energy) and 'losses' (standing losses) in kWh
+            and the final 'soc' (kWh) per scenario; with keep_hourly, 'soc_hourly', 'charged_hourly' and
+            'discharged_hourly' (hours, scenarios); with groups, 'charged_groups' and 'discharged_groups' (groups,
+            scenarios) and with prices their values 'charged_value_groups' and 'discharged_value_groups' (€).
+    """
+
+    surplus = _as_columns(surplus)
+    deficit = _as_columns(deficit)
+    hours = surplus.shape[0]
+    parameters = (capacity, charge_limit, discharge_limit, loss_rate, soc0, soc_min, charge_efficiency,
+                  discharge_efficiency)
+    capacity, charge_limit, discharge_limit, loss_rate, soc, soc_min, charge_efficiency, discharge_efficiency = \
+        np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in parameters),
+                            np.empty(np.broadcast_shapes(surplus.shape, deficit.shape)[1:]))[:8]
+
+    if groups is None and np.all(np.isinf(capacity)) and np.all(np.isinf(charge_limit)) and np.all(np.isinf(discharge_limit)) \
+            and not np.any(loss_rate) and not np.any(soc_min) and np.all(charge_efficiency == 1) \
+            and np.all(discharge_efficiency == 1):
+        # Lindley recursion: soc_h = max(soc_{h-1} + surplus_h - deficit_h, 0) = c_h - min(0, min(c_1..c_h))
+        cumulative = soc + np.cumsum(surplus - deficit, axis=0)
+        soc_hourly = cumulative - np.minimum(np.minimum.accumulate(cumulative, axis=0), 0)
+        charged = np.broadcast_to(surplus.sum(axis=0), soc.shape)
+        result = {
+            'charged': charged.copy(),
+            'discharged': soc + charged - soc_hourly[-1],
+            'losses': np.zeros(soc.shape),
+            'soc': soc_hourly[-1].copy(),
+        }
+        if keep_hourly:
+            previous = np.concatenate([soc[None], soc_hourly[:-1]])
+            result['soc_hourly'] = soc_hourly
+            result['charged_hourly'] = np.broadcast_to(surplus, soc_hourly.shape).copy()
+            result['discharged_hourly'] = previous + surplus - soc_hourly
+        return result
+
+    soc = soc.copy()
+    charged = np.zeros(soc.shape)
+    discharged = np.zeros(soc.shape)
+    losses = np.zeros(soc.shape)
+    if keep_hourly:
+        hourly = {key: np.empty((hours,) + soc.shape) for key in ('soc_hourly', 'charged_hourly', 'discharged_hourly')}
+    if groups is not None:
+        groups = np.asarray(groups, dtype=int)
+        keys = ['charged_groups', 'discharged_groups']
+        if prices is not None:
+            charge_price, discharge_price = (np.asarray(price, dtype=float) for price in prices)
+            keys += ['charged_value_groups', 'discharged_value_groups']
+        grouped = {key: np.zeros((groups.max(initial=-1) + 1,) + soc.shape) for key in keys}
+    for h in range(hours):
+        lost = soc * loss_rate
+        soc -= lost
+        charge = np.minimum(np.minimum(surplus[h], charge_limit), (capacity - soc) / charge_efficiency)
+        soc += charge * charge_efficiency
+        discharge = np.minimum(np.minimum(deficit[h], discharge_limit),
+                               np.maximum(soc - soc_min, 0) * discharge_efficiency)
+        soc -= discharge / discharge_efficiency
+        losses += lost
+        charged += charge
+        discharged += discharge
+        if keep_hourly:
+            hourly['soc_hourly'][h] = soc
+            hourly['charged_hourly'][h] = charge
+            hourly['discharged_hourly'][h] = discharge
+        if groups is not None:
+            grouped['charged_groups'][groups[h]] += charge
+            grouped['discharged_groups'][groups[h]] += discharge
+            if prices is not None:
+                grouped['charged_value_groups'][groups[h]] += charge * charge_price[h]
+                grouped['discharged_value_groups'][groups[h]] += discharge * discharge_price[h]
+
+    result = {'charged': charged, 'discharged': discharged, 'losses': losses, 'soc': soc}
+    if keep_hourly:
+        result.update(hourly)
+    if groups is not None:
+        result.update(grouped)
+    return result
+
+
+def couple_thermal_storage(df, balance, Pt, capacity, charge_limit=np.inf, discharge_limit=np.inf, loss_rate=0.0,
+                           soc0=0.0, hours_per_step=1.0):
+    """
+    Adds a thermal storage to the thermal balance of a modulating CHP dispatch.
+
+    The heat the CHP produces above the thermal load charges the tank instead of being wasted, and the tank
+    covers the thermal load before the boiler. The electric balance is unchanged. For loads with another
+    resolution (e.g. 15 minutes) the flows and the charge and discharge limits are energies per step
+    (kWh = kW * hours_per_step) and the hourly loss rate is compounded over the step.
+
+    Args:
+        df (DataFrame): Load of the dispatch, with the 'Potenza Termica' column, in chronological order.
+        balance (dict): Balance of chp_dispatch.dispatch_chp_modulating (its 'load_factor' gives the hourly output).
+        Pt (float or array-like): Maximum thermal power of the CHP (kW), as in the dispatch.
+        capacity, charge_limit, discharge_limit, loss_rate, soc0: Tank parameters (see simulate_storage), scalars
+            or one per scenario; a single dispatch scenario is broadcast over a grid of tanks.
+        hours_per_step (float): Duration of a row of the load (h), as passed to the dispatch.
+
+    Returns:
+        dict: The balance with the storage in 'provided_by_chp_t', 'surplus_t' and 'integration_t', and 'storage',
+            the result of simulate_storage.
+    """
+
+    potenza_termica = df['Potenza Termica'].to_numpy(dtype=float)[:, None]
+    thermal = balance['load_factor'] * np.atleast_1d(np.asarray(Pt, dtype=float))[None, :]
+    step_loss_rate = loss_rate if hours_per_step == 1 else 1 - (1 - np.asarray(loss_rate, dtype=float)) ** hours_per_step
+    storage = simulate_storage(np.maximum(thermal - potenza_termica, 0) * hours_per_step,
+                               np.maximum(potenza_termica - thermal, 0) * hours_per_step, capacity,
+                               np.asarray(charge_limit, dtype=float) * hours_per_step,
+                               np.asarray(discharge_limit, dtype=float) * hours_per_step, step_loss_rate, soc0)
+
+    scalar = all(np.ndim(value) == 0 for value in (balance['surplus_t'], capacity, charge_limit, discharge_limit,
+                                                    loss_rate, soc0))
+    if scalar:
+        storage = {key: value[0] if np.ndim(value) else value for key, value in storage.items()}
+
+    # Stored heat replaces boiler heat; the heat charged is no longer a surplus
+    return {
+        **balance,
+        'provided_by_chp_t': balance['provided_by_chp_t'] + storage['discharged'],
+        'surplus_t': balance['surplus_t'] - storage['charged'],
+        'integration_t': balance['integration_t'] - storage['discharged'],
+        'storage': storage,
+    }
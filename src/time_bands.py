@@ -0,0 +1,105 @@
+import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Band definitions: (band, weekdays (0=Monday, 6=Sunday), hours) rules, the first matching rule wins.
+# Hours matched by no rule (nights and Sundays) fall in the default band.
+DEFAULT_BANDS = (
+    ('F1', (0, 1, 2, 3, 4), tuple(range(7, 19))),   # F1: Monday-Friday, 7:00 AM to 7:00 PM
+    ('F2', (0, 1, 2, 3, 4), tuple(range(19, 23))),  # F2: Monday-Friday evening
+    ('F2', (5,), tuple(range(7, 23))),              # F2: Saturday, 7:00 AM to 11:00 PM
+)
+DEFAULT_BAND = 'F3'
+
+
+def easter_sunday(year):
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def italian_holidays(year):
+    """
+    Returns the Italian national holidays of a year, billed in the default (F3) band as Sundays.
+    """
+
+    fixed = [(1, 1), (1, 6), (4, 25), (5, 1), (6, 2), (8, 15), (11, 1), (12, 8), (12, 25), (12, 26)]
+    holidays = [datetime.date(year, month, day) for month, day in fixed]
+    holidays.append(easter_sunday(year) + datetime.timedelta(days=1))  # Easter Monday
+    return sorted(holidays)
+
+
+@lru_cache(maxsize=None)
+def year_band_table(year, bands=DEFAULT_BANDS, default_band=DEFAULT_BAND, holidays=False):
+    """
+    Computes the hourly time band calendar of a year. The table is cached, so every site of a portfolio
+    shares the same calendar.
+
+    Args:
+        year (int): Calendar year.
+        bands (tuple): Band definitions, see DEFAULT_BANDS.
+        default_band (str): Band of the hours matched by no rule and of the holidays.
+        holidays (bool): Bill the Italian national holidays in the default band.
+
+    Returns:
+        tuple: (labels, codes) where labels is the tuple of band names and codes is an int8 array with the
+            band code (index in labels) of every hour of the year, indexed by (day of year - 1) * 24 + hour.
+    """
+
+    labels = tuple(dict.fromkeys([default_band] + [band for band, _, _ in bands]))
+
+    # Weekday x hour band matrix, filled from the last rule so that the first matching rule wins
+    matrix = np.zeros((7, 24), dtype=np.int8)
+    for band, weekdays, hours in reversed(bands):
+        matrix[np.ix_(list(weekdays), list(hours))] = labels.index(band)
+
+    days = pd.date_range(start=f'{year}-01-01', end=f'{year}-12-31', freq='D')
+    codes = matrix[days.weekday].copy()
+
+    if holidays:
+        for holiday in italian_holidays(year):
+            codes[holiday.timetuple().tm_yday - 1] = labels.index(default_band)
+
+    codes = codes.ravel()
+    codes.flags.writeable = False
+    return labels, codes
+
+
+def classify_time_bands(index, bands=DEFAULT_BANDS, default_band=DEFAULT_BAND, holidays=False):
+    """
+    Assigns the tariff time band (F1, F2, F3) to every timestamp of a DatetimeIndex.
+
+    The band only depends on the day and on the hour, so it is looked up in the cached calendar of each
+    year: this works for any time resolution and for series spanning several years.
+
+    Args:
+        index (DatetimeIndex): Timestamps to classify (wall-clock time).
+        bands (tuple): Band definitions, see DEFAULT_BANDS.
+        default_band (str): Band of the hours matched by no rule and of the holidays.
+        holidays (bool): Bill the Italian national holidays in the default band.
+
+    Returns:
+        ndarray: Band name of every timestamp.
+    """
+
+    index = pd.DatetimeIndex(index)
+    years = index.year.to_numpy()
+    hour_of_year = (index.dayofyear.to_numpy() - 1) * 24 + index.hour.to_numpy()
+
+    result = np.empty(len(index), dtype=object)
+    for year in np.unique(years):
+        labels, codes = year_band_table(int(year), bands, default_band, holidays)
+        mask = years == year
+        result[mask] = np.array(labels, dtype=object)[codes[hour_of_year[mask]]]
+    return result
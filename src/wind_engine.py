@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+HOURS_PER_YEAR = 8760
+
+# Turbine catalog: rated power (kW) and power curve [[wind speed (m/s), power (kW)], ...] (see 4_WIND.py)
+TURBINES = {
+    'V100/2000': {
+        'Pe': 2000,
+        'speed_power': [[0, 0], [4, 42], [5, 144], [6, 380], [7, 736], [8, 1226], [9, 1526], [10, 1833], [11, 1980], [12, 2000], [25, 2000]],
+    },
+    'V112/3450': {
+        'Pe': 3450,
+        'speed_power': [[0, 0], [4, 42], [5, 144], [6, 380], [7, 736], [8, 1226], [9, 1894], [10, 2719], [11, 3306], [12, 3442], [25, 3450]],
+    },
+    'V117/4000': {
+        'Pe': 4000,
+        'speed_power': [[0, 0], [1, 0], [2, 0], [3, 25], [4, 159], [5, 356], [6, 645], [7, 1051], [8, 1859], [9, 2273], [10, 3016], [11, 3646], [12, 3971], [25, 4000]],
+    },
+}
+
+
+def hub_wind_speed(ws10, Z, alpha):
+    """
+    Scales the 10 m wind speed to the hub height with the power law (Z/10)**alpha.
+    """
+
+    return np.asarray(ws10, dtype=float) * (Z / 10) ** alpha
+
+
+def _power_curves(speed_power):
+    # Accepts one curve [[speed, power], ...] or a list of curves; returns the list of (speeds, powers) arrays
+    curves = speed_power if np.ndim(speed_power[0]) == 2 else [speed_power]
+    result = []
+    for curve in curves:
+        speeds, powers = np.asarray(curve, dtype=float).T
+        if len(speeds) < 2 or np.any(np.diff(speeds) <= 0):
+            raise ValueError("A power curve needs at least two points with increasing wind speeds.")
+        result.append((speeds, powers))
+    return result
+
+
+def curve_power(ws, speed_power):
+    """
+    Interpolates power curves over wind speed series in one pass.
+
+    All the power curves are resampled on the union of their wind speeds, where they stay exactly piecewise
+    linear, so a single interpolation gives the power of every curve. Outside the curve the power is clamped
+    to its first and last values, as np.interp does.
+
+    Args:
+        ws (ndarray): Wind speed series (steps,) shared by all the curves, or one series per curve (curves, steps).
+        speed_power (list): Power curve [[wind speed (m/s), power (kW)], ...] or a list of power curves.
+
+    Returns:
+        ndarray: Power (kW) of every curve, shape (curves, steps).
+    """
+
+    curves = _power_curves(speed_power)
+
+    # Common wind speed grid and power of every curve on it: shape (curves, grid)
+    grid = np.unique(np.concatenate([speeds for speeds, _ in curves]))
+    table = np.array([np.interp(grid, speeds, powers) for speeds, powers in curves])
+    rows = np.arange(len(curves))[:, None]
+
+    # Linear interpolation of the whole series on the common grid
+    clipped = np.clip(ws, grid[0], grid[-1])
+    i = np.clip(np.searchsorted(grid, clipped, side='right') - 1, 0, len(grid) - 2)
+    weight = (clipped - grid[i]) / (grid[i + 1] - grid[i])
+    return table[rows, i] + (table[rows, i + 1] - table[rows, i]) * weight
+
+
+def speed_histogram(ws):
+    """
+    Returns the wind speed distribution in 1 m/s classes: percentage of steps '%_h' per integer wind speed 'WS'.
+    """
+
+    counts = np.bincount(np.rint(ws).astype(int).clip(0)) if len(ws) else np.zeros(0, dtype=int)
+    speeds = np.flatnonzero(counts)
+    return pd.DataFrame({'WS': speeds, '%_h': counts[speeds] / len(ws) * 100})
+
+
+def wind_production(ws, speed_power, hours_per_step=1.0):
+    """
+    Computes the power of one or more wind turbines over a whole wind speed series in one pass (see curve_power).
+
+    Args:
+        ws (array-like): Hub height wind speed series (m/s).
+        speed_power (list): Power curve [[wind speed (m/s), power (kW)], ...] or a list of power curves.
+        hours_per_step (float): Duration of a step of the series (h).
+
+    Returns:
+        dict:
+            'power' (ndarray): Power (kW) per step, shape (steps,) for one curve, (curves, steps) for a list.
+            'energy' (float or ndarray): Energy over the whole series (kWh) per curve.
+            'annual_energy' (float or ndarray): Average energy per year of 8760 h (kWh) per curve.
+            'histogram' (DataFrame): Percentage of steps '%_h' per integer wind speed 'WS'.
+    """
+
+    ws = np.asarray(ws, dtype=float)
+    power = curve_power(ws, speed_power)
+
+    energy = power.sum(axis=-1) * hours_per_step
+    annual_energy = power.mean(axis=-1) * HOURS_PER_YEAR if len(ws) else np.zeros(power.shape[:-1])
+
+    histogram = speed_histogram(ws)
+
+    if np.ndim(speed_power[0]) != 2:
+        power, energy, annual_energy = power[0], energy[0], annual_energy[0]
+
+    return {'power': power, 'energy': energy, 'annual_energy': annual_energy, 'histogram': histogram}
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from wind_engine import HOURS_PER_YEAR, TURBINES, curve_power, speed_histogram
+
+
+def farm_turbines(turbines):
+    """
+    Completes the description of the turbine groups of a wind farm.
+
+    Args:
+        turbines (list): One dict per group of identical turbines:
+            'model' (str): Name in TURBINES, giving 'Pe' and 'speed_power' unless they are set explicitly.
+            'Pe' (float) and 'speed_power' (list): Rated power (kW) and power curve of the turbine.
+            'Z' (float): Hub height (m).
+            'count' (int): Number of turbines of the group (default 1).
+            'availability' (float): Availability factor of the turbines (default 1).
+            'wake_loss' (float): Share of the energy lost to the wakes of the other turbines (default 0).
+
+    Returns:
+        DataFrame: One row per group with 'model', 'Pe', 'speed_power', 'Z', 'count', 'availability',
+            'wake_loss' and the resulting output 'factor' of the group (count * availability * (1 - wake_loss)).
+
+    Raises:
+        ValueError: If a group has no hub height, an unknown model without a power curve, or invalid factors.
+    """
+
+    rows = []
+    for turbine in turbines:
+        model = turbine.get('model')
+        if model is not None and model not in TURBINES and 'speed_power' not in turbine:
+            raise ValueError(f"Unknown turbine model '{model}', use one of {', '.join(TURBINES)} or give its "
+                             "'Pe' and 'speed_power'.")
+        row = {'model': model, **TURBINES.get(model, {}), 'count': 1, 'availability': 1.0, 'wake_loss': 0.0, **turbine}
+        if 'Z' not in row or 'speed_power' not in row or 'Pe' not in row:
+            raise ValueError(f"Turbine group {turbine} needs a hub height 'Z', 'Pe' and a 'speed_power' curve.")
+        if not 0 <= row['availability'] <= 1 or not 0 <= row['wake_loss'] < 1 or row['count'] < 0:
+            raise ValueError(f"Turbine group {turbine} has an invalid count, availability or wake loss.")
+        rows.append(row)
+
+    farm = pd.DataFrame(rows, columns=['model', 'Pe', 'speed_power', 'Z', 'count', 'availability', 'wake_loss'])
+    farm['factor'] = farm['count'] * farm['availability'] * (1 - farm['wake_loss'])
+    return farm
+
+
+def farm_production(ws10, turbines, alpha, hours_per_step=1.0):
+    """
+    Computes the hourly output of a wind farm mixing turbine models and hub heights.
+
+    The 10 m wind speed is scaled to the hub height of every group with the (Z/10)**alpha shear, the power
+    curves are interpolated over the (groups, hours) speed matrix in one pass (see wind_engine.curve_power)
+    and the farm output is the product of the group factors with the power matrix.
+
+    Args:
+        ws10 (array-like): Wind speed at 10 m (m/s) per step, e.g. read_wind(file_path, 10, alpha)['WS'].
+        turbines (list or DataFrame): Turbine groups (see farm_turbines).
+        alpha (float): Wind shear (location) factor.
+        hours_per_step (float): Duration of a step of the series (h).
+
+    Returns:
+        dict: The keys of wind_production for the whole farm ('power', 'energy', 'annual_energy' and the
+            'histogram' of the 10 m wind speed), 'Pe' (rated power of the farm, kW), 'turbine_power' (power of
+            one turbine of every group, (groups, steps)) and 'turbines' (the groups with their 'annual_energy').
+    """
+
+    farm = turbines if isinstance(turbines, pd.DataFrame) else farm_turbines(turbines)
+    ws10 = np.asarray(ws10, dtype=float)
+
+    shear = (farm['Z'].to_numpy(dtype=float) / 10) ** alpha
+    turbine_power = curve_power(ws10[None, :] * shear[:, None], list(farm['speed_power']))
+    factors = farm['factor'].to_numpy(dtype=float)
+    power = factors @ turbine_power
+
+    farm = farm.copy()
+    farm['annual_energy'] = (turbine_power.mean(axis=1) * factors * HOURS_PER_YEAR if len(ws10)
+                             else np.zeros(len(farm)))
+
+    return {
+        'power': power,
+        'energy': power.sum() * hours_per_step,
+        'annual_energy': power.mean() * HOURS_PER_YEAR if len(ws10) else 0.0,
+        'histogram': speed_histogram(ws10),
+        'Pe': float((farm['Pe'] * farm['count']).sum()),
+        'turbine_power': turbine_power,
+        'turbines': farm,
+    }
@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+
+
+def render_wind_report(wind_speed_pct, speed_power, Z, output_dir='.', show=False):
+    """
+    Draws the wind speed distribution and the power curve of the turbine from the results of the wind stage.
+
+    matplotlib is only imported here, so the numerical stages (calculate_wind with plots=False, pipeline,
+    batch_runner) never load it.
+
+    Args:
+        wind_speed_pct (DataFrame): Wind speed histogram with 'WS' and '%_h' columns (wind_speed_pct.csv).
+        speed_power (list): Power curve as [[wind speed (m/s), power (kW)], ...].
+        Z (float): Hub height of the turbine (m), for the axis label.
+        output_dir (str): Directory of wind_speed_pct.png and wind_speed_pct_power_curve.png.
+        show (bool): Also show the figure (blocks under interactive backends).
+
+    Returns:
+        list: Paths of the PNG files.
+    """
+
+    import matplotlib.pyplot as plt
+
+    paths = [os.path.join(output_dir, 'wind_speed_pct.png'), os.path.join(output_dir, 'wind_speed_pct_power_curve.png')]
+
+    # Plot the distribution graph
+    fig, ax1 = plt.subplots(figsize=(10, 6))
+
+    # Histogram of wind speed distribution
+    ax1.bar(wind_speed_pct["WS"], wind_speed_pct["%_h"], color='skyblue', label='Wind Speed Distribution')
+    ax1.set_xlabel(f"Wind Speed (WS{Z}m)")
+    ax1.set_ylabel("% of Hours", color='blue')
+    ax1.grid(axis='y', linestyle='--', alpha=0.6)
+    ax1.tick_params(axis='y', labelcolor='blue')
+
+    # Title and legend
+    ax1.set_title("Wind Speed Distribution")
+    fig.tight_layout()
+    fig.savefig(paths[0])
+
+    speed_power_df = pd.DataFrame(speed_power, columns=["Speed", "Power"])
+
+    # Add the power curve line on a second y-axis
+    ax2 = ax1.twinx()
+    ax2.plot(speed_power_df["Speed"], speed_power_df["Power"], color='orange', marker='o', linestyle='-', label='Speed-Power Curve')
+    ax2.set_ylabel("Power", color='orange')
+    ax2.tick_params(axis='y', labelcolor='orange')
+
+    fig.tight_layout()
+    fig.savefig(paths[1])
+
+    if show:
+        plt.show()
+    plt.close(fig)
+    return paths
+
+
+def render_wind_report_from_dir(results_dir, speed_power, Z, output_dir=None, show=False):
+    """
+    Draws the wind charts from the wind_speed_pct.csv saved by a previous run (4_WIND.py or save_results),
+    without recomputing the wind stage.
+
+    Args:
+        results_dir (str): Directory holding wind_speed_pct.csv.
+        speed_power (list): Power curve of the turbine of the run.
+        Z (float): Hub height of the turbine of the run (m).
+        output_dir (str): Directory of the PNG files (default: results_dir).
+        show (bool): Also show the figure.
+
+    Returns:
+        list: Paths of the PNG files.
+    """
+
+    wind_speed_pct = pd.read_csv(os.path.join(results_dir, 'wind_speed_pct.csv'))
+    return render_wind_report(wind_speed_pct, speed_power, Z, results_dir if output_dir is None else output_dir, show)
+
+
+if __name__ == '__main__':
+
+    import sys
+
+    from pipeline import DEFAULT_WIND
+
+    # Usage: python wind_report.py [results dir] -- charts of a run with the default turbine
+    render_wind_report_from_dir(sys.argv[1] if len(sys.argv) > 1 else '.', DEFAULT_WIND['speed_power'], DEFAULT_WIND['Z'])
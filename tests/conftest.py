@@ -0,0 +1,22 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules of src/ import each other by bare name, as the scripts run from that directory
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+
+
+@pytest.fixture
+def pvgis_file(tmp_path):
+    # One year of hourly PVGIS wind (2019) with its header and legend
+    rng = np.random.default_rng(2)
+    hours = pd.date_range('2019-01-01 00:10', periods=8760, freq='h')
+    rows = [f"{time:%Y%m%d:%H%M},0.0,0.0,10.0,{speed:.2f},0.0" for time, speed in zip(hours, rng.weibull(2, 8760) * 6)]
+    path = tmp_path / 'wind_speed.csv'
+    path.write_text("Latitude (decimal degrees):\t41.273\nLongitude (decimal degrees):\t14.909\n"
+                    "Elevation (m):\t450.0\n\ntime,G(i),H_sun,T2m,WS10m,Int\n" + "\n".join(rows)
+                    + "\n\nWS10m: 10-m total wind speed (m/s)\n")
+    return str(path)
@@ -0,0 +1,23 @@
+import pytest
+
+from batch_runner import make_jobs
+
+
+def test_make_jobs_ids():
+    jobs = make_jobs(['a/site_1.csv', 'a/site_2.csv'], ['w/wind_2019.csv'])
+    assert [job['job_id'] for job in jobs] == ['site_1__wind_2019', 'site_2__wind_2019']
+    assert [job['freq'] for job in jobs] == ['h', 'h']
+
+
+def test_make_jobs_freq():
+    jobs = make_jobs(['a/site_1.csv'], ['w/wind_2019.csv'], freq='15min')
+    assert jobs[0]['freq'] == '15min'
+
+
+@pytest.mark.parametrize('load_files, wind_files', [
+    (['a/load.csv', 'b/load.csv'], ['wind.csv']),
+    (['load.csv'], ['a/wind.csv', 'b/wind.csv']),
+])
+def test_make_jobs_rejects_files_with_the_same_name(load_files, wind_files):
+    with pytest.raises(ValueError, match='same name'):
+        make_jobs(load_files, wind_files)
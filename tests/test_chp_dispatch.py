@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from chp_dispatch import TIME_BANDS, dispatch_chp
+
+
+def make_load(hours=8760, seed=0, offset=0.0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Potenza Elettrica': rng.permutation(hours) + 200.0 + offset,
+        'Potenza Termica': rng.uniform(100, 1500, hours).round(),
+        'Fascia Oraria': rng.choice(TIME_BANDS, hours),
+    })
+
+
+def test_dispatch_chp_runs_numh_hours_in_every_year():
+    # The second year has a lower load: a global selection would run the CHP mostly in the first year
+    first, second = make_load(), make_load(offset=-150.0)
+    balance = dispatch_chp(pd.concat([first, second], ignore_index=True), 800, 900, 5000, years=2)
+
+    yearly = [dispatch_chp(year, 800, 900, 5000) for year in (first, second)]
+    pd.testing.assert_frame_equal(balance['bands'], (yearly[0]['bands'] + yearly[1]['bands']) / 2)
+    for key in ('provided_by_chp_t', 'surplus_t', 'integration_t', 'tot_e', 'tot_t'):
+        np.testing.assert_allclose(balance[key], (yearly[0][key] + yearly[1][key]) / 2)
+
+
+def baseline_dispatch(df, Pe, Pt, NumH):
+    # Hour by hour loop of the original process_energy_data
+    results = {fascia: dict.fromkeys(['surplus', 'integration', 'provided_by_chp', 'self_consumption',
+                                      'energy_sold_to_grid'], 0) for fascia in TIME_BANDS}
+    thermal = dict.fromkeys(['provided_by_chp_t', 'surplus_t', 'integration_t', 'tot_e', 'tot_t'], 0)
+    committed_power = committed_power_ref = 0
+    for _, row in df.sort_values(by='Potenza Elettrica', ascending=False).head(NumH).iterrows():
+        fascia_oraria = row['Fascia Oraria']
+        potenza_elettrica = row['Potenza Elettrica']
+        potenza_termica = row['Potenza Termica']
+        committed_power_ref = max(committed_power_ref, potenza_elettrica)
+        thermal['tot_e'] += potenza_elettrica
+        thermal['tot_t'] += potenza_termica
+        if potenza_elettrica > Pe:
+            integration = potenza_elettrica - Pe
+            results[fascia_oraria]['integration'] += integration
+            results[fascia_oraria]['self_consumption'] += Pe
+            results[fascia_oraria]['energy_sold_to_grid'] += integration
+            committed_power = max(committed_power, integration)
+        else:
+            results[fascia_oraria]['surplus'] += Pe - potenza_elettrica
+            results[fascia_oraria]['self_consumption'] += potenza_elettrica
+        results[fascia_oraria]['provided_by_chp'] += Pe
+        if potenza_termica > Pt:
+            thermal['integration_t'] += potenza_termica - Pt
+            thermal['provided_by_chp_t'] += Pt
+        else:
+            thermal['surplus_t'] += Pt - potenza_termica
+            thermal['provided_by_chp_t'] += potenza_termica
+    return results, thermal, committed_power, committed_power_ref
+
+
+def test_dispatch_chp_matches_the_hourly_loop():
+    # Repeated powers, as in a real load rounded to the kW
+    df = make_load(seed=3)
+    df['Potenza Elettrica'] = (df['Potenza Elettrica'] // 10) * 10
+    for Pe, Pt, NumH in ((800, 900, 5000), (3000, 200, 8760), (150, 1400, 438)):
+        balance = dispatch_chp(df, Pe, Pt, NumH)
+        results, thermal, committed_power, committed_power_ref = baseline_dispatch(df, Pe, Pt, NumH)
+
+        for fascia in TIME_BANDS:
+            for key, value in results[fascia].items():
+                np.testing.assert_allclose(balance['bands'].at[fascia, key], value, rtol=1e-12)
+        for key, value in thermal.items():
+            np.testing.assert_allclose(balance[key], value, rtol=1e-12)
+        assert balance['committed_power'] == committed_power
+        assert balance['committed_power_ref'] == committed_power_ref
+
+
+def test_dispatch_chp_quarter_hours_match_hourly():
+    hourly = make_load()
+    quarter = hourly.loc[hourly.index.repeat(4)].reset_index(drop=True)
+
+    balance = dispatch_chp(quarter, 800, 900, 5000, hours_per_step=0.25)
+    expected = dispatch_chp(hourly, 800, 900, 5000)
+    pd.testing.assert_frame_equal(balance['bands'], expected['bands'])
+    for key in ('provided_by_chp_t', 'surplus_t', 'integration_t', 'tot_e', 'tot_t', 'committed_power',
+                'committed_power_ref'):
+        np.testing.assert_allclose(balance[key], expected[key], rtol=1e-12)
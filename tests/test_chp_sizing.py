@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chp_dispatch import TIME_BANDS
+from chp_optimizer import optimize_chp_size
+from chp_sizing import sweep_chp_sizes
+
+
+def make_load(start='2024-01-01', periods=8760, freq='h', seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Potenza Elettrica': rng.uniform(200, 1500, periods).round(),
+        'Potenza Termica': rng.uniform(100, 1500, periods).round(),
+        'Fascia Oraria': rng.choice(TIME_BANDS, periods),
+    }, index=pd.DatetimeIndex(pd.date_range(start, periods=periods, freq=freq), name='Tempo'))
+
+
+def test_sweep_accepts_one_hourly_year():
+    # With the 'Tempo' timestamps as a column, as in load_preproc.csv, or without timestamps
+    load = make_load()
+    for df in (load, load.reset_index(), load.reset_index(drop=True)):
+        assert len(sweep_chp_sizes(df, [800], [900], [5000], 0.39)) == 1
+
+
+@pytest.mark.parametrize('load', [
+    make_load(periods=4 * 8760, freq='15min'),
+    make_load(periods=2 * 8760),
+    make_load(periods=2 * 8760).reset_index(drop=True),
+])
+def test_sizing_rejects_other_loads(load):
+    with pytest.raises(ValueError, match='one year of hourly steps'):
+        sweep_chp_sizes(load, [800], [900], [5000], 0.39)
+    with pytest.raises(ValueError, match='one year of hourly steps'):
+        optimize_chp_size(load, 0.39)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from investment import cash_flows, evaluate_investment, irr, npv
+
+# Reference IRR and NPV of the original 5_CHP_Wind.py
+npf = pytest.importorskip('numpy_financial')
+
+
+def test_npv_and_irr_match_the_original_formulas():
+    # Investments and savings of CHP + Wind sizes, evaluated as arrays of scenarios
+    investment = np.array([5.6e6, 2.0e6, 8.0e6, 1.0e6])
+    annual_savings = np.array([1.43e6, 2.5e5, 5.0e5, 9.0e5])
+    r, years = 0.05, 20
+
+    indicators = evaluate_investment(investment, annual_savings, r, years)
+    for i, (I, savings) in enumerate(zip(investment, annual_savings)):
+        # Formulas of the original 5_CHP_Wind.py
+        NPV = sum(savings / (1 + r) ** t for t in range(1, years + 1)) - I
+        np.testing.assert_allclose(indicators['NPV'][i], NPV, rtol=1e-12)
+        np.testing.assert_allclose(indicators['PI'][i], (NPV + I) / I, rtol=1e-12)
+        np.testing.assert_allclose(indicators['SPB'][i], I / savings, rtol=1e-12)
+        np.testing.assert_allclose(indicators['IRR'][i], npf.irr([-I] + [savings] * years), rtol=1e-9)
+
+
+def test_irr_of_cash_flow_profiles():
+    # Degradation, escalation and a replacement in year 10
+    flows = cash_flows([3e6, 3e6], [6e5, 4e5], degradation=0.01, escalation=0.02, replacements={10: 5e5})
+
+    np.testing.assert_allclose(npv(flows, irr(flows)), 0, atol=1e-4)
+    for row in flows:
+        np.testing.assert_allclose(irr(row), npf.irr(row), rtol=1e-9)
+        np.testing.assert_allclose(npv(row, 0.05), npf.npv(0.05, row), rtol=1e-12)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from monte_carlo import prepare_inputs, simulate_draws
+from pipeline import DEFAULT_CHP, DEFAULT_WIND
+
+
+def write_load(path, steps_per_hour, years=1, seed=0):
+    # Years of load without timestamps, every hour repeated at steps_per_hour steps of the same power
+    rng = np.random.default_rng(seed)
+    electric = np.tile(rng.permutation(8760) + 200.0, years)
+    thermal = np.tile(rng.uniform(100, 1500, 8760).round(), years)
+    pd.DataFrame({'Potenza Elettrica': np.repeat(electric, steps_per_hour),
+                  'Potenza Termica': np.repeat(thermal, steps_per_hour)}).to_csv(path, sep=';', index=False)
+    return str(path)
+
+
+def test_quarter_hour_draws_match_hourly(tmp_path, pvgis_file):
+    hourly = prepare_inputs(write_load(tmp_path / 'load_h.csv', 1), pvgis_file, DEFAULT_CHP, DEFAULT_WIND)
+    quarter = prepare_inputs(write_load(tmp_path / 'load_15.csv', 4), pvgis_file, DEFAULT_CHP, DEFAULT_WIND,
+                             freq='15min')
+
+    # The same seeds resample the same wind days: every quarter-hour takes the wind of its hour
+    expected = simulate_draws(hourly, 20)
+    draws = simulate_draws(quarter, 20)
+    for column in ('wind_revenue', 'wind_energy_sold', 'NPV_CHP_Wind'):
+        np.testing.assert_allclose(draws[column], expected[column], rtol=1e-9)
+
+
+def test_multi_year_draws_are_yearly(tmp_path, pvgis_file):
+    one = prepare_inputs(write_load(tmp_path / 'load_1.csv', 1), pvgis_file, DEFAULT_CHP, DEFAULT_WIND)
+    two = prepare_inputs(write_load(tmp_path / 'load_2.csv', 1, years=2), pvgis_file, DEFAULT_CHP, DEFAULT_WIND)
+
+    # Two years of draws average two resampled wind years instead of adding them
+    ratio = simulate_draws(two, 200)['wind_revenue'].median() / simulate_draws(one, 200)['wind_revenue'].median()
+    assert 0.9 < ratio < 1.1
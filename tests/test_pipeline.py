@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from pipeline import (DEFAULT_CHP, DEFAULT_WIND, prepare_load, run_chp, run_chp_wind, run_pipeline, run_wind,
+                      summarize_pipeline)
+from wind_engine import TURBINES
+
+TURBINE = TURBINES['V100/2000']
+
+
+def write_load(path, years, seed=0):
+    # Hourly load with the same values in every year; 2017 and 2023 share their weekdays, so the time bands too
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range('2017-01-01', periods=8760, freq='h')
+    # Distinct electric powers, so the NumH hours of highest load are the same in every year
+    electric = rng.permutation(len(hours)) + 200.0
+    thermal = rng.uniform(100, 1500, len(hours)).round()
+    data = pd.concat([
+        pd.DataFrame({'Tempo': hours + (pd.Timestamp(f'{year}-01-01') - hours[0]),
+                      'Potenza Elettrica': electric, 'Potenza Termica': thermal})
+        for year in years
+    ])
+    data.to_csv(path, sep=';', index=False)
+    return path
+
+
+def write_steps(path, steps_per_hour, seed=0):
+    # One year of load without timestamps, every hour repeated at steps_per_hour steps of the same power
+    rng = np.random.default_rng(seed)
+    electric = rng.permutation(8760) + 200.0
+    thermal = rng.uniform(100, 1500, 8760).round()
+    pd.DataFrame({'Potenza Elettrica': np.repeat(electric, steps_per_hour),
+                  'Potenza Termica': np.repeat(thermal, steps_per_hour)}).to_csv(path, sep=';', index=False)
+    return str(path)
+
+
+def wind_series(seed=1, years=(2019,)):
+    # Hourly wind with the same speeds in every year (of 365 days)
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range('2019-01-01', periods=8760, freq='h')
+    index = pd.DatetimeIndex(np.concatenate([hours + (pd.Timestamp(f'{year}-01-01') - hours[0]) for year in years]),
+                             name='time(UTC)')
+    return pd.DataFrame({'WS': np.tile(rng.weibull(2, len(hours)) * 8, len(years))}, index=index)
+
+
+def test_run_wind_two_year_hourly_load(tmp_path):
+    load = prepare_load(write_load(tmp_path / 'load.csv', [2017, 2023]))
+    chp_result = run_chp(load, 800, 900, 5000, 0.39)
+    wind = wind_series()
+
+    wind_result = run_wind(wind, chp_result['net_load'], 0, TURBINE['Pe'], TURBINE['speed_power'], 0.9)
+
+    # Every hour of both years takes the wind of its calendar hour
+    hourly = wind_result['hourly']
+    assert len(hourly) == len(load)
+    np.testing.assert_array_equal(hourly['time(UTC)'], load.index)
+    np.testing.assert_array_equal(hourly['WS'].to_numpy()[:8760], wind['WS'].to_numpy())
+    np.testing.assert_array_equal(hourly['WS'].to_numpy()[8760:], wind['WS'].to_numpy())
+
+
+def test_two_year_load_is_priced_per_year(tmp_path):
+    wind = wind_series()
+    results = []
+    for years in ([2017], [2017, 2023]):
+        load = prepare_load(write_load(tmp_path / f'load_{len(years)}.csv', years))
+        chp_result = run_chp(load, 800, 900, 5000, 0.39)
+        wind_result = run_wind(wind, chp_result['net_load'], 0, TURBINE['Pe'], TURBINE['speed_power'], 0.9)
+        results.append((chp_result, wind_result, run_chp_wind(load, chp_result, wind_result, 800)))
+
+    # Two identical years give the yearly figures of one year
+    (chp_1, wind_1, combined_1), (chp_2, wind_2, combined_2) = results
+    for key in ('operating_cost_CHP', 'operating_cost_RS', 'total_net_costs', 'PES'):
+        np.testing.assert_allclose(chp_2['economics'][key], chp_1['economics'][key], rtol=1e-9)
+    for key in ('Revenue', 'energy_sold_to_grid'):
+        np.testing.assert_allclose(wind_2[key], wind_1[key], rtol=1e-9)
+    for key in ('PES', 'CO2_saving', 'NPV', 'IRR'):
+        np.testing.assert_allclose(combined_2[key], combined_1[key], rtol=1e-9)
+
+
+def test_two_year_wind_is_averaged_per_year(tmp_path):
+    load = prepare_load(write_load(tmp_path / 'load.csv', [2017]))
+    chp_result = run_chp(load, 800, 900, 5000, 0.39)
+    results = []
+    for years in ([2019], [2019, 2021]):
+        wind_result = run_wind(wind_series(years=years), chp_result['net_load'], 0, TURBINE['Pe'],
+                               TURBINE['speed_power'], 0.9)
+        results.append((wind_result, run_chp_wind(load, chp_result, wind_result, 800)))
+
+    # Two identical wind years give the yearly figures of one year, not twice them
+    (wind_1, combined_1), (wind_2, combined_2) = results
+    assert len(wind_2['hourly']) == 2 * len(wind_1['hourly'])
+    for key in ('Revenue', 'energy_sold_to_grid'):
+        np.testing.assert_allclose(wind_2[key], wind_1[key], rtol=1e-9)
+    for key in ('PES', 'CO2_saving', 'NPV', 'IRR'):
+        np.testing.assert_allclose(combined_2[key], combined_1[key], rtol=1e-9)
+
+
+def test_quarter_hour_load_without_timestamps_matches_hourly(tmp_path, pvgis_file):
+    hourly = run_pipeline(write_steps(tmp_path / 'load_h.csv', 1), pvgis_file, DEFAULT_CHP, DEFAULT_WIND)
+    quarter = run_pipeline(write_steps(tmp_path / 'load_15.csv', 4), pvgis_file, DEFAULT_CHP, DEFAULT_WIND,
+                           memo={}, freq='15min')
+
+    assert len(quarter['load']) == 4 * len(hourly['load'])
+    expected = summarize_pipeline(hourly)
+    for key, value in summarize_pipeline(quarter).items():
+        np.testing.assert_allclose(value, expected[key], rtol=1e-9, err_msg=key)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from pvgis_reader import iter_pvgis, iter_pvgis_chunks
+
+HEADER = """Latitude (decimal degrees):\t41.273
+Longitude (decimal degrees):\t14.909
+Elevation (m):\t450.0
+
+time,G(i),H_sun,T2m,WS10m,Int
+"""
+LEGEND = """
+G(i): Global irradiance on the inclined plane (plane of the array) (W/m2)
+WS10m: 10-m total wind speed (m/s)
+"""
+
+
+def write_export(path, locations, hours=10):
+    with open(path, 'w') as file:
+        for location in range(locations):
+            file.write(HEADER)
+            for hour in range(hours):
+                file.write(f"20200101:{hour:02d}10,0.0,0.0,{hour}.0,{location * 100 + hour}.5,0.0\n")
+            file.write(LEGEND)
+    return path
+
+
+def test_chunks_keep_the_rows_of_every_location(tmp_path):
+    file_path = write_export(tmp_path / 'wind.csv', locations=2)
+
+    chunks = list(iter_pvgis_chunks(file_path, chunk_rows=4))
+    assert [chunk['location'] for chunk in chunks] == [0, 0, 0, 1, 1, 1]
+    assert [len(chunk['WS10m']) for chunk in chunks] == [4, 4, 2] * 2
+    assert chunks[3]['metadata']['latitude'] == 41.273
+
+    # The whole series of a location is the join of its chunks
+    locations = list(iter_pvgis(file_path, columns=('WS10m', 'T2m'), chunk_rows=4))
+    assert len(locations) == 2
+    np.testing.assert_array_equal(locations[1]['WS10m'], np.arange(10) + 100.5)
+    np.testing.assert_array_equal(locations[1]['T2m'], np.arange(10.0))
+    assert locations[0]['time'][3] == np.datetime64('2020-01-01T03:10')
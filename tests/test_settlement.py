@@ -0,0 +1,53 @@
+import numpy as np
+
+from chp_dispatch import TIME_BANDS
+from settlement import BUY_PRICES, SELL_PRICES, band_prices, settle
+
+
+def baseline_settlement(production, load, bands, AG):
+    # Hour by hour loop of the original calculate_wind
+    revenue = AG
+    energy_sold_to_grid = 0
+    for wp, lp, band in zip(production, load, bands):
+        surplus = wp - lp
+        if surplus < 0:
+            revenue += wp * BUY_PRICES[band]
+        else:
+            revenue += wp * BUY_PRICES[band] + surplus * SELL_PRICES[band]
+            energy_sold_to_grid += surplus
+    return revenue, energy_sold_to_grid
+
+
+def make_hours(hours=8760, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 4000, hours), rng.uniform(-800, 2500, hours).round(), rng.choice(TIME_BANDS, hours)
+
+
+def test_settle_matches_the_hourly_loop():
+    production, load, bands = make_hours()
+    settlement = settle(production, load, band_prices(bands, BUY_PRICES), band_prices(bands, SELL_PRICES), AG=1000)
+
+    revenue, energy_sold_to_grid = baseline_settlement(production, load, bands, 1000)
+    np.testing.assert_allclose(settlement['revenue'], revenue, rtol=1e-12)
+    np.testing.assert_allclose(settlement['energy_sold_to_grid'], energy_sold_to_grid, rtol=1e-12)
+
+
+def test_settle_scenarios_and_step_hours():
+    production, load, bands = make_hours()
+    buy, sell = band_prices(bands, BUY_PRICES), band_prices(bands, SELL_PRICES)
+
+    # Scenarios stacked as columns settle as separate runs
+    stacked = settle(np.column_stack([production, production / 2]), load, buy, sell)
+    for column, scale in enumerate((1, 2)):
+        single = settle(production / scale, load, buy, sell)
+        np.testing.assert_allclose(stacked['revenue'][column], single['revenue'], rtol=1e-12)
+
+    # Quarter-hour steps of the same power settle as the hour, per-step hours weigh every step
+    quarter = settle(np.repeat(production, 4), np.repeat(load, 4), np.repeat(buy, 4), np.repeat(sell, 4),
+                     hours_per_step=0.25)
+    weighted = settle(np.tile(production, 2), np.tile(load, 2), np.tile(buy, 2), np.tile(sell, 2),
+                      hours_per_step=np.full(2 * len(load), 0.5))
+    hourly = settle(production, load, buy, sell)
+    for result in (quarter, weighted):
+        for key in ('revenue', 'energy_sold_to_grid'):
+            np.testing.assert_allclose(result[key], hourly[key], rtol=1e-12)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from battery_storage import simulate_battery
+from chp_dispatch import TIME_BANDS, dispatch_chp_modulating
+from thermal_storage import couple_thermal_storage, simulate_storage
+
+
+def quarter_hours(values):
+    # Every hour split into four quarter-hours of the same power
+    return np.repeat(np.asarray(values), 4, axis=0)
+
+
+def test_thermal_storage_quarter_hour_matches_hourly():
+    rng = np.random.default_rng(0)
+    hourly = pd.DataFrame({
+        'Potenza Elettrica': rng.uniform(200, 1200, 500).round(),
+        'Potenza Termica': rng.uniform(100, 1500, 500).round(),
+        'Fascia Oraria': rng.choice(TIME_BANDS, 500),
+    })
+    quarter = hourly.loc[hourly.index.repeat(4)].reset_index(drop=True)
+
+    results = []
+    for df, hours_per_step in ((hourly, 1.0), (quarter, 0.25)):
+        balance = dispatch_chp_modulating(df, 800, 900, mode='electric', hours_per_step=hours_per_step)
+        results.append(couple_thermal_storage(df, balance, 900, capacity=2000, charge_limit=300,
+                                              discharge_limit=400, hours_per_step=hours_per_step))
+
+    # Within an hour the tank only charges or only discharges, so the limits per step add up to the hourly ones
+    for key in ('provided_by_chp_t', 'surplus_t', 'integration_t'):
+        np.testing.assert_allclose(results[1][key], results[0][key], rtol=1e-9)
+    for key in ('charged', 'discharged', 'soc'):
+        np.testing.assert_allclose(results[1]['storage'][key], results[0]['storage'][key], rtol=1e-9)
+
+
+def test_thermal_storage_losses_compound_over_the_step():
+    # No heat surplus or demand: the stored heat only decays
+    df = pd.DataFrame({'Potenza Termica': np.zeros(96)})
+    balance = {'load_factor': np.zeros((96, 1)), 'provided_by_chp_t': 0.0, 'surplus_t': 0.0, 'integration_t': 0.0}
+
+    result = couple_thermal_storage(df, balance, 900, capacity=1000, loss_rate=0.01, soc0=1000, hours_per_step=0.25)
+    np.testing.assert_allclose(result['storage']['soc'], 1000 * 0.99 ** 24)
+
+
+def test_battery_quarter_hour_matches_hourly():
+    rng = np.random.default_rng(1)
+    production = 800 + rng.uniform(0, 2000, 500)
+    load = rng.uniform(200, 2500, 500)
+    bands = rng.choice(TIME_BANDS, 500)
+
+    hourly = simulate_battery(production, load, bands, capacity=[500.0, 3000.0], power=[100.0, 1000.0])
+    quarter = simulate_battery(quarter_hours(production), quarter_hours(load), quarter_hours(bands),
+                               capacity=[500.0, 3000.0], power=[100.0, 1000.0], hours_per_step=0.25)
+
+    np.testing.assert_allclose(quarter['revenue_change'], hourly['revenue_change'], rtol=1e-9)
+    for key, values in hourly['bands'].items():
+        for fascia in TIME_BANDS:
+            np.testing.assert_allclose(quarter['bands'][key][fascia], values[fascia], rtol=1e-9, atol=1e-6)
+
+
+def naive_storage(surplus, deficit, capacity, charge_limit, discharge_limit, loss_rate, soc0, soc_min,
+                  charge_efficiency, discharge_efficiency):
+    # One scenario, one hour at a time with Python floats
+    soc = soc0
+    charged = discharged = losses = 0.0
+    for s, d in zip(surplus, deficit):
+        lost = soc * loss_rate
+        soc -= lost
+        charge = min(s, charge_limit, (capacity - soc) / charge_efficiency)
+        soc += charge * charge_efficiency
+        discharge = min(d, discharge_limit, max(soc - soc_min, 0) * discharge_efficiency)
+        soc -= discharge / discharge_efficiency
+        losses += lost
+        charged += charge
+        discharged += discharge
+    return {'charged': charged, 'discharged': discharged, 'losses': losses, 'soc': soc}
+
+
+def test_simulate_storage_matches_the_hourly_loop():
+    rng = np.random.default_rng(2)
+    balance = rng.normal(0, 300, 2000)
+    surplus, deficit = np.maximum(balance, 0), np.maximum(-balance, 0)
+
+    scenarios = [
+        # Unlimited lossless tank: the cumulative-sum path
+        dict(capacity=np.inf, charge_limit=np.inf, discharge_limit=np.inf, loss_rate=0.0, soc0=50.0, soc_min=0.0,
+             charge_efficiency=1.0, discharge_efficiency=1.0),
+        dict(capacity=1500.0, charge_limit=200.0, discharge_limit=250.0, loss_rate=0.01, soc0=100.0, soc_min=50.0,
+             charge_efficiency=0.95, discharge_efficiency=0.9),
+        dict(capacity=400.0, charge_limit=np.inf, discharge_limit=100.0, loss_rate=0.0, soc0=0.0, soc_min=0.0,
+             charge_efficiency=1.0, discharge_efficiency=1.0),
+    ]
+    for parameters in scenarios:
+        result = simulate_storage(surplus, deficit, **parameters)
+        expected = naive_storage(surplus, deficit, **parameters)
+        for key, value in expected.items():
+            np.testing.assert_allclose(result[key][0], value, rtol=1e-9, atol=1e-9, err_msg=key)
+
+    # The limited scenarios stacked on one grid give the same results
+    grid = {key: np.array([parameters[key] for parameters in scenarios[1:]]) for key in scenarios[1]}
+    stacked = simulate_storage(surplus, deficit, **grid)
+    for column, parameters in enumerate(scenarios[1:]):
+        expected = naive_storage(surplus, deficit, **parameters)
+        for key, value in expected.items():
+            np.testing.assert_allclose(stacked[key][column], value, rtol=1e-9, atol=1e-9, err_msg=key)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from time_bands import classify_time_bands
+
+
+def baseline_band(time):
+    # Row by row rule of the original preprocess_load_file
+    hour = time.hour
+    day = time.weekday()
+    if day == 6:
+        return 'F3'
+    elif hour in [1, 2, 3, 4, 5, 6, 23, 0]:
+        return 'F3'
+    elif 7 <= hour < 19 and 0 <= day <= 4:
+        return 'F1'
+    else:
+        return 'F2'
+
+
+def test_classify_time_bands_matches_the_row_rule():
+    index = pd.date_range('2024-01-01', periods=8760, freq='h')
+    expected = [baseline_band(time) for time in index]
+    np.testing.assert_array_equal(classify_time_bands(index), expected)
+
+
+def test_classify_time_bands_quarter_hours_over_several_years():
+    # Every quarter-hour takes the band of its hour, in each year's own calendar
+    index = pd.date_range('2023-12-30', '2025-01-02', freq='15min')
+    expected = [baseline_band(time) for time in index]
+    np.testing.assert_array_equal(classify_time_bands(index), expected)
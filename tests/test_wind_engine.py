@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from wind_engine import TURBINES, wind_production
+
+
+def test_wind_production_empty_series():
+    production = wind_production(np.array([]), TURBINES['V100/2000']['speed_power'])
+
+    assert production['power'].shape == (0,)
+    assert production['energy'] == 0
+    assert production['annual_energy'] == 0
+    assert production['histogram'].empty
+
+
+def test_wind_production_empty_series_several_curves():
+    curves = [turbine['speed_power'] for turbine in TURBINES.values()]
+    production = wind_production(np.array([]), curves)
+
+    assert production['power'].shape == (len(curves), 0)
+    np.testing.assert_array_equal(production['annual_energy'], np.zeros(len(curves)))
+
+
+def baseline_production(ws, speed_power):
+    # Per-hour interpolation and histogram energy of the original calculate_wind, on rounded wind speeds
+    speeds, powers = np.asarray(speed_power, dtype=float).T
+    ws = pd.Series(ws).round().astype(int)
+    wind_speed_pct = (ws.value_counts(normalize=True) * 100).reset_index()
+    wind_speed_pct.columns = ["WS", "%_h"]
+    total_power = 0
+    for _, row in wind_speed_pct.iterrows():
+        total_power += np.interp(row["WS"], speeds, powers) * row["%_h"] / 100 * 8760
+    return ws.apply(lambda speed: np.interp(speed, speeds, powers)).to_numpy(), total_power, wind_speed_pct
+
+
+def test_wind_production_matches_the_original_loop():
+    ws = np.random.default_rng(0).weibull(2, 8760).round() * 7
+    for turbine in TURBINES.values():
+        power, total_power, wind_speed_pct = baseline_production(ws, turbine['speed_power'])
+        production = wind_production(ws, turbine['speed_power'])
+
+        np.testing.assert_allclose(production['power'], power, rtol=1e-12)
+        np.testing.assert_allclose(production['annual_energy'], total_power, rtol=1e-9)
+        histogram = wind_speed_pct.sort_values('WS').reset_index(drop=True)
+        np.testing.assert_array_equal(production['histogram']['WS'], histogram['WS'])
+        np.testing.assert_allclose(production['histogram']['%_h'], histogram['%_h'], rtol=1e-12)
+
+
+def test_wind_production_several_curves_and_steps():
+    ws = np.random.default_rng(1).weibull(2, 4 * 8760) * 7
+    curves = [turbine['speed_power'] for turbine in TURBINES.values()]
+    production = wind_production(ws, curves, hours_per_step=0.25)
+
+    for i, curve in enumerate(curves):
+        speeds, powers = np.asarray(curve, dtype=float).T
+        np.testing.assert_allclose(production['power'][i], np.interp(ws, speeds, powers), rtol=1e-12, atol=1e-9)
+    # A year of quarter-hours: the energy of the series is the annual energy
+    np.testing.assert_allclose(production['energy'], production['annual_energy'], rtol=1e-12)